@@ -0,0 +1,186 @@
+"""
+Sparse fieldsets for API responses
+
+Clients can ask for a subset of a serializer's fields on GET requests:
+
+    ?fields=id,title,owner_name          only these fields
+    ?omit=description,tags               everything except these
+    ?fields=student_id,user.name         dotted names select nested fields
+
+Serializers opt in with SparseFieldsetMixin. Viewsets opt in with
+SparseFieldsetViewMixin, which also trims the query: columns that only back
+omitted fields are deferred, and prefetches listed in ``sparse_prefetches``
+run only when the field that needs them is returned.
+"""
+from django.utils.text import Truncator
+from rest_framework import serializers
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
+def parse_fieldset(value):
+    """
+    Turn "id,user.name,user.email" into {'id': {}, 'user': {'name': {}, 'email': {}}}.
+    An empty dict means the whole field.
+    """
+    if value is None:
+        return None
+
+    tree = {}
+    for path in value.split(','):
+        parts = [part.strip() for part in path.split('.') if part.strip()]
+        node = tree
+        for part in parts:
+            node = node.setdefault(part, {})
+    return tree
+
+
+def get_request_fieldsets(request):
+    """Return the (fields, omit) trees requested on a GET request"""
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return None, None
+
+    params = request.query_params if hasattr(request, 'query_params') else request.GET
+    return parse_fieldset(params.get(FIELDS_PARAM)), parse_fieldset(params.get(OMIT_PARAM))
+
+
+def prune_fields(serializer, include=None, exclude=None):
+    """Drop fields from a serializer (and its nested serializers) in place"""
+    fields = serializer.fields
+    for name in list(fields):
+        if include and name not in include:
+            fields.pop(name)
+            continue
+        if exclude and name in exclude and not exclude[name]:
+            fields.pop(name)
+            continue
+
+        sub_include = include.get(name) if include else None
+        sub_exclude = exclude.get(name) if exclude else None
+        if sub_include or sub_exclude:
+            nested = getattr(fields[name], 'child', fields[name])
+            if isinstance(nested, serializers.Serializer):
+                prune_fields(nested, sub_include, sub_exclude)
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin honouring ?fields= and ?omit= on the request in its context.
+
+    Only applies to serializers created with a request in their context (the
+    top-level serializer of a view); nested serializers are pruned through
+    dotted field names.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        include, exclude = get_request_fieldsets(self.context.get('request'))
+        if include or exclude:
+            prune_fields(self, include, exclude)
+
+
+class PreviewField(serializers.CharField):
+    """Read-only text field truncated to ``length`` characters for list views"""
+
+    def __init__(self, length=200, **kwargs):
+        self.length = length
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return Truncator(value or '').chars(self.length)
+
+
+def field_sources(serializer):
+    """
+    Map each field of a serializer to the model attribute path it reads,
+    e.g. 'owner_name' -> 'owner__user__name'. Method fields map to None.
+    """
+    sources = {}
+    for name, field in serializer.fields.items():
+        if field.source == '*':
+            sources[name] = None
+        else:
+            sources[name] = '__'.join(field.source_attrs)
+    return sources
+
+
+def deferrable_columns(model, serializer, full_serializer, select_related, prefix=''):
+    """
+    Columns of ``model`` (and of select_related relations backing nested
+    serializers) that are only read by fields missing from ``serializer``.
+
+    Method fields that read columns declare them in ``Meta.sparse_requires``
+    ({field name: [column, ...]}) so those columns are never deferred.
+    """
+    concrete = {
+        field.name for field in model._meta.concrete_fields
+        if not field.primary_key and not field.is_relation
+    }
+    kept = field_sources(serializer)
+    dropped = {
+        name: source for name, source in field_sources(full_serializer).items()
+        if name not in kept
+    }
+
+    requires = getattr(getattr(serializer, 'Meta', None), 'sparse_requires', {})
+    needed = {source.split('__')[0] for source in kept.values() if source}
+    for name in kept:
+        needed.update(requires.get(name, ()))
+
+    deferred = [
+        prefix + source for source in dropped.values()
+        if source in concrete and source not in needed
+    ]
+
+    for name, field in serializer.fields.items():
+        if not isinstance(field, serializers.ModelSerializer) or len(field.source_attrs) != 1:
+            continue
+
+        relation = field.source_attrs[0]
+        if relation not in select_related:
+            continue
+        # Another kept field reads through the same relation (e.g. owner__user__name)
+        if any(
+            source and source.startswith(relation + '__')
+            for other, source in kept.items() if other != name
+        ):
+            continue
+
+        deferred += deferrable_columns(
+            model._meta.get_field(relation).related_model,
+            field, full_serializer.fields[name], select_related[relation],
+            prefix=f'{prefix}{relation}__'
+        )
+    return deferred
+
+
+class SparseFieldsetViewMixin:
+    """
+    Viewset mixin that trims the queryset to the fields a request asks for.
+
+    ``sparse_prefetches`` maps serializer field names to the prefetch lookups
+    they need; those prefetches are skipped when the field is not returned.
+    Call ``trim_queryset`` at the end of ``get_queryset``.
+    """
+    sparse_prefetches = {}
+
+    def trim_queryset(self, queryset):
+        include, exclude = get_request_fieldsets(self.request)
+        serializer = self.get_serializer()
+        kept = serializer.fields
+
+        for name, lookups in self.sparse_prefetches.items():
+            if name in kept:
+                queryset = queryset.prefetch_related(*lookups)
+
+        if include or exclude:
+            select_related = queryset.query.select_related
+            if not isinstance(select_related, dict):
+                select_related = {}
+            full_serializer = self.get_serializer_class()()
+            deferred = deferrable_columns(queryset.model, serializer, full_serializer, select_related)
+            if deferred:
+                queryset = queryset.defer(*deferred)
+        return queryset
@@ -0,0 +1,58 @@
+"""
+Django management command to archive old messages.
+
+Moves messages older than MESSAGE_RETENTION_DAYS into compressed
+per-conversation archives, in batches of MESSAGE_ARCHIVE_BATCH_SIZE, and
+deletes archives past MESSAGE_ARCHIVE_RETENTION_DAYS. Archived messages are
+still returned by the conversation messages endpoint. Run it regularly,
+e.g. from cron:
+
+    30 3 * * * cd /app/backend && python manage.py archive_messages
+
+Usage:
+    python manage.py archive_messages                        # Use the retention settings
+    python manage.py archive_messages --older-than-days 180
+    python manage.py archive_messages --batch-size 500
+    python manage.py archive_messages --no-purge             # Keep expired archives
+"""
+
+from django.core.management.base import BaseCommand
+from messaging.archive import archive_cutoff, archive_messages, purge_archives
+
+
+class Command(BaseCommand):
+    help = 'Moves old messages into compressed archives in bounded batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days',
+            type=int,
+            default=None,
+            help='Archive messages older than this many days (default: MESSAGE_RETENTION_DAYS)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Messages moved per transaction (default: MESSAGE_ARCHIVE_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--no-purge',
+            action='store_true',
+            help='Do not delete archives past MESSAGE_ARCHIVE_RETENTION_DAYS',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = archive_cutoff(retention_days=options['older_than_days'])
+        if cutoff is None:
+            self.stdout.write('Message archival is disabled (MESSAGE_RETENTION_DAYS is None)')
+        else:
+            messages, archives = archive_messages(cutoff, options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Archived {messages} messages from before {cutoff:%Y-%m-%d} into {archives} archives'
+            ))
+
+        if not options['no_purge']:
+            deleted = purge_archives(batch_size=options['batch_size'])
+            if deleted:
+                self.stdout.write(f'Deleted {deleted} expired archives')
@@ -0,0 +1,169 @@
+"""
+Django management command to benchmark JSON rendering and parsing.
+
+Builds a project detail and a conversation detail payload from temporary data
+(rolled back afterwards) and compares DRF's standard library JSON classes
+with the orjson-backed ones in config.renderers.
+
+Usage:
+    python manage.py benchmark_json                          # 200 iterations per payload
+    python manage.py benchmark_json --count 1000
+    python manage.py benchmark_json --messages 2000 --tasks 200
+"""
+
+import io
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from config.renderers import FastJSONParser, FastJSONRenderer, orjson
+
+
+class Command(BaseCommand):
+    help = 'Compares JSON render/parse throughput of the stdlib and orjson-backed DRF classes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=200,
+            help='Renders and parses per measurement',
+        )
+        parser.add_argument(
+            '--members',
+            type=int,
+            default=10,
+            help='Team members on the benchmark project',
+        )
+        parser.add_argument(
+            '--tasks',
+            type=int,
+            default=50,
+            help='Tasks (and a fifth as many milestones and meetings) on the benchmark project',
+        )
+        parser.add_argument(
+            '--messages',
+            type=int,
+            default=500,
+            help='Messages in the benchmark conversation',
+        )
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING(
+                'orjson is not installed; the fast classes fall back to the standard library'
+            ))
+
+        with transaction.atomic():
+            payloads = self.build_payloads(options)
+            transaction.set_rollback(True)
+
+        count = options['count']
+        self.stdout.write(f'{count} iterations per measurement')
+
+        for name, data in payloads.items():
+            body = JSONRenderer().render(data)
+            self.stdout.write(f'\n{name} payload: {len(body) / 1024:.1f} KiB')
+
+            for label, renderer, parser in (
+                ('stdlib', JSONRenderer(), JSONParser()),
+                ('fast', FastJSONRenderer(), FastJSONParser()),
+            ):
+                render_rate = self.measure(lambda: renderer.render(data), count)
+                parse_rate = self.measure(lambda: parser.parse(io.BytesIO(body)), count)
+                self.stdout.write(
+                    f'  {label:<7} render {render_rate:9.1f}/sec ({render_rate * len(body) / 2 ** 20:7.1f} MiB/s)   '
+                    f'parse {parse_rate:9.1f}/sec'
+                )
+
+    def measure(self, func, count):
+        func()
+        start = time.perf_counter()
+        for _ in range(count):
+            func()
+        return count / (time.perf_counter() - start)
+
+    def build_payloads(self, options):
+        from messaging.models import Conversation, Message
+        from messaging.serializers import ConversationDetailSerializer
+        from projects.models import Meeting, Milestone, Project, Task
+        from projects.serializers import ProjectDetailSerializer
+        from teams.models import Team
+        from users.models import Faculty, Student, User
+
+        def create_student(i):
+            user = User.objects.create_user(
+                email=f'bench-student-{i}@std.medipol.edu.tr', password=None,
+                name=f'Benchmark Öğrenci {i}', user_type='student'
+            )
+            return Student.objects.create(
+                user=user, student_id=f'BENCHJSON{i:05d}', department='Bilgisayar Mühendisliği',
+                faculty='Mühendislik ve Doğa Bilimleri Fakültesi', year='3',
+                skills=['Python', 'Django', 'React', 'PostgreSQL'], interests=['AI', 'Web']
+            )
+
+        faculty_user = User.objects.create_user(
+            email='bench-faculty@medipol.edu.tr', password=None,
+            name='Prof. Dr. Benchmark', user_type='faculty'
+        )
+        faculty = Faculty.objects.create(
+            user=faculty_user, faculty_id='BENCHJSONF', department='Bilgisayar Mühendisliği',
+            title='Prof. Dr.', specialization='Distributed systems and machine learning'
+        )
+
+        students = [create_student(i) for i in range(max(options['members'], 1))]
+        project = Project.objects.create(
+            owner=students[0], supervisor=faculty, title='Kampüs Navigasyon Uygulaması',
+            description='Artırılmış gerçeklik ile kampüs içi navigasyon. ' * 20,
+            category='mobile', status='in_progress', max_team_size=len(students),
+            required_skills=['Flutter', 'ARCore', 'Firebase', 'Python'],
+            tags=['AR', 'Mobile', 'Campus'], objectives='Objectives. ' * 30,
+            requirements='Requirements. ' * 30, start_date=date.today(), expected_duration='6 months'
+        )
+        team = Team.objects.create(project=project, max_members=len(students))
+        team.members.add(*students)
+
+        now = timezone.now()
+        extra = max(options['tasks'] // 5, 1)
+        Milestone.objects.bulk_create([
+            Milestone(project=project, description=f'Milestone {i}: ' + 'deliverable ' * 10,
+                      due_date=date.today() + timedelta(days=7 * i))
+            for i in range(extra)
+        ])
+        Task.objects.bulk_create([
+            Task(project=project, title=f'Task {i}', description='Implement the feature. ' * 5,
+                 assignee=students[i % len(students)], due_date=date.today() + timedelta(days=i))
+            for i in range(options['tasks'])
+        ])
+        meetings = Meeting.objects.bulk_create([
+            Meeting(project=project, title=f'Weekly sync {i}', description='Progress review',
+                    date_time=now + timedelta(days=7 * i), location='B Blok 3. Kat')
+            for i in range(extra)
+        ])
+        for meeting in meetings:
+            meeting.participants.add(*students)
+
+        conversation = Conversation.objects.create(name='Proje ekibi', is_group=True)
+        conversation.participants.add(faculty_user, *(student.user for student in students))
+        Message.objects.bulk_create([
+            Message(conversation=conversation, sender=students[i % len(students)].user,
+                    content=f'Mesaj {i}: yarınki toplantı için güncellemeleri paylaşıyorum. 👍')
+            for i in range(options['messages'])
+        ])
+
+        project = Project.objects.select_related('owner__user', 'supervisor__user').prefetch_related(
+            'milestones', 'team__members__user', 'tasks__assignee__user', 'meetings__participants__user'
+        ).get(pk=project.pk)
+        conversation = Conversation.objects.prefetch_related(
+            'participants', 'messages__sender'
+        ).get(pk=conversation.pk)
+
+        return {
+            'project detail': ProjectDetailSerializer(project).data,
+            'conversation detail': ConversationDetailSerializer(conversation).data,
+        }
@@ -0,0 +1,102 @@
+"""
+Django management command to benchmark message sending throughput.
+
+Creates temporary users and a group conversation, then sends messages
+through the send_message endpoint from several concurrent threads and
+reports messages/sec and per-request latency. The temporary data is deleted
+afterwards.
+
+Usage:
+    python manage.py benchmark_messaging                          # 4 senders, 100 messages each
+    python manage.py benchmark_messaging --senders 16 --messages 500
+"""
+
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+
+class Command(BaseCommand):
+    help = 'Measures send_message throughput with concurrent senders'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--senders',
+            type=int,
+            default=4,
+            help='Concurrent sender threads, each a different participant',
+        )
+        parser.add_argument(
+            '--messages',
+            type=int,
+            default=100,
+            help='Messages sent by each sender',
+        )
+
+    def handle(self, *args, **options):
+        from messaging.models import Conversation
+        from users.models import User
+
+        senders = max(options['senders'], 1)
+        per_sender = options['messages']
+
+        users = [
+            User.objects.create_user(
+                email=f'bench-sender-{i}@std.medipol.edu.tr', password=None,
+                name=f'Benchmark Sender {i}', user_type='student'
+            )
+            for i in range(senders)
+        ]
+        conversation = Conversation.objects.create(name='Messaging benchmark', is_group=True)
+        conversation.participants.add(*users)
+
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+
+        def send(user):
+            from rest_framework.test import APIClient
+
+            client = APIClient()
+            client.force_authenticate(user)
+            url = f'/api/messaging/conversations/{conversation.pk}/send_message/'
+            local = []
+            try:
+                for i in range(per_sender):
+                    start = time.perf_counter()
+                    response = client.post(url, {'content': f'Benchmark message {i}'}, format='json')
+                    local.append(time.perf_counter() - start)
+                    if response.status_code != 201:
+                        with lock:
+                            errors.append(response.status_code)
+            finally:
+                close_old_connections()
+                with lock:
+                    latencies.extend(local)
+
+        threads = [threading.Thread(target=send, args=(user,)) for user in users]
+        try:
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+        finally:
+            conversation.delete()
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+        sent = len(latencies) - len(errors)
+        latencies.sort()
+        self.stdout.write(f'{senders} senders x {per_sender} messages in {elapsed:.2f}s')
+        self.stdout.write(f'throughput: {sent / elapsed:.1f} messages/sec')
+        if latencies:
+            self.stdout.write(
+                f'latency: median {statistics.median(latencies) * 1000:.1f} ms, '
+                f'p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms'
+            )
+        if errors:
+            self.stdout.write(self.style.WARNING(f'{len(errors)} failed sends (status codes: {sorted(set(errors))})'))
@@ -0,0 +1,89 @@
+"""
+Django management command to benchmark password hashing throughput.
+
+Usage:
+    python manage.py benchmark_password_hashing                  # All profiles, 20 hashes each
+    python manage.py benchmark_password_hashing --profile argon2
+    python manage.py benchmark_password_hashing --registrations  # Also time full student registrations
+"""
+
+import os
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks password hashing (and optionally registrations) per core'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profile',
+            choices=sorted(settings.PASSWORD_HASHER_PROFILES),
+            help='Only benchmark this hashing profile',
+        )
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=20,
+            help='Number of passwords to hash per measurement',
+        )
+        parser.add_argument(
+            '--registrations',
+            action='store_true',
+            help='Also time full student registrations with the active profile (rolled back)',
+        )
+
+    def handle(self, *args, **options):
+        count = options['count']
+        profiles = [options['profile']] if options['profile'] else sorted(settings.PASSWORD_HASHER_PROFILES)
+
+        self.stdout.write(f'CPU cores: {os.cpu_count()}, hashes per measurement: {count}')
+
+        for profile in profiles:
+            hasher = import_string(settings.PASSWORD_HASHER_PROFILES[profile])()
+            try:
+                hasher.encode('warm-up-password', hasher.salt())
+            except (ImportError, ValueError) as e:
+                self.stdout.write(self.style.WARNING(f'{profile}: skipped ({e})'))
+                continue
+
+            start = time.perf_counter()
+            for i in range(count):
+                hasher.encode(f'benchmark-password-{i}', hasher.salt())
+            per_core = count / (time.perf_counter() - start)
+
+            self.stdout.write(f'{profile:<8} {per_core:8.1f} hashes/sec per core')
+
+        if options['registrations']:
+            self.benchmark_registrations(count)
+
+    def benchmark_registrations(self, count):
+        from users.serializers import StudentRegistrationSerializer
+
+        make_password('warm-up-password')
+
+        start = time.perf_counter()
+        with transaction.atomic():
+            for i in range(count):
+                serializer = StudentRegistrationSerializer(data={
+                    'email': f'benchmark-{i}@benchmark.medipol.edu.tr',
+                    'password': 'Benchmark-Passw0rd!',
+                    'password_confirm': 'Benchmark-Passw0rd!',
+                    'name': f'Benchmark Student {i}',
+                    'student_id': f'BENCH{i:06d}',
+                    'department': 'Computer Engineering',
+                    'year': '1',
+                })
+                serializer.is_valid(raise_exception=True)
+                serializer.save()
+            transaction.set_rollback(True)
+        rate = count / (time.perf_counter() - start)
+
+        self.stdout.write(
+            f'registrations ({settings.PASSWORD_HASHING_PROFILE}): {rate:.1f} registrations/sec on one request thread'
+        )
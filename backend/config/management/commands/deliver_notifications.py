@@ -0,0 +1,65 @@
+"""
+Django management command to email queued notifications.
+
+Usage:
+    python manage.py deliver_notifications                 # Run continuously, polling every 10 seconds
+    python manage.py deliver_notifications --once          # Deliver what is pending and exit (errors abort)
+    python manage.py deliver_notifications --interval 30 --batch-size 500
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from notifications.delivery import deliver_pending
+
+# Longest wait between retries while sending keeps failing, in seconds
+MAX_BACKOFF = 300
+
+
+class Command(BaseCommand):
+    help = 'Sends queued notification emails, coalescing bursts into digests'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Deliver pending notifications and exit',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=10,
+            help='Seconds to wait between polls when nothing is pending',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Recipients handled per batch',
+        )
+
+    def deliver(self, batch_size):
+        sent = deliver_pending(batch_size)
+        while sent:
+            self.stdout.write(f'Sent {sent} notification emails.')
+            sent = deliver_pending(batch_size)
+
+    def handle(self, *args, **options):
+        if options['once']:
+            self.deliver(options['batch_size'])
+            return
+
+        failures = 0
+        while True:
+            try:
+                self.deliver(options['batch_size'])
+                failures = 0
+            except Exception as exc:
+                # The failed batch is pending again; keep the worker alive and
+                # retry with a growing delay while the mail server is down
+                failures += 1
+                self.stderr.write(f'Notification delivery failed ({exc}); retrying.')
+
+            close_old_connections()
+            time.sleep(min(options['interval'] * 2 ** failures, MAX_BACKOFF))
@@ -0,0 +1,62 @@
+"""
+Django management command to bulk import students from a CSV file.
+
+The CSV needs a header row with the columns email, name, student_id,
+department, year and optionally faculty, skills and interests (skills and
+interests are separated by semicolons).
+
+Usage:
+    python manage.py import_students students.csv
+    python manage.py import_students students.csv --chunk-size 1000
+    python manage.py import_students students.csv --no-activation   # Don't send activation emails
+"""
+
+from django.conf import settings
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from users.importers import check_encoding, read_student_csv, import_students
+
+
+class Command(BaseCommand):
+    help = 'Bulk imports students from a CSV file and sends activation emails'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help='Path to the CSV file')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.STUDENT_IMPORT_CHUNK_SIZE,
+            help='Rows validated and inserted per batch',
+        )
+        parser.add_argument(
+            '--no-activation',
+            action='store_true',
+            help='Do not send activation emails',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            # Rejected before any chunk is imported
+            with open(options['csv_file'], 'rb') as file:
+                check_encoding(File(file))
+        except OSError as e:
+            raise CommandError(f'Could not read {options["csv_file"]}: {e}')
+        except UnicodeDecodeError:
+            raise CommandError(f'{options["csv_file"]} is not a UTF-8 encoded CSV file')
+
+        try:
+            with open(options['csv_file'], newline='', encoding='utf-8-sig') as file:
+                result = import_students(
+                    read_student_csv(file),
+                    chunk_size=options['chunk_size'],
+                    send_activation=not options['no_activation'],
+                )
+        except OSError as e:
+            raise CommandError(f'Could not read {options["csv_file"]}: {e}')
+
+        for error in result['errors']:
+            self.stdout.write(self.style.WARNING(f'Row {error["row"]}: {error["errors"]}'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result["created"]} students ({result["failed"]} rows rejected).'
+        ))
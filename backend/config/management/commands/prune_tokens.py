@@ -0,0 +1,46 @@
+"""
+Django management command to delete expired JWT tokens.
+
+Every token refresh writes an OutstandingToken and, with rotation, a
+BlacklistedToken row. Run this regularly, e.g. from cron:
+
+    0 3 * * * cd /app/backend && python manage.py prune_tokens
+
+Usage:
+    python manage.py prune_tokens                     # Delete expired tokens in batches
+    python manage.py prune_tokens --batch-size 1000
+    python manage.py prune_tokens --stats             # Only print row counts and table sizes
+"""
+
+from django.core.management.base import BaseCommand
+from users.tokens import prune_expired_tokens, token_table_stats
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired outstanding and blacklisted refresh tokens in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Tokens deleted per transaction (default: TOKEN_PRUNE_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--stats',
+            action='store_true',
+            help='Print token table statistics without deleting anything',
+        )
+
+    def handle(self, *args, **options):
+        if not options['stats']:
+            outstanding, blacklisted = prune_expired_tokens(options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Deleted {outstanding} expired outstanding tokens and {blacklisted} blacklist entries'
+            ))
+
+        for stats in token_table_stats():
+            size = f'{stats["bytes"] / 1024:.1f} KiB' if stats['bytes'] is not None else 'size unknown'
+            self.stdout.write(
+                f'{stats["table"]:<36} {stats["rows"]:>10} rows   {stats["expired"]:>10} expired   {size}'
+            )
@@ -0,0 +1,27 @@
+"""
+Django management command to rebuild the message full-text search index.
+
+Recreates the index (and on SQLite the triggers that keep it in sync) from
+the current messages. Run it after restoring a database or after a migration
+that rebuilt the messaging_message table on SQLite.
+
+Usage:
+    python manage.py rebuild_message_search
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search index over message content'
+
+    def handle(self, *args, **options):
+        from messaging import search
+
+        with connection.schema_editor() as schema_editor:
+            search.drop_search_index(schema_editor)
+            search.create_search_index(schema_editor)
+        search._fts_available = None
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt message search index ({search.search_backend()})'))
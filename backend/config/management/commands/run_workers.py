@@ -0,0 +1,63 @@
+"""
+Django management command to run background job workers.
+
+Usage:
+    python manage.py run_workers                   # One worker process per CPU core
+    python manage.py run_workers --processes 4
+    python manage.py run_workers --once            # Drain the queue and exit
+    python manage.py run_workers --stats           # Show per-task job counts and timings
+"""
+
+from django.core.management.base import BaseCommand
+from jobs.queue import job_stats
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = 'Runs background jobs from the database queue on a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=None,
+            help='Number of worker processes (defaults to CPU count)',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Seconds to wait between polls when the queue is empty',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once no jobs are due',
+        )
+        parser.add_argument(
+            '--stats',
+            action='store_true',
+            help='Print per-task job counts and timings and exit',
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            for row in job_stats():
+                avg_ms = f'{row["avg_ms"]:.1f}' if row['avg_ms'] is not None else '-'
+                max_ms = f'{row["max_ms"]:.1f}' if row['max_ms'] is not None else '-'
+                self.stdout.write(
+                    f'{row["name"]:<50} {row["status"]:<10} {row["count"]:>7}   '
+                    f'avg {avg_ms} ms   max {max_ms} ms'
+                )
+            return
+
+        worker = Worker(
+            processes=options['processes'],
+            poll_interval=options['poll_interval'],
+            log=self.stdout.write,
+        )
+        self.stdout.write(f'Starting {worker.processes} worker processes ({worker.worker_id})')
+        try:
+            worker.run(once=options['once'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping workers.')
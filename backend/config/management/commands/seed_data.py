@@ -893,11 +893,10 @@ class Command(BaseCommand):
                     {'sender_idx': 1, 'content': 'Good. Send me photos of the setup when you are done.', 'hours_ago': 33},
                 ]
             },
-            # Group conversation for project team
+            # Team group chats, created and kept in sync with the teams
             {
                 'participants': [student_users[0], student_users[2], student_users[3]],  # AI Health team
-                'is_group': True,
-                'name': 'AI Health Project Team',
+                'team_project': 'AI-Powered Health Diagnosis Assistant',
                 'messages': [
                     {'sender_idx': 0, 'content': 'Team meeting tomorrow at 2 PM. Everyone available?', 'hours_ago': 20},
                     {'sender_idx': 1, 'content': 'I will be there!', 'hours_ago': 19},
@@ -909,8 +908,7 @@ class Command(BaseCommand):
             },
             {
                 'participants': [student_users[2], student_users[3], student_users[5]],  # AR Navigation team
-                'is_group': True,
-                'name': 'AR Navigation Team Chat',
+                'team_project': 'AR Campus Navigation',
                 'messages': [
                     {'sender_idx': 0, 'content': 'Has anyone tested the AR markers in low light?', 'hours_ago': 12},
                     {'sender_idx': 1, 'content': 'Not yet. We should do that before the demo.', 'hours_ago': 11},
@@ -944,12 +942,17 @@ class Command(BaseCommand):
         for config in conversation_configs:
             participants = config['participants']
 
-            # Create conversation
-            conversation = Conversation.objects.create(
-                is_group=config['is_group'],
-                name=config.get('name', '')
-            )
-            conversation.participants.add(*participants)
+            if 'team_project' in config:
+                conversation = Conversation.objects.get(team__project__title=config['team_project'])
+            elif not config['is_group']:
+                conversation, _ = Conversation.get_or_create_direct(participants[0].pk, participants[1].pk)
+            else:
+                # Create conversation
+                conversation = Conversation.objects.create(
+                    is_group=True,
+                    name=config.get('name', '')
+                )
+                conversation.participants.add(*participants)
 
             # Add messages
             for msg in config['messages']:
@@ -0,0 +1,141 @@
+"""
+Response compression middleware
+
+Compresses responses with Brotli when the ``brotli`` package is installed and
+the client accepts it, and with gzip otherwise. Responses smaller than
+RESPONSE_COMPRESSION_MIN_SIZE bytes are sent as-is. Streaming responses are
+compressed chunk by chunk.
+
+Gzip output uses Django's helpers, which add random bytes to each response
+as a BREACH mitigation.
+"""
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ACCEPT_ENCODING_RE = re.compile(r'\s*([a-z*]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?', re.I)
+
+
+def accepted_encodings(header):
+    """Encodings in an Accept-Encoding header that are not refused with q=0"""
+    encodings = set()
+    for part in header.split(','):
+        match = ACCEPT_ENCODING_RE.match(part)
+        if not match:
+            continue
+        try:
+            quality = float(match.group(2)) if match.group(2) else 1.0
+        except ValueError:
+            continue
+        if quality > 0:
+            encodings.add(match.group(1).lower())
+    return encodings
+
+
+def brotli_sequence(sequence, quality):
+    compressor = brotli.Compressor(quality=quality)
+    for item in sequence:
+        data = compressor.process(item)
+        if data:
+            yield data
+        data = compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def abrotli_sequence(sequence, quality):
+    compressor = brotli.Compressor(quality=quality)
+    async for item in sequence:
+        data = compressor.process(item)
+        if data:
+            yield data
+        data = compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def agzip_sequence(sequence, max_random_bytes):
+    # Each chunk becomes a complete gzip member; clients decode the concatenation
+    async for item in sequence:
+        yield compress_string(item, max_random_bytes=max_random_bytes)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compress responses for clients that accept it.
+
+    Settings:
+        RESPONSE_COMPRESSION_MIN_SIZE  smallest body (bytes) worth compressing
+        RESPONSE_COMPRESSION_ENCODINGS encodings in order of preference
+        RESPONSE_COMPRESSION_BROTLI_QUALITY  0-11, lower is faster
+    """
+    max_random_bytes = 100
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+
+        min_size = getattr(settings, 'RESPONSE_COMPRESSION_MIN_SIZE', 1024)
+        if not response.streaming and len(response.content) < min_size:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        encoding = self.choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        quality = getattr(settings, 'RESPONSE_COMPRESSION_BROTLI_QUALITY', 4)
+
+        if response.streaming:
+            if encoding == 'br':
+                if response.is_async:
+                    response.streaming_content = abrotli_sequence(response.streaming_content, quality)
+                else:
+                    response.streaming_content = brotli_sequence(response.streaming_content, quality)
+            elif response.is_async:
+                response.streaming_content = agzip_sequence(
+                    response.streaming_content, self.max_random_bytes
+                )
+            else:
+                response.streaming_content = compress_sequence(
+                    response.streaming_content, max_random_bytes=self.max_random_bytes
+                )
+            del response.headers['Content-Length']
+        else:
+            if encoding == 'br':
+                compressed = brotli.compress(response.content, quality=quality)
+            else:
+                compressed = compress_string(response.content, max_random_bytes=self.max_random_bytes)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(response.content))
+
+        # The compressed body differs from the uncompressed one, so a strong
+        # ETag would no longer match it byte for byte
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def choose_encoding(self, header):
+        accepted = accepted_encodings(header)
+        for encoding in getattr(settings, 'RESPONSE_COMPRESSION_ENCODINGS', ('br', 'gzip')):
+            if encoding == 'br' and brotli is None:
+                continue
+            if encoding in accepted:
+                return encoding
+        return None
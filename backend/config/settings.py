@@ -2,6 +2,8 @@ from pathlib import Path
 from datetime import timedelta
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = 'django-insecure-medipol-project-hub-change-this-in-production'
@@ -26,10 +28,13 @@ INSTALLED_APPS = [
     'projects.apps.ProjectsConfig',
     'teams.apps.TeamsConfig',
     'messaging.apps.MessagingConfig',
+    'notifications.apps.NotificationsConfig',
+    'jobs.apps.JobsConfig',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'config.middleware.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -84,6 +89,46 @@ DATABASES = {
 
 AUTH_USER_MODEL = 'users.User'
 
+AUTHENTICATION_BACKENDS = [
+    'users.backends.ProfileModelBackend',
+]
+
+# Password hashing profile: 'pbkdf2' (default), 'argon2' (requires argon2-cffi)
+# or 'bcrypt' (requires bcrypt). Existing hashes from the other profiles keep
+# working and are re-hashed with the active profile on the next login.
+PASSWORD_HASHING_PROFILE = os.getenv('PASSWORD_HASHING_PROFILE', 'pbkdf2')
+
+# Cost parameters for each profile; None keeps Django's default
+PASSWORD_HASHING_COST = {
+    'pbkdf2_iterations': int(os.getenv('PBKDF2_ITERATIONS', 0)) or None,
+    'argon2_time_cost': 2,
+    'argon2_memory_cost': 65536,
+    'argon2_parallelism': 1,
+    'bcrypt_rounds': 12,
+}
+
+PASSWORD_HASHER_PROFILES = {
+    'pbkdf2': 'users.hashers.TunedPBKDF2PasswordHasher',
+    'argon2': 'users.hashers.TunedArgon2PasswordHasher',
+    'bcrypt': 'users.hashers.TunedBCryptSHA256PasswordHasher',
+}
+
+if PASSWORD_HASHING_PROFILE not in PASSWORD_HASHER_PROFILES:
+    raise ImproperlyConfigured(
+        f'PASSWORD_HASHING_PROFILE must be one of {", ".join(PASSWORD_HASHER_PROFILES)}, '
+        f'not {PASSWORD_HASHING_PROFILE!r}'
+    )
+
+# The active profile hashes new passwords; the rest of Django's default
+# hashers stay listed so every existing hash still verifies
+PASSWORD_HASHERS = [PASSWORD_HASHER_PROFILES[PASSWORD_HASHING_PROFILE]] + [
+    hasher for profile, hasher in PASSWORD_HASHER_PROFILES.items()
+    if profile != PASSWORD_HASHING_PROFILE
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -106,11 +151,21 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # orjson-backed when installed, otherwise identical to DRF's JSON classes
+    'DEFAULT_RENDERER_CLASSES': (
+        'config.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'config.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
@@ -119,12 +174,78 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Responses smaller than this many bytes are not compressed (see config.middleware).
+# Brotli is used when the brotli package is installed, gzip otherwise.
+RESPONSE_COMPRESSION_MIN_SIZE = 1024
+RESPONSE_COMPRESSION_ENCODINGS = ('br', 'gzip')
+RESPONSE_COMPRESSION_BROTLI_QUALITY = 4
+
+# Seconds a conversation's participant ids are cached for message sends (see messaging.membership)
+MESSAGING_PARTICIPANTS_CACHE_TIMEOUT = 300
+
+# Long-polling for new messages (see messaging.wakeups): requests wait at most
+# MESSAGING_LONG_POLL_TIMEOUT seconds and re-check the database every
+# MESSAGING_LONG_POLL_RECHECK_INTERVAL seconds for messages sent through other
+# worker processes
+MESSAGING_LONG_POLL_TIMEOUT = 25
+MESSAGING_LONG_POLL_RECHECK_INTERVAL = 5
+MESSAGING_LONG_POLL_MAX_MESSAGES = 100
+
+# Presence and typing indicators (see messaging.presence): users are online for
+# PRESENCE_ONLINE_TIMEOUT seconds after a heartbeat, their last_seen time is kept
+# for PRESENCE_LAST_SEEN_TIMEOUT seconds and typing flags expire after
+# TYPING_TIMEOUT seconds. The default store is per process and holds at most
+# PRESENCE_STORE_SIZE entries of each kind; set PRESENCE_STORE to
+# 'messaging.presence.CachePresenceStore' with a shared cache when running
+# several worker processes.
+PRESENCE_STORE = os.getenv('PRESENCE_STORE', 'messaging.presence.MemoryPresenceStore')
+PRESENCE_STORE_SIZE = 50_000
+PRESENCE_ONLINE_TIMEOUT = 60
+PRESENCE_LAST_SEEN_TIMEOUT = 3600
+TYPING_TIMEOUT = 8
+
+# Message retention (see messaging.archive): messages older than
+# MESSAGE_RETENTION_DAYS are moved to compressed archives by
+# `python manage.py archive_messages`, MESSAGE_ARCHIVE_BATCH_SIZE per
+# transaction. Archives are kept for MESSAGE_ARCHIVE_RETENTION_DAYS after their
+# newest message, or forever when it is None. MESSAGE_RETENTION_DAYS = None
+# disables archival.
+MESSAGE_RETENTION_DAYS = 365
+MESSAGE_ARCHIVE_RETENTION_DAYS = None
+MESSAGE_ARCHIVE_BATCH_SIZE = 1000
+
+# Faculty broadcasts reaching more recipients than this are stored once and
+# delivered on read instead of being posted to every team chat (see messaging.broadcast)
+BROADCAST_FANOUT_ON_READ_THRESHOLD = 500
+
+# Rows serialized per chunk by ?stream=true list responses (see config.streaming)
+STREAMING_JSON_CHUNK_SIZE = 500
+
+# Seconds an approximate project count (?count=approximate) is reused
+PROJECT_COUNT_CACHE_TIMEOUT = 60
+
+# Seconds before each process rebuilds its skill recommendation index from the database
+RECOMMENDATION_INDEX_MAX_AGE = 600
+
+# Seconds an authenticated user (with its profile) is cached per access token
+AUTH_USER_CACHE_TIMEOUT = 300
+
+# Seconds a serialized student/faculty profile is reused by the serializers
+# nesting it; profile edits invalidate it right away (see users.fragments)
+PROFILE_FRAGMENT_CACHE_TIMEOUT = 600
+
+# Verified access tokens kept per process so their signature is checked once
+AUTH_TOKEN_CACHE_SIZE = 10_000
+
+# Seconds between batched last_login writes (see users.last_login)
+LAST_LOGIN_FLUSH_INTERVAL = 30
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=24),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
+    'UPDATE_LAST_LOGIN': False,  # Written in batches by users.last_login
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'AUTH_HEADER_TYPES': ('Bearer',),
@@ -133,12 +254,56 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
+    'TOKEN_OBTAIN_SERIALIZER': 'users.serializers.ProfileTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.CachedTokenRefreshSerializer',
+    'TOKEN_BLACKLIST_SERIALIZER': 'users.serializers.CachedTokenBlacklistSerializer',
 }
 
+# In-memory front for refresh token blacklist checks (see users.tokens).
+# A process reads newly blacklisted tokens at most once every
+# TOKEN_BLACKLIST_SYNC_INTERVAL seconds. Tokens blacklisted in the same process
+# are rejected at once, but a refresh token revoked through another worker
+# process can still be used there for up to this long. 0 queries the blacklist
+# before every check, which defeats the in-memory filter.
+TOKEN_BLACKLIST_SYNC_INTERVAL = int(os.getenv('TOKEN_BLACKLIST_SYNC_INTERVAL', '5'))
+# Rows committed out of id order are looked for again for this many seconds,
+# and every process rebuilds its filter from the table this often
+TOKEN_BLACKLIST_SYNC_WINDOW = 60
+TOKEN_BLACKLIST_REBUILD_INTERVAL = 300
+TOKEN_BLACKLIST_FILTER_CAPACITY = 100_000
+TOKEN_BLACKLIST_LRU_SIZE = 10_000
+
+# Expired outstanding/blacklisted tokens are deleted by prune_tokens in batches of this size
+TOKEN_PRUNE_BATCH_SIZE = 5000
+
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
 
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'noreply@medipol.edu.tr')
+
+# Link sent to imported students to set their password (POST uid/token to /api/auth/activate/)
+ACCOUNT_ACTIVATION_URL = os.getenv(
+    'ACCOUNT_ACTIVATION_URL', 'http://localhost:8000/activate?uid={uid}&token={token}'
+)
+
+# Rows validated and inserted per batch by the bulk student import
+STUDENT_IMPORT_CHUNK_SIZE = 500
+
+# Notification emails: pending notifications are held this many seconds so
+# bursts are sent as one digest, and each worker pass handles this many recipients
+NOTIFICATION_DIGEST_WINDOW = 300
+NOTIFICATION_BATCH_SIZE = 200
+
+# Background jobs (python manage.py run_workers): attempts per job, base retry
+# delay in seconds (doubled per attempt), seconds between a worker's lock
+# refreshes for the jobs it runs, and seconds without a refresh before a
+# running job whose worker disappeared is queued again (or failed, once out
+# of attempts)
+JOB_MAX_ATTEMPTS = 3
+JOB_RETRY_BACKOFF = 30
+JOB_HEARTBEAT_INTERVAL = 60
+JOB_LOCK_TIMEOUT = 600
 
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760
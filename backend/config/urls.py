@@ -12,6 +12,7 @@ urlpatterns = [
     path('api/projects/', include('projects.urls')),
     path('api/teams/', include('teams.urls')),
     path('api/messaging/', include('messaging.urls')),
+    path('api/notifications/', include('notifications.urls')),
 ]
 
 # Serve media files in development
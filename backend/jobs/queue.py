@@ -0,0 +1,179 @@
+"""
+Database-backed job queue
+
+Tasks are plain functions registered with the ``task`` decorator in an app's
+tasks.py. ``enqueue`` writes a Job row in the current transaction; workers
+started with ``python manage.py run_workers`` claim and execute them.
+
+Claiming uses SELECT ... FOR UPDATE SKIP LOCKED where the database supports
+it. On SQLite, which serializes writers, candidates are read first and then
+claimed with a conditional UPDATE, so two workers never run the same job.
+"""
+import logging
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Avg, Count, F, Max
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def task(name=None):
+    """Register a function as a background task"""
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        registry[task_name] = func
+        func.task_name = task_name
+        return func
+    return decorator
+
+
+def enqueue(func, *args, run_at=None, max_attempts=None, **kwargs):
+    """
+    Queue a registered task. Arguments must be JSON serializable.
+
+    Call inside the transaction that writes the related data so the job is
+    only visible to workers once that data has committed.
+    """
+    name = getattr(func, 'task_name', func)
+    if name not in registry:
+        raise ValueError(f'Unknown task: {name}')
+
+    return Job.objects.create(
+        name=name,
+        args=list(args),
+        kwargs=kwargs,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or getattr(settings, 'JOB_MAX_ATTEMPTS', 3)
+    )
+
+
+def claim_jobs(worker_id, limit):
+    """Mark up to ``limit`` due jobs as running for this worker and return their ids"""
+    now = timezone.now()
+    due = Job.objects.filter(status='queued', run_at__lte=now).order_by('run_at', 'id')
+
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            ids = list(due.select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+        else:
+            ids = list(due.values_list('id', flat=True)[:limit])
+
+        if not ids:
+            return []
+
+        Job.objects.filter(pk__in=ids, status='queued').update(
+            status='running',
+            locked_by=worker_id,
+            locked_at=now,
+            attempts=F('attempts') + 1
+        )
+
+    return list(Job.objects.filter(
+        pk__in=ids, status='running', locked_by=worker_id, locked_at=now
+    ).values_list('id', flat=True))
+
+
+def heartbeat_jobs(worker_id, job_ids):
+    """Refresh the locks of jobs this worker is still running so they are not taken for stale"""
+    if not job_ids:
+        return 0
+    return Job.objects.filter(pk__in=job_ids, status='running', locked_by=worker_id).update(
+        locked_at=timezone.now()
+    )
+
+
+def requeue_stale_jobs():
+    """
+    Return jobs whose worker died while running them to the queue. Live
+    workers refresh locked_at (heartbeat_jobs), so only jobs without a
+    heartbeat for JOB_LOCK_TIMEOUT seconds are affected. Jobs out of attempts
+    are failed instead, so a job that kills its worker doesn't run forever.
+    """
+    timeout = getattr(settings, 'JOB_LOCK_TIMEOUT', 600)
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    stale = Job.objects.filter(status='running', locked_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', locked_by='', locked_at=None, finished_at=timezone.now(),
+        last_error='The worker stopped while running this job.'
+    )
+    requeued = stale.update(status='queued', locked_by='', locked_at=None)
+    return requeued + failed
+
+
+def retry_delay(attempts):
+    """Exponential backoff: JOB_RETRY_BACKOFF seconds, doubled after every failed attempt"""
+    return getattr(settings, 'JOB_RETRY_BACKOFF', 30) * 2 ** (attempts - 1)
+
+
+def failure_fields(job, error):
+    """Retry with backoff while attempts remain, otherwise fail for good"""
+    if job.attempts < job.max_attempts:
+        fields = {'status': 'queued', 'run_at': timezone.now() + timedelta(seconds=retry_delay(job.attempts))}
+    else:
+        fields = {'status': 'failed'}
+    fields['last_error'] = error
+    return fields
+
+
+def execute_job(job_id):
+    """Run a claimed job and record its outcome and timing. Returns the final status."""
+    job = Job.objects.get(pk=job_id)
+    func = registry.get(job.name)
+
+    started_at = timezone.now()
+    start = time.perf_counter()
+    try:
+        if func is None:
+            raise LookupError(f'Unknown task: {job.name}')
+        func(*job.args, **job.kwargs)
+    except Exception:
+        logger.warning('Job %s (%s) failed on attempt %s', job.id, job.name, job.attempts)
+        fields = failure_fields(job, traceback.format_exc())
+    else:
+        fields = {'status': 'succeeded', 'last_error': ''}
+
+    Job.objects.filter(pk=job.pk).update(
+        started_at=started_at,
+        finished_at=timezone.now(),
+        duration_ms=(time.perf_counter() - start) * 1000,
+        locked_by='',
+        locked_at=None,
+        **fields
+    )
+    return fields['status']
+
+
+def fail_job(job_id, error):
+    """
+    Record a failure that happened outside execute_job, e.g. the child process
+    running the job died. Returns the final status, or None if the job is no
+    longer running.
+    """
+    job = Job.objects.filter(pk=job_id, status='running').first()
+    if job is None:
+        return None
+    logger.warning('Job %s (%s) crashed its worker on attempt %s', job.id, job.name, job.attempts)
+    fields = failure_fields(job, error)
+    Job.objects.filter(pk=job.pk, status='running').update(
+        finished_at=timezone.now(), locked_by='', locked_at=None, **fields
+    )
+    return fields['status']
+
+
+def job_stats():
+    """Per-task job counts and timings"""
+    return list(
+        Job.objects.order_by()
+        .values('name', 'status')
+        .annotate(count=Count('id'), avg_ms=Avg('duration_ms'), max_ms=Max('duration_ms'))
+        .order_by('name', 'status')
+    )
@@ -0,0 +1,143 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection
+from django.db.models import F, QuerySet
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import Job
+from .queue import (
+    claim_jobs,
+    enqueue,
+    execute_job,
+    fail_job,
+    heartbeat_jobs,
+    requeue_stale_jobs,
+    retry_delay,
+    task,
+)
+
+calls = []
+
+
+@task(name='jobs.tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task(name='jobs.tests.explode')
+def explode():
+    raise RuntimeError('boom')
+
+
+class ClaimTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.later = enqueue(record, 'later', run_at=now - timedelta(seconds=10))
+        self.first = enqueue(record, 'first', run_at=now - timedelta(seconds=60))
+        self.future = enqueue(record, 'future', run_at=now + timedelta(hours=1))
+
+    def test_claims_due_jobs_in_run_at_order(self):
+        self.assertEqual(claim_jobs('worker-1', 1), [self.first.pk])
+        self.assertEqual(claim_jobs('worker-2', 5), [self.later.pk])
+        self.assertEqual(claim_jobs('worker-3', 5), [])
+
+        job = Job.objects.get(pk=self.first.pk)
+        self.assertEqual((job.status, job.locked_by, job.attempts), ('running', 'worker-1', 1))
+        self.assertEqual(Job.objects.get(pk=self.future.pk).status, 'queued')
+
+    def test_unknown_task(self):
+        with self.assertRaises(ValueError):
+            enqueue('jobs.tests.missing')
+
+    @mock.patch.object(type(connection.features), 'has_select_for_update_skip_locked', False)
+    def test_fallback_skips_jobs_claimed_by_another_worker(self):
+        update = QuerySet.update
+        raced = []
+
+        def racing_update(queryset, **fields):
+            # Another worker claims the first job between our read and our UPDATE
+            if fields.get('status') == 'running' and not raced:
+                raced.append(True)
+                update(
+                    Job.objects.filter(pk=self.first.pk), status='running', locked_by='worker-2',
+                    locked_at=timezone.now(), attempts=F('attempts') + 1
+                )
+            return update(queryset, **fields)
+
+        with mock.patch.object(QuerySet, 'update', racing_update):
+            self.assertEqual(claim_jobs('worker-1', 5), [self.later.pk])
+        self.assertEqual(Job.objects.get(pk=self.first.pk).attempts, 1)
+
+
+class ExecuteTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def run_job(self, job):
+        self.assertEqual(claim_jobs('worker', 1), [job.pk])
+        return execute_job(job.pk)
+
+    def test_success(self):
+        job = enqueue(record, 'hello')
+        self.assertEqual(self.run_job(job), 'succeeded')
+        self.assertEqual(calls, ['hello'])
+        job.refresh_from_db()
+        self.assertEqual((job.locked_by, job.locked_at), ('', None))
+        self.assertIsNotNone(job.duration_ms)
+
+    @override_settings(JOB_RETRY_BACKOFF=10)
+    def test_failures_back_off_then_fail(self):
+        self.assertEqual([retry_delay(attempts) for attempts in (1, 2, 3)], [10, 20, 40])
+
+        job = enqueue(explode, max_attempts=2)
+        before = timezone.now()
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            self.assertEqual(self.run_job(job), 'queued')
+        job.refresh_from_db()
+        self.assertIn('boom', job.last_error)
+        self.assertGreaterEqual(job.run_at, before + timedelta(seconds=10))
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            self.assertEqual(self.run_job(job), 'failed')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+
+    def test_fail_job(self):
+        job = enqueue(record, 'crash', max_attempts=1)
+        claim_jobs('worker', 1)
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            self.assertEqual(fail_job(job.pk, 'The worker process died.'), 'failed')
+        self.assertIsNone(fail_job(job.pk, 'Again'))
+
+
+@override_settings(JOB_LOCK_TIMEOUT=60)
+class StaleJobTests(TestCase):
+    def claim(self, job, minutes_ago):
+        claim_jobs('worker', 1)
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(minutes=minutes_ago))
+
+    def test_stale_jobs_are_requeued(self):
+        job = enqueue(record, 'stale')
+        self.claim(job, minutes_ago=5)
+        self.assertEqual(requeue_stale_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by, job.attempts), ('queued', '', 1))
+
+    def test_stale_jobs_out_of_attempts_fail(self):
+        job = enqueue(record, 'stale', max_attempts=1)
+        self.claim(job, minutes_ago=5)
+        self.assertEqual(requeue_stale_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('worker stopped', job.last_error)
+
+    def test_heartbeats_keep_running_jobs(self):
+        job = enqueue(record, 'slow')
+        self.claim(job, minutes_ago=5)
+        self.assertEqual(heartbeat_jobs('other-worker', [job.pk]), 0)
+        self.assertEqual(heartbeat_jobs('worker', [job.pk]), 1)
+        self.assertEqual(requeue_stale_jobs(), 0)
+        self.assertEqual(Job.objects.get(pk=job.pk).status, 'running')
@@ -0,0 +1,93 @@
+"""
+Process-pool worker for the job queue
+
+The parent process claims jobs and hands their ids to a pool of child
+processes, which execute them with their own database connections. While
+jobs run, the parent refreshes their locks every JOB_HEARTBEAT_INTERVAL
+seconds so other workers don't requeue them. A job whose child process dies
+is recorded as a failed attempt, and a broken pool is replaced.
+"""
+import os
+import socket
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+from django.db import connections
+
+from .queue import claim_jobs, execute_job, fail_job, heartbeat_jobs, requeue_stale_jobs
+
+
+def init_worker_process():
+    # Children must open their own connections instead of sharing the parent's
+    django.setup()
+    connections.close_all()
+
+
+def run_job(job_id):
+    try:
+        return job_id, execute_job(job_id)
+    finally:
+        connections.close_all()
+
+
+class Worker:
+    def __init__(self, processes=None, poll_interval=1.0, log=None):
+        self.processes = processes or os.cpu_count() or 1
+        self.poll_interval = poll_interval
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self.log = log or (lambda message: None)
+
+    def run(self, once=False):
+        """Process jobs until interrupted, or until the queue is empty when once=True"""
+        connections.close_all()
+        while not self.run_pool(once):
+            self.log('Worker pool broke; starting a new one')
+
+    def run_pool(self, once):
+        """Run jobs on one process pool. Returns False if the pool broke."""
+        heartbeat_interval = getattr(settings, 'JOB_HEARTBEAT_INTERVAL', 60)
+        running = {}
+        last_heartbeat = time.monotonic()
+
+        with ProcessPoolExecutor(max_workers=self.processes, initializer=init_worker_process) as pool:
+            while True:
+                free = self.processes - len(running)
+                if free:
+                    requeue_stale_jobs()
+                    for job_id in claim_jobs(self.worker_id, free):
+                        running[pool.submit(run_job, job_id)] = job_id
+
+                if running:
+                    done, _ = wait(
+                        running, timeout=self.poll_interval, return_when=FIRST_COMPLETED
+                    )
+                    broken = False
+                    for future in done:
+                        job_id = running.pop(future)
+                        try:
+                            _, status = future.result()
+                        except BrokenProcessPool:
+                            broken = True
+                            status = fail_job(job_id, traceback.format_exc())
+                        except Exception:
+                            status = fail_job(job_id, traceback.format_exc())
+                        self.log(f'Job {job_id} {status}')
+
+                    if broken:
+                        # Every other job of the pool is lost along with it
+                        for job_id in running.values():
+                            self.log(f'Job {job_id} {fail_job(job_id, "The worker pool broke.")}')
+                        return False
+
+                    if running and time.monotonic() - last_heartbeat >= heartbeat_interval:
+                        heartbeat_jobs(self.worker_id, list(running.values()))
+                        last_heartbeat = time.monotonic()
+                elif once:
+                    return True
+                else:
+                    connections.close_all()
+                    time.sleep(self.poll_interval)
@@ -1,5 +1,14 @@
 from django.contrib import admin
-from .models import Conversation, Message
+from django.db.models import Q
+from .models import Announcement, Conversation, ConversationParticipant, Message, MessageArchive
+from .search import matching_ids
+
+
+class ConversationParticipantInline(admin.TabularInline):
+    model = ConversationParticipant
+    extra = 0
+    raw_id_fields = ['user']
+    readonly_fields = ['last_activity_at']
 
 
 @admin.register(Conversation)
@@ -7,7 +16,7 @@ class ConversationAdmin(admin.ModelAdmin):
     list_display = ['id', 'name', 'is_group', 'created_at', 'updated_at']
     list_filter = ['is_group', 'created_at']
     search_fields = ['name']
-    filter_horizontal = ['participants']
+    inlines = [ConversationParticipantInline]
 
 
 @admin.register(Message)
@@ -17,6 +26,37 @@ class MessageAdmin(admin.ModelAdmin):
     search_fields = ['content', 'sender__name', 'sender__email']
     readonly_fields = ['created_at', 'updated_at']
 
+    def get_search_results(self, request, queryset, search_term):
+        # Match content through the full-text index instead of a LIKE scan
+        matches = matching_ids(search_term) if search_term else None
+        if matches is None:
+            return super().get_search_results(request, queryset, search_term)
+
+        queryset = queryset.filter(
+            Q(pk__in=matches)
+            | Q(sender__name__icontains=search_term)
+            | Q(sender__email__icontains=search_term)
+        )
+        return queryset, False
+
     def content_preview(self, obj):
         return obj.content[:50] + '...' if len(obj.content) > 50 else obj.content
     content_preview.short_description = 'Content'
+
+
+@admin.register(MessageArchive)
+class MessageArchiveAdmin(admin.ModelAdmin):
+    list_display = ['id', 'conversation', 'message_count', 'first_created_at', 'last_created_at', 'archived_at']
+    list_filter = ['archived_at']
+    raw_id_fields = ['conversation']
+    exclude = ['data']
+    readonly_fields = ['conversation', 'message_count', 'first_created_at', 'last_created_at', 'archived_at']
+
+
+@admin.register(Announcement)
+class AnnouncementAdmin(admin.ModelAdmin):
+    list_display = ['id', 'sender', 'created_at']
+    list_filter = ['created_at']
+    search_fields = ['content', 'sender__name']
+    raw_id_fields = ['sender']
+    filter_horizontal = ['teams']
@@ -0,0 +1,159 @@
+"""
+Message retention and archival
+
+Messages older than MESSAGE_RETENTION_DAYS are moved by archive_messages()
+into MessageArchive rows: each holds up to MESSAGE_ARCHIVE_BATCH_SIZE
+messages of one conversation as zlib-compressed JSON. Every batch is copied
+and deleted in its own short transaction, so the live Message table and its
+indexes stay small without long-running locks.
+
+Archived messages are still returned by the conversation history endpoint
+(see message_history()). They are no longer searchable, counted as unread or
+shown by the per-message endpoints. Archives older than
+MESSAGE_ARCHIVE_RETENTION_DAYS, when set, are deleted by purge_archives().
+"""
+import json
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from config.renderers import dumps
+from users.models import User
+from .models import Message, MessageArchive
+
+ARCHIVED_FIELDS = ['id', 'conversation_id', 'sender_id', 'content', 'is_read', 'created_at', 'updated_at']
+
+
+def archive_cutoff(now=None, retention_days=None):
+    """Messages created before the returned time are archived; None disables archival"""
+    if retention_days is None:
+        retention_days = getattr(settings, 'MESSAGE_RETENTION_DAYS', None)
+    if retention_days is None:
+        return None
+    return (now or timezone.now()) - timedelta(days=retention_days)
+
+
+def compress_messages(rows):
+    # Full-precision timestamps; the API encoder would cut them to milliseconds
+    rows = [
+        {**row, 'created_at': row['created_at'].isoformat(), 'updated_at': row['updated_at'].isoformat()}
+        for row in rows
+    ]
+    return zlib.compress(dumps(rows), getattr(settings, 'MESSAGE_ARCHIVE_COMPRESSION_LEVEL', 6))
+
+
+def decompress_messages(data):
+    return json.loads(zlib.decompress(bytes(data)))
+
+
+def archive_messages(cutoff=None, batch_size=None):
+    """
+    Move messages created before ``cutoff`` (default: archive_cutoff()) into
+    archives, one bounded transaction per batch. Returns (messages, archives)
+    created.
+    """
+    cutoff = cutoff or archive_cutoff()
+    if cutoff is None:
+        return 0, 0
+    batch_size = batch_size or getattr(settings, 'MESSAGE_ARCHIVE_BATCH_SIZE', 1000)
+
+    archived = archives = 0
+    while True:
+        with transaction.atomic():
+            # Walks the (conversation, created_at) index, so each batch
+            # covers as few conversations as possible
+            rows = list(
+                Message.objects.filter(created_at__lt=cutoff)
+                .order_by('conversation_id', 'created_at', 'id')
+                .values(*ARCHIVED_FIELDS)[:batch_size]
+            )
+            if not rows:
+                break
+
+            by_conversation = {}
+            for row in rows:
+                by_conversation.setdefault(row['conversation_id'], []).append(row)
+
+            MessageArchive.objects.bulk_create([
+                MessageArchive(
+                    conversation_id=conversation_id,
+                    first_created_at=messages[0]['created_at'],
+                    last_created_at=messages[-1]['created_at'],
+                    message_count=len(messages),
+                    data=compress_messages(messages),
+                )
+                for conversation_id, messages in by_conversation.items()
+            ])
+            Message.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+
+        archived += len(rows)
+        archives += len(by_conversation)
+        if len(rows) < batch_size:
+            break
+
+    return archived, archives
+
+
+def purge_archives(now=None, retention_days=None, batch_size=None):
+    """Delete archives whose newest message is past MESSAGE_ARCHIVE_RETENTION_DAYS"""
+    if retention_days is None:
+        retention_days = getattr(settings, 'MESSAGE_ARCHIVE_RETENTION_DAYS', None)
+    if retention_days is None:
+        return 0
+    cutoff = (now or timezone.now()) - timedelta(days=retention_days)
+    batch_size = batch_size or getattr(settings, 'MESSAGE_ARCHIVE_BATCH_SIZE', 1000)
+
+    deleted = 0
+    while True:
+        ids = list(
+            MessageArchive.objects.filter(last_created_at__lt=cutoff).values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += MessageArchive.objects.filter(pk__in=ids).delete()[0]
+
+
+def archived_messages(conversation_id):
+    """
+    Unsaved Message instances for a conversation's archived messages, oldest
+    first, with their senders loaded. Archives are read and decompressed one
+    at a time, so only one batch is held in memory. Messages of deleted users
+    are skipped, as they would have been deleted along with them.
+    """
+    senders = {}
+    for data in MessageArchive.objects.filter(
+        conversation_id=conversation_id
+    ).order_by('first_created_at', 'pk').values_list('data', flat=True).iterator(chunk_size=1):
+        rows = decompress_messages(data)
+        missing = {row['sender_id'] for row in rows} - senders.keys()
+        if missing:
+            found = User.objects.in_bulk(missing)
+            senders.update((user_id, found.get(user_id)) for user_id in missing)
+
+        for row in rows:
+            sender = senders[row['sender_id']]
+            if sender is None:
+                continue
+            yield Message(
+                id=row['id'],
+                conversation_id=row['conversation_id'],
+                sender=sender,
+                content=row['content'],
+                is_read=row['is_read'],
+                created_at=parse_datetime(row['created_at']),
+                updated_at=parse_datetime(row['updated_at']),
+            )
+
+
+def message_history(conversation_id):
+    """Every message of a conversation, archived ones first, oldest first"""
+    yield from archived_messages(conversation_id)
+    yield from Message.objects.filter(
+        conversation_id=conversation_id
+    ).select_related('sender').order_by('created_at').iterator(
+        chunk_size=getattr(settings, 'STREAMING_JSON_CHUNK_SIZE', 500)
+    )
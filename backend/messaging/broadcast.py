@@ -0,0 +1,137 @@
+"""
+Faculty announcements to the teams of their supervised projects
+
+Each team has a group chat holding its roster (see messaging.team_chats).
+broadcast() delivers an announcement in one of two ways:
+
+* on write: one message per team chat, all inserted with a single
+  bulk_create, plus one bulk INSERT of notifications;
+* on read: a single Announcement row linked to the target teams, which
+  members see through announcements_for(). Nothing is written per
+  recipient, so it suits very large audiences.
+
+``delivery='auto'`` chooses on read once the audience exceeds
+BROADCAST_FANOUT_ON_READ_THRESHOLD recipients. Unread state is one watermark
+per user and chat (ConversationParticipant.last_read_at) or per user for
+announcements (AnnouncementReadMarker), never a row per message.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from notifications.services import notify
+from teams.models import Team
+from teams.roster import load_rosters
+from .models import (
+    Announcement,
+    AnnouncementReadMarker,
+    Conversation,
+    ConversationParticipant,
+    Message,
+)
+from .team_chats import get_team_conversations
+from .wakeups import wake_on_commit
+
+DELIVERY_CHOICES = ('auto', 'write', 'read')
+
+
+def supervised_teams(faculty_user, project_ids=None):
+    """Teams of the projects supervised by ``faculty_user``, optionally only some projects"""
+    teams = Team.objects.filter(project__supervisor_id=faculty_user.pk).select_related('project')
+    if project_ids is not None:
+        teams = teams.filter(project_id__in=project_ids)
+    return list(teams)
+
+
+@transaction.atomic
+def broadcast(sender, teams, content, delivery='auto'):
+    """
+    Deliver ``content`` from ``sender`` to ``teams``. Returns the delivery
+    used ('write' or 'read'), the number of recipients and the created
+    messages or announcement.
+    """
+    rosters = load_rosters([team.pk for team in teams])
+    recipients = set().union(*rosters.values()) - {sender.pk}
+
+    if delivery == 'auto':
+        threshold = getattr(settings, 'BROADCAST_FANOUT_ON_READ_THRESHOLD', 500)
+        delivery = 'read' if len(recipients) > threshold else 'write'
+
+    if delivery == 'read':
+        announcement = Announcement.objects.create(sender=sender, content=content)
+        announcement.teams.set(teams)
+        return delivery, len(recipients), announcement
+
+    # The sender supervises every team, so it is on each chat's roster
+    conversations = get_team_conversations(teams, rosters)
+    conversation_ids = [conversation.pk for conversation in conversations.values()]
+
+    now = timezone.now()
+    messages = Message.objects.bulk_create([
+        Message(conversation=conversation, sender=sender, content=content, created_at=now, updated_at=now)
+        for conversation in conversations.values()
+    ])
+
+    # Backends without RETURNING (e.g. MySQL) leave primary keys unset
+    if any(message.pk is None for message in messages):
+        # created_at is auto_now_add, so each message carries the time it was stamped with
+        ids = {
+            (conversation_id, created_at): pk
+            for conversation_id, created_at, pk in Message.objects.filter(
+                conversation_id__in=conversation_ids,
+                sender=sender,
+                created_at__in=[message.created_at for message in messages],
+            ).values_list('conversation_id', 'created_at', 'id')
+        }
+        for message in messages:
+            message.pk = ids[message.conversation_id, message.created_at]
+
+    Conversation.objects.filter(pk__in=conversation_ids).update(updated_at=now)
+    ConversationParticipant.objects.filter(conversation_id__in=conversation_ids).update(last_activity_at=now)
+
+    # Muting is per chat: notify everyone in at least one target chat they haven't muted
+    muted = set(ConversationParticipant.objects.filter(
+        conversation_id__in=conversation_ids, muted=True
+    ).values_list('conversation_id', 'user_id'))
+    notified = {
+        user_id
+        for team_id, conversation in conversations.items()
+        for user_id in rosters.get(team_id, ())
+        if (conversation.pk, user_id) not in muted
+    }
+    notify(
+        recipients & notified,
+        'message',
+        f'Announcement from {sender.name}',
+        content[:200],
+        {'conversation_ids': conversation_ids}
+    )
+    wake_on_commit(*conversation_ids)
+    return delivery, len(recipients), messages
+
+
+def announcements_for(user):
+    """Announcements sent by ``user`` or to a team the user owns, belongs to or supervises"""
+    team_ids = Team.objects.filter(
+        Q(members=user.pk) | Q(project__owner_id=user.pk) | Q(project__supervisor_id=user.pk)
+    ).values('pk')
+    return Announcement.objects.filter(
+        Q(teams__in=team_ids) | Q(sender=user)
+    ).distinct().select_related('sender')
+
+
+def announcements_last_read_at(user):
+    return AnnouncementReadMarker.objects.filter(user=user).values_list('last_read_at', flat=True).first()
+
+
+def unread_announcement_count(user):
+    announcements = announcements_for(user).exclude(sender=user)
+    last_read_at = announcements_last_read_at(user)
+    if last_read_at is not None:
+        announcements = announcements.filter(created_at__gt=last_read_at)
+    return announcements.count()
+
+
+def mark_announcements_read(user, now=None):
+    AnnouncementReadMarker.objects.update_or_create(user=user, defaults={'last_read_at': now or timezone.now()})
@@ -0,0 +1,73 @@
+"""
+Staff data exports for the Messaging app
+"""
+from django.utils.dateparse import parse_datetime
+
+from config.streaming import iterate_queryset
+from users.models import User
+from .archive import decompress_messages
+from .models import Message, MessageArchive
+
+MESSAGE_COLUMNS = [
+    'id', 'conversation_id', 'conversation_name', 'is_group',
+    'sender_id', 'sender_name', 'sender_email', 'content', 'is_read', 'created_at',
+]
+
+
+def export_messages(conversation_id=None, since=None, chunk_size=None):
+    """
+    Messages, optionally of one conversation and/or created after ``since``.
+    Archived messages come first, then the live ones.
+    """
+    queryset = Message.objects.select_related('conversation', 'sender')
+    archives = MessageArchive.objects.select_related('conversation')
+    if conversation_id:
+        queryset = queryset.filter(conversation_id=conversation_id)
+        archives = archives.filter(conversation_id=conversation_id)
+    if since:
+        queryset = queryset.filter(created_at__gte=since)
+        archives = archives.filter(last_created_at__gte=since)
+
+    def archived_rows():
+        # One archive is decompressed at a time
+        senders = {}
+        for archive in iterate_queryset(archives, 1):
+            messages = decompress_messages(archive.data)
+            missing = {row['sender_id'] for row in messages} - senders.keys()
+            if missing:
+                senders.update(User.objects.in_bulk(missing))
+            for row in messages:
+                sender = senders.get(row['sender_id'])
+                created_at = parse_datetime(row['created_at'])
+                if sender is None or (since and created_at < since):
+                    continue
+                yield {
+                    'id': row['id'],
+                    'conversation_id': archive.conversation_id,
+                    'conversation_name': archive.conversation.name,
+                    'is_group': archive.conversation.is_group,
+                    'sender_id': sender.pk,
+                    'sender_name': sender.name,
+                    'sender_email': sender.email,
+                    'content': row['content'],
+                    'is_read': row['is_read'],
+                    'created_at': created_at.isoformat(),
+                }
+
+    def rows():
+        yield from archived_rows()
+        for message in iterate_queryset(queryset, chunk_size):
+            yield {
+                'id': message.pk,
+                'conversation_id': message.conversation_id,
+                'conversation_name': message.conversation.name,
+                'is_group': message.conversation.is_group,
+                'sender_id': message.sender_id,
+                'sender_name': message.sender.name,
+                'sender_email': message.sender.email,
+                'content': message.content,
+                'is_read': message.is_read,
+                'created_at': message.created_at.isoformat(),
+            }
+
+    return MESSAGE_COLUMNS, rows()
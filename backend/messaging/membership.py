@@ -0,0 +1,70 @@
+"""
+Cached conversation participants
+
+The participant ids of a conversation, and which of them muted it, are
+cached for MESSAGING_PARTICIPANTS_CACHE_TIMEOUT seconds, so sending a message
+checks membership (and finds the notification recipients) without a join over
+the participants table. Entries are dropped whenever participants or their
+mute setting change (see messaging.signals and ConversationViewSet.preferences).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import ConversationParticipant
+
+
+def participants_cache_key(conversation_id):
+    return f'conversation_participants:{conversation_id}'
+
+
+def get_participants(conversation_id):
+    """Return (participant_ids, muted_ids) frozensets for a conversation"""
+    key = participants_cache_key(conversation_id)
+    participants = cache.get(key)
+    if participants is None:
+        rows = ConversationParticipant.objects.filter(
+            conversation_id=conversation_id
+        ).values_list('user_id', 'muted')
+        participants = (
+            frozenset(user_id for user_id, _ in rows),
+            frozenset(user_id for user_id, muted in rows if muted),
+        )
+        timeout = getattr(settings, 'MESSAGING_PARTICIPANTS_CACHE_TIMEOUT', 300)
+        cache.set(key, participants, timeout)
+    return participants
+
+
+def get_participant_ids(conversation_id):
+    """Return the frozenset of user ids taking part in a conversation"""
+    return get_participants(conversation_id)[0]
+
+
+def get_notified_ids(conversation_id):
+    """Participants that get notified of new messages, i.e. haven't muted the conversation"""
+    participant_ids, muted_ids = get_participants(conversation_id)
+    return participant_ids - muted_ids
+
+
+def invalidate_participants(*conversation_ids):
+    """
+    Drop cached participants now and again once the current transaction
+    commits, so a request that read the old rows meanwhile can't keep them cached.
+    """
+    keys = [participants_cache_key(conversation_id) for conversation_id in conversation_ids]
+    if not keys:
+        return
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def prime_participants(conversation_id, participant_ids, muted_ids=frozenset()):
+    """
+    Cache a conversation's participants once the current transaction commits,
+    when the caller already knows them (see messaging.team_chats)
+    """
+    key = participants_cache_key(conversation_id)
+    participants = (frozenset(participant_ids), frozenset(muted_ids))
+    timeout = getattr(settings, 'MESSAGING_PARTICIPANTS_CACHE_TIMEOUT', 300)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.set(key, participants, timeout))
@@ -0,0 +1,57 @@
+# Generated by Django 6.0 on 2026-10-19 13:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_pair_keys(apps, schema_editor):
+    """
+    Key existing one-on-one conversations by their two participants. When a
+    pair already has several conversations, only the oldest one is keyed.
+    """
+    Conversation = apps.get_model('messaging', 'Conversation')
+    Participant = Conversation.participants.through
+
+    participants = {}
+    for conversation_id, user_id in Participant.objects.filter(
+        conversation__is_group=False
+    ).values_list('conversation_id', 'user_id'):
+        participants.setdefault(conversation_id, []).append(user_id)
+
+    seen = set()
+    for conversation_id in sorted(participants):
+        user_ids = participants[conversation_id]
+        if len(user_ids) != 2:
+            continue
+        pair = tuple(sorted(user_ids))
+        if pair in seen:
+            continue
+        seen.add(pair)
+        Conversation.objects.filter(pk=conversation_id).update(user_a_id=pair[0], user_b_id=pair[1])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='user_a',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='user_b',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_pair_keys, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='conversation',
+            constraint=models.UniqueConstraint(fields=('user_a', 'user_b'), name='unique_direct_conversation'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0 on 2026-10-19 14:10
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from messaging.search import create_search_index
+
+    create_search_index(schema_editor)
+
+
+def drop_search_index(apps, schema_editor):
+    from messaging.search import drop_search_index
+
+    drop_search_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0003_conversationparticipant'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
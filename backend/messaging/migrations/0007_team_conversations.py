@@ -0,0 +1,43 @@
+# Generated by Django 6.0 on 2026-10-19 15:10
+
+from django.db import migrations
+
+
+def create_team_conversations(apps, schema_editor):
+    """Give every existing team a group chat holding its owner, members and supervisor"""
+    Team = apps.get_model('teams', 'Team')
+    Conversation = apps.get_model('messaging', 'Conversation')
+    ConversationParticipant = apps.get_model('messaging', 'ConversationParticipant')
+
+    teams = list(Team.objects.filter(conversation__isnull=True).select_related('project'))
+    if not teams:
+        return
+
+    rosters = {
+        team.pk: {team.project.owner_id} | ({team.project.supervisor_id} if team.project.supervisor_id else set())
+        for team in teams
+    }
+    for team_id, student_id in Team.members.through.objects.filter(
+        team_id__in=rosters
+    ).values_list('team_id', 'student_id'):
+        rosters[team_id].add(student_id)
+
+    for team in teams:
+        conversation = Conversation.objects.create(name=team.project.title, is_group=True, team=team)
+        ConversationParticipant.objects.bulk_create([
+            ConversationParticipant(conversation=conversation, user_id=user_id)
+            for user_id in rosters[team.pk]
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0006_announcements'),
+        ('teams', '0002_initial'),
+        ('projects', '0004_project_member_count_is_joinable'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_team_conversations, migrations.RunPython.noop),
+    ]
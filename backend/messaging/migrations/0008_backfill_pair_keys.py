@@ -0,0 +1,43 @@
+# Generated by Django 6.0 on 2026-10-19 18:20
+
+from django.db import migrations
+
+
+def backfill_pair_keys(apps, schema_editor):
+    """
+    Key the one-on-one conversations created without user_a/user_b since
+    0002 (seed_data did). A pair that already has a keyed conversation keeps
+    it; of several unkeyed ones only the oldest is keyed.
+    """
+    Conversation = apps.get_model('messaging', 'Conversation')
+    Participant = Conversation.participants.through
+
+    participants = {}
+    for conversation_id, user_id in Participant.objects.filter(
+        conversation__is_group=False, conversation__user_a__isnull=True
+    ).values_list('conversation_id', 'user_id'):
+        participants.setdefault(conversation_id, []).append(user_id)
+    if not participants:
+        return
+
+    seen = set(Conversation.objects.filter(user_a__isnull=False).values_list('user_a_id', 'user_b_id'))
+    for conversation_id in sorted(participants):
+        user_ids = participants[conversation_id]
+        if len(user_ids) != 2:
+            continue
+        pair = tuple(sorted(user_ids))
+        if pair in seen:
+            continue
+        seen.add(pair)
+        Conversation.objects.filter(pk=conversation_id).update(user_a_id=pair[0], user_b_id=pair[1])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0007_team_conversations'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_pair_keys, migrations.RunPython.noop),
+    ]
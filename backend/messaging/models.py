@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.utils import timezone
 from users.models import User
 
@@ -9,8 +9,16 @@ class Conversation(models.Model):
     Can be one-on-one or group conversation.
     """
     name = models.CharField(max_length=255, blank=True)  # For group chats
-    participants = models.ManyToManyField(User, related_name='conversations')
+    participants = models.ManyToManyField(User, related_name='conversations', through='ConversationParticipant')
     is_group = models.BooleanField(default=False)
+    # One-on-one chats store their two participants sorted by id, so the
+    # pair has a unique index and can be looked up without joining participants
+    user_a = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    user_b = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    # Group chat of a project team (see messaging.broadcast)
+    team = models.OneToOneField(
+        'teams.Team', on_delete=models.SET_NULL, null=True, blank=True, related_name='conversation'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -18,20 +26,87 @@ class Conversation(models.Model):
         verbose_name = 'Conversation'
         verbose_name_plural = 'Conversations'
         ordering = ['-updated_at']
+        constraints = [
+            models.UniqueConstraint(fields=['user_a', 'user_b'], name='unique_direct_conversation'),
+        ]
 
     def __str__(self):
         if self.is_group:
             return self.name or f"Group Chat {self.id}"
         return f"Conversation {self.id}"
 
+    @staticmethod
+    def pair_key(user_id, other_user_id):
+        return tuple(sorted((user_id, other_user_id)))
+
+    @classmethod
+    def get_or_create_direct(cls, user_id, other_user_id):
+        """
+        Return (conversation, created) for the one-on-one chat between two
+        users. Concurrent calls for the same pair end up with a single row.
+        Raises User.DoesNotExist when a new chat would be with a missing user.
+        """
+        user_a_id, user_b_id = cls.pair_key(user_id, other_user_id)
+        try:
+            return cls.objects.get(user_a_id=user_a_id, user_b_id=user_b_id), False
+        except cls.DoesNotExist:
+            pass
+
+        if not User.objects.filter(pk=other_user_id).exists():
+            raise User.DoesNotExist('User not found')
+
+        try:
+            with transaction.atomic():
+                conversation = cls.objects.create(is_group=False, user_a_id=user_a_id, user_b_id=user_b_id)
+                conversation.participants.add(user_a_id, user_b_id)
+            return conversation, True
+        except IntegrityError:
+            # Another request created the pair first
+            return cls.objects.get(user_a_id=user_a_id, user_b_id=user_b_id), False
+
     def get_last_message(self):
         return self.messages.first()  # First because ordered by -created_at
 
-    def get_unread_count(self, user):
-        """Get unread message count for a specific user"""
+    def get_unread_count(self, user, last_read_at=None):
+        """
+        Get unread message count for a specific user: messages from others
+        after the user's last_read_at, or not yet marked read if they never
+        opened the conversation
+        """
+        if last_read_at is not None:
+            return self.messages.filter(created_at__gt=last_read_at).exclude(sender=user).count()
         return self.messages.filter(is_read=False).exclude(sender=user).count()
 
 
+class ConversationParticipant(models.Model):
+    """
+    A user's membership in a conversation, with their own inbox state.
+    last_activity_at follows the conversation's latest message, so a user's
+    inbox is read from the (user, archived, -last_activity_at) index alone.
+    """
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='memberships')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversation_memberships')
+    last_activity_at = models.DateTimeField(default=timezone.now)
+    # Messages after this are unread for the user; one watermark instead of a row per message
+    last_read_at = models.DateTimeField(null=True, blank=True)
+    muted = models.BooleanField(default=False)
+    archived = models.BooleanField(default=False)
+    pinned = models.BooleanField(default=False)
+
+    class Meta:
+        # Keeps the table of the former auto-created participants M2M
+        db_table = 'messaging_conversation_participants'
+        verbose_name = 'Conversation Participant'
+        verbose_name_plural = 'Conversation Participants'
+        unique_together = [('conversation', 'user')]
+        indexes = [
+            models.Index(fields=['user', 'archived', '-last_activity_at'], name='messaging_inbox_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} in {self.conversation}"
+
+
 class Message(models.Model):
     """
     Represents a single message in a conversation
@@ -67,3 +142,71 @@ class Message(models.Model):
         """Mark message as read"""
         self.is_read = True
         self.save(update_fields=['is_read'])
+
+
+class MessageArchive(models.Model):
+    """
+    Messages moved out of the Message table by archive_messages: a
+    zlib-compressed JSON array of up to MESSAGE_ARCHIVE_BATCH_SIZE messages
+    of one conversation (see messaging.archive).
+    """
+    conversation = models.ForeignKey(
+        Conversation,
+        on_delete=models.CASCADE,
+        related_name='archives'
+    )
+    first_created_at = models.DateTimeField()
+    last_created_at = models.DateTimeField()
+    message_count = models.PositiveIntegerField()
+    data = models.BinaryField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Message Archive'
+        verbose_name_plural = 'Message Archives'
+        ordering = ['conversation', 'first_created_at']
+        indexes = [
+            models.Index(fields=['conversation', 'first_created_at']),
+            models.Index(fields=['last_created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.message_count} messages of conversation {self.conversation_id}"
+
+
+class Announcement(models.Model):
+    """
+    A faculty broadcast delivered on read: stored once with its target teams
+    and shown to their members by querying, instead of copying a message into
+    every team chat (see messaging.broadcast).
+    """
+    sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='announcements')
+    content = models.TextField()
+    teams = models.ManyToManyField('teams.Team', related_name='announcements')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Announcement'
+        verbose_name_plural = 'Announcements'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.sender.name}: {self.content[:50]}"
+
+
+class AnnouncementReadMarker(models.Model):
+    """Announcements created after last_read_at are unread for the user"""
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name='announcement_read_marker'
+    )
+    last_read_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Announcement Read Marker'
+        verbose_name_plural = 'Announcement Read Markers'
+
+    def __str__(self):
+        return f"{self.user} read announcements until {self.last_read_at}"
@@ -0,0 +1,151 @@
+"""
+Presence and typing indicators
+
+Heartbeats and typing flags are short-lived, so they never touch the
+database. They live in a presence store: by default a bounded in-process
+TTL map (MemoryPresenceStore), or any class named by PRESENCE_STORE with the
+same interface. Multi-process deployments should use CachePresenceStore,
+which keeps them in the shared Django cache.
+
+A user is online for PRESENCE_ONLINE_TIMEOUT seconds after their last
+heartbeat (an explicit heartbeat, a message send or a long-poll), and their
+last_seen time is remembered for PRESENCE_LAST_SEEN_TIMEOUT seconds.
+Typing flags expire after TYPING_TIMEOUT seconds unless they are renewed.
+Lookups are one batch read for all of a conversation's participants, whose
+ids come from the participants cache (see messaging.membership).
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+from .membership import get_participant_ids
+
+
+class MemoryPresenceStore:
+    """
+    Bounded map of key -> value expiring ``timeout`` seconds after being set.
+    Every entry has the same lifetime, so insertion order is expiry order and
+    expired entries are pruned from the front; beyond PRESENCE_STORE_SIZE
+    entries the oldest are dropped.
+    """
+
+    def __init__(self, name, timeout):
+        self.timeout = timeout
+        self.size = getattr(settings, 'PRESENCE_STORE_SIZE', 50_000)
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def _prune(self, now):
+        while self.entries:
+            expires = next(iter(self.entries.values()))[0]
+            if expires > now and len(self.entries) <= self.size:
+                break
+            self.entries.popitem(last=False)
+
+    def set(self, key, value):
+        now = time.monotonic()
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = (now + self.timeout, value)
+            self._prune(now)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        found = {}
+        with self.lock:
+            for key in keys:
+                entry = self.entries.get(key)
+                if entry is not None and entry[0] > now:
+                    found[key] = entry[1]
+        return found
+
+
+class CachePresenceStore:
+    """Presence store shared between processes through the default Django cache"""
+
+    def __init__(self, name, timeout):
+        self.prefix = f'presence:{name}:'
+        self.timeout = timeout
+
+    def set(self, key, value):
+        cache.set(self.prefix + key, value, self.timeout)
+
+    def delete(self, key):
+        cache.delete(self.prefix + key)
+
+    def get_many(self, keys):
+        found = cache.get_many([self.prefix + key for key in keys])
+        return {key[len(self.prefix):]: value for key, value in found.items()}
+
+
+def create_store(name, timeout):
+    store_class = import_string(getattr(settings, 'PRESENCE_STORE', 'messaging.presence.MemoryPresenceStore'))
+    return store_class(name, timeout)
+
+
+last_seen_store = create_store('last_seen', getattr(settings, 'PRESENCE_LAST_SEEN_TIMEOUT', 3600))
+typing_store = create_store('typing', getattr(settings, 'TYPING_TIMEOUT', 8))
+
+
+def heartbeat(user_id, now=None):
+    """Record that a user is online"""
+    last_seen_store.set(str(user_id), now or time.time())
+
+
+def get_presence(user_ids, now=None):
+    """
+    {user_id: {'online': bool, 'last_seen': datetime or None}} for several
+    users with a single store read
+    """
+    now = now or time.time()
+    online_timeout = getattr(settings, 'PRESENCE_ONLINE_TIMEOUT', 60)
+    seen = last_seen_store.get_many([str(user_id) for user_id in user_ids])
+    presence = {}
+    for user_id in user_ids:
+        last_seen = seen.get(str(user_id))
+        presence[user_id] = {
+            'online': last_seen is not None and now - last_seen < online_timeout,
+            'last_seen': None if last_seen is None else datetime.fromtimestamp(last_seen, timezone.utc),
+        }
+    return presence
+
+
+def typing_key(conversation_id, user_id):
+    return f'{conversation_id}:{user_id}'
+
+
+def set_typing(conversation_id, user_id, typing=True):
+    key = typing_key(conversation_id, user_id)
+    if typing:
+        typing_store.set(key, True)
+    else:
+        typing_store.delete(key)
+
+
+def get_typing(conversation_id, participant_ids=None):
+    """Ids of the participants currently typing in a conversation"""
+    if participant_ids is None:
+        participant_ids = get_participant_ids(conversation_id)
+    keys = {typing_key(conversation_id, user_id): user_id for user_id in participant_ids}
+    return sorted(keys[key] for key in typing_store.get_many(keys))
+
+
+def conversation_presence(conversation_id, participant_ids=None):
+    """Presence of a conversation's participants and who is typing"""
+    if participant_ids is None:
+        participant_ids = get_participant_ids(conversation_id)
+    participant_ids = sorted(participant_ids)
+    presence = get_presence(participant_ids)
+    return {
+        'participants': [{'user_id': user_id, **presence[user_id]} for user_id in participant_ids],
+        'typing': get_typing(conversation_id, participant_ids),
+    }
@@ -0,0 +1,286 @@
+"""
+Full-text search over message content
+
+SQLite uses an FTS5 table (messaging_message_fts) kept in sync with
+messaging_message by triggers, and PostgreSQL a GIN index on
+to_tsvector('simple', content). Both are created by create_search_index().
+Other databases, and SQLite builds without FTS5, fall back to a LIKE scan.
+
+SQLite drops a table's triggers when Django rebuilds it, so migrations that
+alter messaging_message should call create_search_index() again (or run
+``python manage.py rebuild_message_search`` afterwards).
+
+Hits are ranked (bm25 on SQLite, ts_rank on PostgreSQL; higher is better)
+and paged with a (rank, id) keyset. Snippets are only built for the rows of
+the returned page.
+"""
+import base64
+import html
+import json
+import re
+
+from django.db import DatabaseError, connection, transaction
+from django.db.models.expressions import RawSQL
+
+from .models import Message
+
+# 'simple' neither stems nor drops stop words, which suits mixed
+# Turkish/English chats. Changing it requires rebuilding the index.
+TEXT_SEARCH_CONFIG = 'simple'
+
+FTS_TABLE = 'messaging_message_fts'
+GIN_INDEX = 'messaging_message_content_fts'
+
+# Private-use characters mark matches in snippets until the text is escaped
+HIGHLIGHT_START = '\ue000'
+HIGHLIGHT_STOP = '\ue001'
+SNIPPET_WORDS = 16
+
+TERM_RE = re.compile(r'\w+')
+
+_fts_available = None
+
+
+def create_search_index(schema_editor):
+    """Create (or recreate) the search index and fill it from existing messages"""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        drop_search_index(schema_editor)
+        try:
+            with transaction.atomic(using=schema_editor.connection.alias):
+                schema_editor.execute(
+                    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                    f"content, content='messaging_message', content_rowid='id', "
+                    f"tokenize='unicode61 remove_diacritics 2')"
+                )
+        except DatabaseError:
+            # SQLite compiled without FTS5; search falls back to LIKE
+            return
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON messaging_message BEGIN "
+            f"INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.id, new.content); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON messaging_message BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.id, old.content); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF content ON messaging_message BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.id, old.content); "
+            f"INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.id, new.content); END"
+        )
+        schema_editor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {GIN_INDEX} ON messaging_message "
+            f"USING GIN (to_tsvector('{TEXT_SEARCH_CONFIG}', content))"
+        )
+
+
+def drop_search_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif vendor == 'postgresql':
+        schema_editor.execute(f"DROP INDEX IF EXISTS {GIN_INDEX}")
+
+
+def search_backend():
+    """'fts5', 'postgresql' or 'like'"""
+    global _fts_available
+    if connection.vendor == 'postgresql':
+        return 'postgresql'
+    if connection.vendor == 'sqlite':
+        if _fts_available is None:
+            _fts_available = FTS_TABLE in connection.introspection.table_names()
+        if _fts_available:
+            return 'fts5'
+    return 'like'
+
+
+def parse_terms(query):
+    """Words of a user query; every word must match, as a prefix"""
+    return TERM_RE.findall(query.lower())
+
+
+def match_expression(terms, backend):
+    if backend == 'fts5':
+        return ' '.join(f'"{term}"*' for term in terms)
+    return ' & '.join(f'{term}:*' for term in terms)
+
+
+def matching_ids(query):
+    """
+    A RawSQL subquery of the ids of messages matching ``query``, for use
+    as ``pk__in``, or None when there is no full-text index
+    """
+    terms = parse_terms(query)
+    backend = search_backend()
+    if not terms or backend == 'like':
+        return None
+    if backend == 'fts5':
+        return RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match_expression(terms, backend)])
+    return RawSQL(
+        f"SELECT id FROM messaging_message "
+        f"WHERE to_tsvector('{TEXT_SEARCH_CONFIG}', content) @@ to_tsquery('{TEXT_SEARCH_CONFIG}', %s)",
+        [match_expression(terms, backend)]
+    )
+
+
+def encode_cursor(message):
+    """Opaque cursor pointing after ``message`` in the ranked results"""
+    payload = json.dumps({'r': message.rank, 'i': message.pk}).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii')
+
+
+def decode_cursor(value):
+    """(rank, id) from a cursor; raises ValueError for malformed cursors"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(value.encode('ascii')))
+        return float(payload['r']), int(payload['i'])
+    except (TypeError, KeyError, UnicodeEncodeError, json.JSONDecodeError, base64.binascii.Error) as exc:
+        raise ValueError('Invalid cursor') from exc
+
+
+def search_messages(user, query, conversation_id=None, after=None, limit=20):
+    """
+    Messages matching ``query`` in conversations ``user`` takes part in, best
+    match first. ``after`` is the (rank, id) of the last hit of the previous
+    page. Returns up to ``limit`` Message objects with ``rank`` and
+    ``snippet`` attributes, and whether more hits follow.
+    """
+    terms = parse_terms(query)
+    if not terms:
+        return [], False
+
+    backend = search_backend()
+    if backend == 'like':
+        hits = _like_ranked_ids(user, terms, conversation_id, after, limit + 1)
+    else:
+        hits = _ranked_ids(backend, user, terms, conversation_id, after, limit + 1)
+
+    has_more = len(hits) > limit
+    hits = hits[:limit]
+    if not hits:
+        return [], False
+
+    ids = [message_id for message_id, _ in hits]
+    messages = Message.objects.select_related('sender').in_bulk(ids)
+    snippets = _snippets(backend, terms, ids, messages)
+
+    results = []
+    for message_id, rank in hits:
+        message = messages.get(message_id)
+        if message is None:
+            continue
+        message.rank = rank
+        message.snippet = snippets.get(message_id, '')
+        results.append(message)
+    return results, has_more
+
+
+def _ranked_ids(backend, user, terms, conversation_id, after, limit):
+    if backend == 'fts5':
+        # bm25() is lower for better matches; negate it so higher is better
+        inner = (
+            f"SELECT m.id AS id, -bm25({FTS_TABLE}) AS rank FROM {FTS_TABLE} "
+            f"JOIN messaging_message m ON m.id = {FTS_TABLE}.rowid "
+            f"JOIN messaging_conversation_participants p "
+            f"ON p.conversation_id = m.conversation_id AND p.user_id = %s "
+            f"WHERE {FTS_TABLE} MATCH %s"
+        )
+    else:
+        inner = (
+            f"SELECT m.id AS id, ts_rank(to_tsvector('{TEXT_SEARCH_CONFIG}', m.content), q) AS rank "
+            f"FROM messaging_message m "
+            f"JOIN messaging_conversation_participants p "
+            f"ON p.conversation_id = m.conversation_id AND p.user_id = %s, "
+            f"to_tsquery('{TEXT_SEARCH_CONFIG}', %s) q "
+            f"WHERE to_tsvector('{TEXT_SEARCH_CONFIG}', m.content) @@ q"
+        )
+    params = [user.pk, match_expression(terms, backend)]
+    if conversation_id is not None:
+        inner += ' AND m.conversation_id = %s'
+        params.append(conversation_id)
+
+    sql = f'SELECT id, rank FROM ({inner}) hits'
+    if after is not None:
+        sql += ' WHERE rank < %s OR (rank = %s AND id < %s)'
+        params += [after[0], after[0], after[1]]
+    sql += ' ORDER BY rank DESC, id DESC LIMIT %s'
+    params.append(limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(message_id, float(rank)) for message_id, rank in cursor.fetchall()]
+
+
+def _like_ranked_ids(user, terms, conversation_id, after, limit):
+    # No ranking without an index: newest first, every hit ranked 0
+    queryset = Message.objects.filter(conversation__memberships__user=user)
+    for term in terms:
+        queryset = queryset.filter(content__icontains=term)
+    if conversation_id is not None:
+        queryset = queryset.filter(conversation_id=conversation_id)
+    if after is not None:
+        queryset = queryset.filter(pk__lt=after[1])
+    ids = queryset.order_by('-pk').values_list('pk', flat=True)[:limit]
+    return [(message_id, 0.0) for message_id in ids]
+
+
+def _snippets(backend, terms, ids, messages):
+    placeholders = ', '.join(['%s'] * len(ids))
+    if backend == 'fts5':
+        sql = (
+            f"SELECT rowid, snippet({FTS_TABLE}, 0, %s, %s, '…', %s) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND rowid IN ({placeholders})"
+        )
+        params = [HIGHLIGHT_START, HIGHLIGHT_STOP, SNIPPET_WORDS, match_expression(terms, backend), *ids]
+    elif backend == 'postgresql':
+        sql = (
+            f"SELECT id, ts_headline('{TEXT_SEARCH_CONFIG}', content, "
+            f"to_tsquery('{TEXT_SEARCH_CONFIG}', %s), %s) "
+            f"FROM messaging_message WHERE id IN ({placeholders})"
+        )
+        options = (
+            f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, '
+            f'MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 2}, MaxFragments=1'
+        )
+        params = [match_expression(terms, backend), options, *ids]
+    else:
+        return {
+            message_id: _like_snippet(message.content, terms)
+            for message_id, message in messages.items()
+        }
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return {message_id: highlight(snippet) for message_id, snippet in cursor.fetchall()}
+
+
+def highlight(snippet):
+    """Escape a snippet and turn the match markers into <mark> tags"""
+    return html.escape(snippet).replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_STOP, '</mark>')
+
+
+def _like_snippet(content, terms):
+    words = content.split()
+    lowered = [word.lower() for word in words]
+    first = next(
+        (i for i, word in enumerate(lowered) if any(term in word for term in terms)),
+        0
+    )
+    start = max(first - SNIPPET_WORDS // 2, 0)
+    window = words[start:start + SNIPPET_WORDS]
+    marked = [
+        f'{HIGHLIGHT_START}{word}{HIGHLIGHT_STOP}' if any(term in word.lower() for term in terms) else word
+        for word in window
+    ]
+    text = ' '.join(marked)
+    if start > 0:
+        text = '…' + text
+    if start + SNIPPET_WORDS < len(words):
+        text += '…'
+    return highlight(text)
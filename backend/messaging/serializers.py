@@ -1,9 +1,13 @@
 from rest_framework import serializers
-from .models import Conversation, Message
+from django.db import transaction
+from config.fieldsets import SparseFieldsetMixin
+from .models import Announcement, Conversation, ConversationParticipant, Message
+from .broadcast import DELIVERY_CHOICES
+from .wakeups import wake_on_commit
 from users.serializers import UserSerializer
 
 
-class MessageSerializer(serializers.ModelSerializer):
+class MessageSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for Message model"""
     sender_name = serializers.CharField(source='sender.name', read_only=True)
     sender_profile_image = serializers.ImageField(source='sender.profile_image', read_only=True)
@@ -17,18 +21,33 @@ class MessageSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'sender', 'created_at', 'updated_at']
 
 
-class ConversationListSerializer(serializers.ModelSerializer):
+class MessageSearchResultSerializer(MessageSerializer):
+    """A message search hit with its rank and a highlighted excerpt (HTML-escaped, matches in <mark>)"""
+    rank = serializers.FloatField(read_only=True)
+    snippet = serializers.CharField(read_only=True)
+
+    class Meta(MessageSerializer.Meta):
+        fields = MessageSerializer.Meta.fields + ['rank', 'snippet']
+
+
+class ConversationListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Lightweight serializer for listing conversations"""
     last_message = serializers.SerializerMethodField()
     last_message_time = serializers.SerializerMethodField()
     unread_count = serializers.SerializerMethodField()
     other_participant = serializers.SerializerMethodField()
+    # The current user's inbox state, annotated by ConversationViewSet
+    last_activity_at = serializers.DateTimeField(read_only=True)
+    muted = serializers.BooleanField(read_only=True)
+    archived = serializers.BooleanField(read_only=True)
+    pinned = serializers.BooleanField(read_only=True)
 
     class Meta:
         model = Conversation
         fields = [
             'id', 'name', 'is_group', 'last_message', 'last_message_time',
-            'unread_count', 'other_participant', 'created_at', 'updated_at'
+            'unread_count', 'other_participant', 'last_activity_at',
+            'muted', 'archived', 'pinned', 'created_at', 'updated_at'
         ]
 
     def get_last_message(self, obj):
@@ -41,7 +60,7 @@ class ConversationListSerializer(serializers.ModelSerializer):
 
     def get_unread_count(self, obj):
         user = self.context.get('request').user
-        return obj.get_unread_count(user)
+        return obj.get_unread_count(user, getattr(obj, 'last_read_at', None))
 
     def get_other_participant(self, obj):
         """For one-on-one chats, get the other participant's info"""
@@ -59,7 +78,7 @@ class ConversationListSerializer(serializers.ModelSerializer):
         return None
 
 
-class ConversationDetailSerializer(serializers.ModelSerializer):
+class ConversationDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Detailed serializer for conversation with participants"""
     participants = UserSerializer(many=True, read_only=True)
     messages = MessageSerializer(many=True, read_only=True)
@@ -73,6 +92,45 @@ class ConversationDetailSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
+class ConversationPreferencesSerializer(serializers.ModelSerializer):
+    """A participant's own settings for a conversation"""
+
+    class Meta:
+        model = ConversationParticipant
+        fields = ['muted', 'archived', 'pinned', 'last_activity_at']
+        read_only_fields = ['last_activity_at']
+
+
+class AnnouncementSerializer(serializers.ModelSerializer):
+    """An announcement delivered on read"""
+    sender_name = serializers.CharField(source='sender.name', read_only=True)
+    is_read = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Announcement
+        fields = ['id', 'sender', 'sender_name', 'content', 'is_read', 'created_at']
+        read_only_fields = fields
+
+    def get_is_read(self, obj):
+        request = self.context.get('request')
+        if request and obj.sender_id == request.user.pk:
+            return True
+        last_read_at = self.context.get('last_read_at')
+        return last_read_at is not None and obj.created_at <= last_read_at
+
+
+class BroadcastSerializer(serializers.Serializer):
+    """Serializer for a faculty announcement to supervised teams"""
+    content = serializers.CharField()
+    project_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        min_length=1,
+        help_text='Only these supervised projects (default: all with a team)'
+    )
+    delivery = serializers.ChoiceField(choices=DELIVERY_CHOICES, default='auto')
+
+
 class CreateConversationSerializer(serializers.Serializer):
     """Serializer for creating a new conversation"""
     participant_ids = serializers.ListField(
@@ -83,6 +141,7 @@ class CreateConversationSerializer(serializers.Serializer):
     is_group = serializers.BooleanField(default=False)
     initial_message = serializers.CharField(required=False, allow_blank=True)
 
+    @transaction.atomic
     def create(self, validated_data):
         from users.models import User
 
@@ -90,24 +149,39 @@ class CreateConversationSerializer(serializers.Serializer):
         initial_message = validated_data.pop('initial_message', None)
         request = self.context.get('request')
 
-        # Create conversation
-        conversation = Conversation.objects.create(**validated_data)
-
-        # Add participants
-        participants = User.objects.filter(id__in=participant_ids)
-        conversation.participants.add(*participants)
-
-        # Add creator to participants
+        other_ids = set(participant_ids)
         if request and request.user:
-            conversation.participants.add(request.user)
+            other_ids.discard(request.user.pk)
+
+        if request and request.user and not validated_data.get('is_group') and len(other_ids) == 1:
+            # One-on-one chats are unique per pair of users
+            try:
+                conversation, _ = Conversation.get_or_create_direct(request.user.pk, other_ids.pop())
+            except User.DoesNotExist:
+                raise serializers.ValidationError({'participant_ids': 'User not found.'})
+        else:
+            # Create conversation
+            conversation = Conversation.objects.create(**validated_data)
+
+            # Add participants
+            participants = User.objects.filter(id__in=participant_ids)
+            conversation.participants.add(*participants)
+
+            # Add creator to participants
+            if request and request.user:
+                conversation.participants.add(request.user)
 
         # Send initial message if provided
         if initial_message and request and request.user:
-            Message.objects.create(
+            from notifications.services import notify_message
+
+            message = Message.objects.create(
                 conversation=conversation,
                 sender=request.user,
                 content=initial_message
             )
+            notify_message(message)
+            wake_on_commit(conversation.pk)
 
         return conversation
 
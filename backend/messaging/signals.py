@@ -0,0 +1,74 @@
+"""
+Signal handlers for the Messaging app
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from projects.models import Project
+from teams.models import Team
+from .membership import invalidate_participants
+from .models import Conversation, ConversationParticipant
+from .team_chats import sync_team_conversations
+
+
+@receiver(m2m_changed, sender=ConversationParticipant)
+def participants_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidate_participants(instance.pk)
+        return
+
+    # user.conversations.add/remove/clear(): pk_set holds conversation ids
+    if action == 'pre_clear':
+        instance._cleared_conversation_ids = list(
+            sender.objects.filter(user_id=instance.pk).values_list('conversation_id', flat=True)
+        )
+    elif action == 'post_clear':
+        invalidate_participants(*getattr(instance, '_cleared_conversation_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        invalidate_participants(*pk_set)
+
+
+@receiver(post_save, sender=ConversationParticipant)
+@receiver(post_delete, sender=ConversationParticipant)
+def membership_changed(sender, instance, **kwargs):
+    # Single rows saved (preferences, admin) or deleted, including the
+    # cascade when a user or conversation is deleted
+    invalidate_participants(instance.conversation_id)
+
+
+@receiver(post_delete, sender=Conversation)
+def conversation_deleted(sender, instance, **kwargs):
+    invalidate_participants(instance.pk)
+
+
+@receiver(post_save, sender=Team)
+def team_saved(sender, instance, created, **kwargs):
+    if created:
+        sync_team_conversations([instance.pk])
+
+
+@receiver(m2m_changed, sender=Team.members.through)
+def team_members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            sync_team_conversations([instance.pk])
+        return
+
+    # student.teams.add/remove/clear(): pk_set holds team ids
+    if action == 'pre_clear':
+        instance._cleared_chat_team_ids = list(instance.teams.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        sync_team_conversations(getattr(instance, '_cleared_chat_team_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        sync_team_conversations(pk_set)
+
+
+@receiver(post_save, sender=Project)
+def project_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Only a new owner or supervisor changes the team chat's participants
+    if created or (update_fields is not None and not {'owner', 'supervisor'} & set(update_fields)):
+        return
+    if not instance.roster_changed():
+        return
+    sync_team_conversations(Team.objects.filter(project=instance).values_list('pk', flat=True))
@@ -0,0 +1,12 @@
+"""
+Background tasks for the Messaging app
+"""
+from jobs.queue import task
+
+
+@task()
+def archive_messages():
+    from .archive import archive_messages as archive, purge_archives
+
+    archive()
+    purge_archives()
@@ -0,0 +1,97 @@
+"""
+Team group chats
+
+Every team has one group conversation (Conversation.team) whose participants
+are the team's roster: the project owner, the members and the supervisor
+(see teams.roster). The chat is created with the team and synchronized on
+every roster change by sync_team_conversations(), which applies the
+difference between the roster and the current participants with one bulk
+INSERT and one DELETE instead of per-user add/remove calls.
+
+After a sync the chat's participants cache is filled from the roster, so
+membership checks for team chats don't read the participants table.
+"""
+from django.db.models import Q
+
+from teams.models import Team
+from teams.roster import load_rosters
+from .membership import invalidate_participants, prime_participants
+from .models import Conversation, ConversationParticipant
+
+
+def get_team_conversations(teams, rosters=None):
+    """
+    Map each team's id to its group chat, creating the missing ones (with
+    their participants) in bulk. ``teams`` need their project loaded.
+    """
+    conversations = {
+        conversation.team_id: conversation
+        for conversation in Conversation.objects.filter(team__in=teams)
+    }
+    missing = [team for team in teams if team.pk not in conversations]
+    if not missing:
+        return conversations
+
+    if rosters is None:
+        rosters = load_rosters([team.pk for team in missing])
+    created = Conversation.objects.bulk_create([
+        Conversation(name=team.project.title, is_group=True, team=team)
+        for team in missing
+    ])
+
+    # Backends without RETURNING (e.g. MySQL) leave primary keys unset
+    if any(conversation.pk is None for conversation in created):
+        ids = dict(Conversation.objects.filter(
+            team__in=missing
+        ).values_list('team_id', 'id'))
+        for conversation in created:
+            conversation.pk = ids[conversation.team_id]
+
+    ConversationParticipant.objects.bulk_create([
+        ConversationParticipant(conversation=conversation, user_id=user_id)
+        for conversation in created
+        for user_id in rosters.get(conversation.team_id, ())
+    ], ignore_conflicts=True)
+    invalidate_participants(*(conversation.pk for conversation in created))
+
+    conversations.update((conversation.team_id, conversation) for conversation in created)
+    return conversations
+
+
+def sync_team_conversations(team_ids):
+    """Create missing team chats and make every chat's participants match its team roster"""
+    teams = list(Team.objects.filter(pk__in=set(team_ids)).select_related('project'))
+    if not teams:
+        return
+
+    rosters = load_rosters([team.pk for team in teams])
+    conversations = get_team_conversations(teams, rosters)
+    team_of = {conversation.pk: team_id for team_id, conversation in conversations.items()}
+
+    current = {conversation_id: {} for conversation_id in team_of}
+    for conversation_id, user_id, muted in ConversationParticipant.objects.filter(
+        conversation_id__in=team_of
+    ).values_list('conversation_id', 'user_id', 'muted'):
+        current[conversation_id][user_id] = muted
+
+    additions = []
+    removals = Q()
+    for conversation_id, participants in current.items():
+        roster = rosters.get(team_of[conversation_id], frozenset())
+        additions.extend(
+            ConversationParticipant(conversation_id=conversation_id, user_id=user_id)
+            for user_id in roster - participants.keys()
+        )
+        removed = participants.keys() - roster
+        if removed:
+            removals |= Q(conversation_id=conversation_id, user_id__in=removed)
+
+    if additions:
+        ConversationParticipant.objects.bulk_create(additions, ignore_conflicts=True)
+    if removals:
+        ConversationParticipant.objects.filter(removals).delete()
+
+    for conversation_id, participants in current.items():
+        roster = rosters.get(team_of[conversation_id], frozenset())
+        muted = frozenset(user_id for user_id, is_muted in participants.items() if is_muted and user_id in roster)
+        prime_participants(conversation_id, roster, muted)
@@ -1,3 +1,451 @@
+import asyncio
+import importlib
+import io
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.apps import apps as django_apps
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from notifications.models import Notification
+from projects.models import Project
+from teams.models import Team
+from users.models import Faculty, Student, User
+from .archive import archive_messages, archived_messages, purge_archives
+from .membership import get_participant_ids, participants_cache_key
+from .models import Conversation, ConversationParticipant, Message, MessageArchive
+from .search import search_backend
+from .wakeups import waiter_count, wake_on_commit
+
+
+def create_user(name, user_type='student'):
+    domain = 'std.medipol.edu.tr' if user_type == 'student' else 'medipol.edu.tr'
+    return User.objects.create_user(
+        email=f'{name.lower()}@{domain}', password='pass', name=name, user_type=user_type
+    )
+
+
+def create_student(name):
+    user = create_user(name)
+    return Student.objects.create(user=user, student_id=name.upper(), department='CS', year='3')
+
+
+def create_faculty(name):
+    user = create_user(name, user_type='faculty')
+    return Faculty.objects.create(user=user, faculty_id=name.upper(), department='CS')
+
+
+def bearer(user):
+    return {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+
+
+class LongPollTests(TestCase):
+    def setUp(self):
+        self.alice = create_user('Alice')
+        self.bob = create_user('Bob')
+        self.conversation, _ = Conversation.get_or_create_direct(self.alice.pk, self.bob.pk)
+        self.first = Message.objects.create(conversation=self.conversation, sender=self.alice, content='first')
+        self.url = f'/api/messaging/conversations/{self.conversation.pk}/wait/'
+
+    async def test_returns_newer_messages_immediately(self):
+        response = await self.async_client.get(f'{self.url}?after=0', headers=bearer(self.bob))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([message['content'] for message in response.json()], ['first'])
+
+    async def test_times_out_with_empty_list(self):
+        response = await self.async_client.get(f'{self.url}?after={self.first.pk}&timeout=0.2', headers=bearer(self.bob))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [])
+        self.assertEqual(waiter_count(), 0)
+
+    async def test_woken_by_new_message(self):
+        def send():
+            # The test transaction never commits, so run the on_commit wakeup directly
+            with self.captureOnCommitCallbacks(execute=True):
+                Message.objects.create(conversation=self.conversation, sender=self.alice, content='hello')
+                wake_on_commit(self.conversation.pk)
+
+        async def send_later():
+            await asyncio.sleep(0.2)
+            await sync_to_async(send)()
+
+        task = asyncio.create_task(send_later())
+        started = time.monotonic()
+        response = await self.async_client.get(f'{self.url}?after={self.first.pk}&timeout=5', headers=bearer(self.bob))
+        await task
+        self.assertEqual([message['content'] for message in response.json()], ['hello'])
+        self.assertLess(time.monotonic() - started, 2)
+
+    async def test_rejects_non_finite_timeout(self):
+        for value in ('nan', 'inf', '-inf'):
+            response = await self.async_client.get(f'{self.url}?after={self.first.pk}&timeout={value}', headers=bearer(self.bob))
+            self.assertEqual(response.status_code, 400)
+
+    async def test_requires_after_and_participation(self):
+        carol = await sync_to_async(create_user)('Carol')
+        self.assertEqual((await self.async_client.get(self.url, headers=bearer(self.bob))).status_code, 400)
+        self.assertEqual((await self.async_client.get(f'{self.url}?after=0', headers=bearer(carol))).status_code, 404)
+        self.assertEqual((await self.async_client.get(f'{self.url}?after=0')).status_code, 401)
+
+    def test_wsgi_requests_do_not_wait(self):
+        started = time.monotonic()
+        response = self.client.get(f'{self.url}?after={self.first.pk}&timeout=5', headers=bearer(self.bob))
+        self.assertEqual(response.json(), [])
+        self.assertLess(time.monotonic() - started, 2)
+
+
+class DirectConversationTests(TestCase):
+    def setUp(self):
+        self.alice = create_user('Alice')
+        self.bob = create_user('Bob')
+
+    def find_or_create(self, user, other):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post('/api/messaging/conversations/find_or_create/', {'participant_id': other.pk}, format='json')
+
+    def test_find_or_create_reuses_the_pair(self):
+        first = self.find_or_create(self.alice, self.bob)
+        second = self.find_or_create(self.bob, self.alice)
+        self.assertEqual((first.status_code, second.status_code), (201, 200))
+        self.assertEqual(first.json()['id'], second.json()['id'])
+
+    def test_seeded_chats_are_found(self):
+        call_command('seed_data', stdout=io.StringIO())
+        conversation = Conversation.objects.filter(is_group=False, team__isnull=True).first()
+        user, other = conversation.participants.all()
+        self.assertEqual((conversation.user_a_id, conversation.user_b_id), Conversation.pair_key(user.pk, other.pk))
+        response = self.find_or_create(user, other)
+        self.assertEqual((response.status_code, response.json()['id']), (200, conversation.pk))
+
+    def test_backfill_keys_unkeyed_chats(self):
+        backfill = importlib.import_module('messaging.migrations.0008_backfill_pair_keys').backfill_pair_keys
+        keyed, _ = Conversation.get_or_create_direct(self.alice.pk, self.bob.pk)
+        duplicate = Conversation.objects.create()
+        duplicate.participants.add(self.alice, self.bob)
+        carol = create_user('Carol')
+        unkeyed = Conversation.objects.create()
+        unkeyed.participants.add(self.alice, carol)
+
+        backfill(django_apps, None)
+        duplicate.refresh_from_db()
+        unkeyed.refresh_from_db()
+        self.assertIsNone(duplicate.user_a_id)
+        self.assertEqual((unkeyed.user_a_id, unkeyed.user_b_id), Conversation.pair_key(self.alice.pk, carol.pk))
+        self.assertEqual(Conversation.get_or_create_direct(carol.pk, self.alice.pk), (unkeyed, False))
+
+
+class SendMessageMembershipTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = create_user('Alice')
+        self.bob = create_user('Bob')
+        self.conversation, _ = Conversation.get_or_create_direct(self.alice.pk, self.bob.pk)
+        self.url = f'/api/messaging/conversations/{self.conversation.pk}/send_message/'
+
+    def send(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post(self.url, {'content': 'hello'}, format='json')
+
+    def test_non_participant_gets_404(self):
+        self.assertEqual(self.send(create_user('Carol')).status_code, 404)
+
+    def test_removed_participant_loses_access(self):
+        self.assertEqual(self.send(self.bob).status_code, 201)
+        self.conversation.participants.remove(self.bob)
+        self.assertEqual(self.send(self.bob).status_code, 404)
+
+    def test_added_participant_gains_access(self):
+        carol = create_user('Carol')
+        self.assertEqual(self.send(carol).status_code, 404)
+        self.conversation.participants.add(carol)
+        self.assertEqual(self.send(carol).status_code, 201)
+
+
+class TeamChatSyncTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = create_student('Owner')
+        self.members = [create_student(f'Member{number}') for number in range(3)]
+        self.supervisor = create_faculty('Supervisor')
+        self.project = Project.objects.create(
+            title='Hub', description='A project', owner=self.owner, supervisor=self.supervisor
+        )
+        self.team = Team.objects.create(project=self.project)
+
+    def participants(self):
+        return set(ConversationParticipant.objects.filter(
+            conversation__team=self.team
+        ).values_list('user_id', flat=True))
+
+    def test_team_gets_a_group_chat_with_owner_and_supervisor(self):
+        conversation = Conversation.objects.get(team=self.team)
+        self.assertTrue(conversation.is_group)
+        self.assertEqual(self.participants(), {self.owner.pk, self.supervisor.pk})
+
+    def test_member_changes_are_synced(self):
+        self.team.members.add(*self.members)
+        self.assertEqual(self.participants(), {self.owner.pk, self.supervisor.pk, *(m.pk for m in self.members)})
+
+        self.team.members.remove(self.members[0])
+        self.members[1].teams.remove(self.team)
+        self.assertEqual(self.participants(), {self.owner.pk, self.supervisor.pk, self.members[2].pk})
+
+    def test_participants_cache_follows_the_roster(self):
+        conversation = Conversation.objects.get(team=self.team)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.team.members.add(self.members[0])
+        self.assertIsNotNone(cache.get(participants_cache_key(conversation.pk)))
+        with CaptureQueriesContext(connection) as queries:
+            participant_ids = get_participant_ids(conversation.pk)
+        self.assertEqual(len(queries), 0)
+        self.assertIn(self.members[0].pk, participant_ids)
+
+    def test_team_chats_without_bulk_insert_ids(self):
+        # MySQL can't return the ids of bulk inserted rows
+        other = Project.objects.create(title='Other', description='A project', owner=self.members[0])
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            team = Team.objects.create(project=other)
+        conversation = Conversation.objects.get(team=team)
+        self.assertEqual(set(conversation.participants.values_list('pk', flat=True)), {self.members[0].pk})
+
+    def test_supervisor_change_is_synced(self):
+        other = create_faculty('Other')
+        project = Project.objects.get(pk=self.project.pk)
+        project.supervisor = other
+        project.save()
+        self.assertEqual(self.participants(), {self.owner.pk, other.pk})
+
+    def test_plain_project_save_skips_the_sync(self):
+        project = Project.objects.get(pk=self.project.pk)
+        project.title = 'Renamed'
+        with CaptureQueriesContext(connection) as queries:
+            project.save()
+        self.assertFalse(any('messaging_conversation' in query['sql'] for query in queries))
+        self.assertEqual(self.participants(), {self.owner.pk, self.supervisor.pk})
+
+
+class BroadcastTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.supervisor = create_faculty('Supervisor')
+        self.member = create_student('Member')
+        self.teams = []
+        for title in ('First', 'Second'):
+            project = Project.objects.create(
+                title=title, description='A project', owner=create_student(f'{title}Owner'), supervisor=self.supervisor
+            )
+            team = Team.objects.create(project=project)
+            team.members.add(self.member)
+            self.teams.append(team)
+        self.client = APIClient()
+        self.client.force_authenticate(self.supervisor.user)
+
+    def broadcast(self):
+        response = self.client.post(
+            '/api/messaging/announcements/broadcast/', {'content': 'Hello teams', 'delivery': 'write'}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def notified(self):
+        return set(Notification.objects.filter(kind='message').values_list('recipient_id', flat=True))
+
+    def test_message_ids_are_returned(self):
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            message_ids = self.broadcast()['message_ids']
+        self.assertEqual(sorted(message_ids), sorted(Message.objects.filter(content='Hello teams').values_list('pk', flat=True)))
+
+    def test_muting_one_chat_keeps_notifications_from_the_others(self):
+        ConversationParticipant.objects.filter(conversation__team=self.teams[0], user=self.member.user).update(muted=True)
+        self.broadcast()
+        self.assertIn(self.member.pk, self.notified())
+
+        ConversationParticipant.objects.filter(conversation__team=self.teams[1], user=self.member.user).update(muted=True)
+        Notification.objects.all().delete()
+        self.broadcast()
+        self.assertNotIn(self.member.pk, self.notified())
+        self.assertIn(self.teams[0].project.owner_id, self.notified())
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.alice = create_user('Alice')
+        self.bob = create_user('Bob')
+        self.conversation, _ = Conversation.get_or_create_direct(self.alice.pk, self.bob.pk)
+        now = timezone.now()
+        for day in range(5, 0, -1):
+            message = Message.objects.create(conversation=self.conversation, sender=self.alice, content=f'day {day}')
+            Message.objects.filter(pk=message.pk).update(created_at=now - timedelta(days=day))
+        Message.objects.create(conversation=self.conversation, sender=self.bob, content='today')
+        self.expected = ['day 5', 'day 4', 'day 3', 'day 2', 'day 1', 'today']
+
+    def history(self, stream=False):
+        client = APIClient()
+        client.force_authenticate(self.bob)
+        url = f'/api/messaging/conversations/{self.conversation.pk}/messages/'
+        response = client.get(url, {'stream': 'true'} if stream else {})
+        if stream:
+            return [message['content'] for message in json.loads(b''.join(response.streaming_content))]
+        return [message['content'] for message in response.json()]
+
+    def test_round_trip(self):
+        archived, archives = archive_messages(cutoff=timezone.now() - timedelta(hours=12), batch_size=2)
+        self.assertEqual((archived, archives), (5, 3))
+        self.assertEqual(Message.objects.filter(conversation=self.conversation).count(), 1)
+
+        self.assertEqual(self.history(), self.expected)
+        self.assertEqual(self.history(stream=True), self.expected)
+
+        restored = list(archived_messages(self.conversation.pk))
+        self.assertEqual([message.sender for message in restored], [self.alice] * 5)
+
+    def test_archives_are_read_lazily(self):
+        archive_messages(cutoff=timezone.now() - timedelta(hours=12), batch_size=2)
+        messages = archived_messages(self.conversation.pk)
+        with CaptureQueriesContext(connection) as queries:
+            first = next(messages)
+        self.assertEqual(first.content, 'day 5')
+        self.assertEqual(len(queries), 2)  # The first archive and its senders
+
+    def test_purge_deletes_expired_archives(self):
+        archive_messages(cutoff=timezone.now() - timedelta(hours=12), batch_size=2)
+        self.assertEqual(purge_archives(retention_days=1.5), 2)
+        self.assertEqual(MessageArchive.objects.count(), 1)
+        self.assertEqual(self.history(), ['day 1', 'today'])
+
+
+    def export(self, since):
+        archive_messages(cutoff=timezone.now() - timedelta(hours=12), batch_size=2)
+        staff = User.objects.create_superuser(email='admin@medipol.edu.tr', password='pass', name='Admin')
+        client = APIClient()
+        client.force_authenticate(staff)
+        response = client.get('/api/messaging/messages/export/', {'output': 'jsonl', 'since': since})
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        return [json.loads(line)['content'] for line in lines]
+
+    def test_export_with_archives_and_naive_since(self):
+        since = timezone.localtime() - timedelta(days=2, hours=12)
+        self.assertEqual(self.export(since.replace(tzinfo=None).isoformat()), ['day 2', 'day 1', 'today'])
+
+    def test_export_command_with_naive_since(self):
+        archive_messages(cutoff=timezone.now() - timedelta(hours=12), batch_size=2)
+        since = timezone.localtime() - timedelta(days=2, hours=12)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'messages.jsonl')
+            call_command(
+                'export_data', 'messages', '--output', 'jsonl', '--file', path,
+                '--since', since.replace(tzinfo=None).isoformat(), stdout=io.StringIO()
+            )
+            with open(path) as output:
+                lines = output.read().splitlines()
+        self.assertEqual([json.loads(line)['content'] for line in lines], ['day 2', 'day 1', 'today'])
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.alice = create_user('Alice')
+        self.bob = create_user('Bob')
+        self.carol = create_user('Carol')
+        self.conversation, _ = Conversation.get_or_create_direct(self.alice.pk, self.bob.pk)
+        self.other, _ = Conversation.get_or_create_direct(self.alice.pk, self.carol.pk)
+        self.client = APIClient()
+        self.client.force_authenticate(self.bob)
+
+    def send(self, content, conversation=None):
+        return Message.objects.create(conversation=conversation or self.conversation, sender=self.alice, content=content)
+
+    def search(self, q, **params):
+        response = self.client.get('/api/messaging/messages/search/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def ids(self, q, **params):
+        return [hit['id'] for hit in self.search(q, **params)['results']]
+
+    def test_uses_the_full_text_index(self):
+        self.assertEqual(search_backend(), 'fts5' if connection.vendor == 'sqlite' else 'postgresql')
+
+    def test_only_searches_own_conversations(self):
+        mine = self.send('Deadline is friday')
+        self.send('Deadline moved', conversation=self.other)
+        self.assertEqual(self.ids('deadline'), [mine.pk])
+        self.client.force_authenticate(self.carol)
+        self.assertNotIn(mine.pk, self.ids('deadline'))
+
+    def test_prefix_terms_must_all_match(self):
+        both = self.send('Meeting about the report')
+        self.send('Meeting only')
+        self.assertEqual(self.ids('meet rep'), [both.pk])
+
+    def test_edits_and_deletes_update_the_index(self):
+        message = self.send('Draft ready')
+        message.content = 'Final version ready'
+        message.save()
+        self.assertEqual(self.ids('draft'), [])
+        self.assertEqual(self.ids('final'), [message.pk])
+
+        message.delete()
+        self.assertEqual(self.ids('final'), [])
+
+    def test_snippets_are_escaped_and_highlighted(self):
+        self.send('See <b>schedule</b> before the schedule review')
+        snippet = self.search('schedule')['results'][0]['snippet']
+        self.assertIn('&lt;b&gt;', snippet)
+        self.assertIn('<mark>schedule</mark>', snippet)
+        self.assertNotIn('<b>', snippet)
+
+    def test_cursor_pages_through_ranked_hits(self):
+        sent = [self.send('budget ' * (count % 3 + 1) + f'note {count}') for count in range(7)]
+        seen, ranks = [], []
+        page = self.search('budget', page_size=3)
+        while True:
+            seen.extend(hit['id'] for hit in page['results'])
+            ranks.extend(hit['rank'] for hit in page['results'])
+            if not page['next']:
+                break
+            page = self.client.get(page['next']).json()
+        self.assertEqual(sorted(seen), sorted(message.pk for message in sent))
+        self.assertEqual(ranks, sorted(ranks, reverse=True))
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/messaging/messages/search/', {'q': 'budget', 'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 404)
+
+
+class TypingTests(TestCase):
+    def setUp(self):
+        self.alice = create_user('Alice')
+        self.bob = create_user('Bob')
+        self.conversation, _ = Conversation.get_or_create_direct(self.alice.pk, self.bob.pk)
+        self.url = f'/api/messaging/conversations/{self.conversation.pk}/'
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def typing(self):
+        return self.client.get(f'{self.url}presence/').json()['typing']
+
+    def test_typing_flag_parsing(self):
+        for value, expected in ((True, True), ('true', True), ('False', False), ('no', False), ('1', True), (0, False)):
+            response = self.client.post(f'{self.url}typing/', {'typing': value}, format='json')
+            self.assertEqual(response.json(), {'typing': expected})
+            self.assertEqual(self.typing(), [self.alice.pk] if expected else [])
 
-# Create your tests here.
+    def test_invalid_typing_flag(self):
+        response = self.client.post(f'{self.url}typing/', {'typing': 'maybe'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('typing', response.json())
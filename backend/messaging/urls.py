@@ -1,11 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ConversationViewSet, MessageViewSet
+from .views import AnnouncementViewSet, ConversationViewSet, MessageViewSet, wait_for_messages
 
 router = DefaultRouter()
 router.register(r'conversations', ConversationViewSet, basename='conversation')
 router.register(r'messages', MessageViewSet, basename='message')
+router.register(r'announcements', AnnouncementViewSet, basename='announcement')
 
 urlpatterns = [
+    path('conversations/<int:pk>/wait/', wait_for_messages, name='conversation-wait'),
     path('', include(router.urls)),
 ]
@@ -1,24 +1,64 @@
-from rest_framework import viewsets, status
+import asyncio
+import math
+
+from asgiref.sync import sync_to_async
+from rest_framework import serializers, viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, NotFound, ValidationError
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q
-from .models import Conversation, Message
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import F, Q
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_GET
+from config.fieldsets import SparseFieldsetViewMixin
+from config.renderers import dumps
+from config.streaming import export_response, get_export_format, streaming_json_response, wants_stream
+from notifications.services import notify_message
+from users.models import User
+from users.authentication import CachedJWTAuthentication
+from users.permissions import IsFaculty
+from .archive import message_history
+from .broadcast import (
+    announcements_for,
+    announcements_last_read_at,
+    broadcast,
+    mark_announcements_read,
+    supervised_teams,
+    unread_announcement_count,
+)
+from .exporters import export_messages
+from .membership import get_participant_ids, get_participants
+from .models import Conversation, ConversationParticipant, Message
+from .presence import conversation_presence, heartbeat as record_heartbeat, set_typing
+from .search import decode_cursor, encode_cursor, search_messages
 from .serializers import (
+    AnnouncementSerializer,
+    BroadcastSerializer,
     ConversationListSerializer,
     ConversationDetailSerializer,
     CreateConversationSerializer,
+    ConversationPreferencesSerializer,
+    MessageSearchResultSerializer,
     MessageSerializer,
     SendMessageSerializer
 )
+from .wakeups import Waiter, wake_on_commit
 
 
-class ConversationViewSet(viewsets.ModelViewSet):
+class ConversationViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing conversations
     """
     permission_classes = [IsAuthenticated]
     queryset = Conversation.objects.all()
+    sparse_prefetches = {'participants': ['participants']}
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -30,7 +70,34 @@ class ConversationViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Get only conversations where the user is a participant"""
         user = self.request.user
-        return Conversation.objects.filter(participants=user).distinct()
+        if self.action == 'list':
+            return self.trim_queryset(self.get_inbox_queryset(user))
+        return self.trim_queryset(Conversation.objects.filter(memberships__user=user))
+
+    def get_inbox_queryset(self, user):
+        """
+        The user's conversations, most recently active first, read through
+        the (user, archived, -last_activity_at) index
+        Optional filters: ?archived=true (archived instead of active),
+        ?muted=true|false, ?pinned=true|false
+        """
+        params = self.request.query_params
+        # One filter() call so every condition and the ordering share a join
+        conditions = {
+            'memberships__user': user,
+            'memberships__archived': params.get('archived') == 'true',
+        }
+        for flag in ('muted', 'pinned'):
+            if params.get(flag) in ('true', 'false'):
+                conditions[f'memberships__{flag}'] = params[flag] == 'true'
+
+        return Conversation.objects.filter(**conditions).annotate(
+            last_activity_at=F('memberships__last_activity_at'),
+            last_read_at=F('memberships__last_read_at'),
+            muted=F('memberships__muted'),
+            archived=F('memberships__archived'),
+            pinned=F('memberships__pinned'),
+        ).order_by('-last_activity_at', '-pk')
 
     def retrieve(self, request, *args, **kwargs):
         """Get conversation details and mark messages as read"""
@@ -42,31 +109,50 @@ class ConversationViewSet(viewsets.ModelViewSet):
         ).exclude(
             sender=request.user
         ).update(is_read=True)
+        ConversationParticipant.objects.filter(
+            conversation=conversation, user=request.user
+        ).update(last_read_at=timezone.now())
 
         serializer = self.get_serializer(conversation)
         return Response(serializer.data)
 
     @action(detail=True, methods=['post'])
     def send_message(self, request, pk=None):
-        """Send a message in a conversation"""
-        conversation = self.get_object()
+        """
+        Send a message in a conversation
 
-        # Check if user is a participant
-        if request.user not in conversation.participants.all():
-            return Response(
-                {'detail': 'You are not a participant in this conversation.'},
-                status=status.HTTP_403_FORBIDDEN
-            )
+        Hot path: membership comes from the participants cache instead of
+        get_object(), so a send is one INSERT for the message, one for the
+        notifications and UPDATEs of the conversation's updated_at and the
+        participants' last_activity_at.
+        """
+        try:
+            conversation_id = int(pk)
+        except (TypeError, ValueError):
+            raise NotFound()
 
+        # Non-participants get the same 404 get_object() would return
+        participant_ids, muted_ids = get_participants(conversation_id)
+        if request.user.pk not in participant_ids:
+            raise NotFound()
+
+        record_heartbeat(request.user.pk)
         serializer = SendMessageSerializer(
             data=request.data,
-            context={'conversation_id': conversation.id, 'request': request}
+            context={'conversation_id': conversation_id, 'request': request}
         )
         serializer.is_valid(raise_exception=True)
-        message = serializer.save()
+        with transaction.atomic():
+            message = serializer.save()
+            notify_message(message, participant_ids - muted_ids)
 
-        # Update conversation's updated_at timestamp
-        conversation.save()
+            # Update conversation's updated_at timestamp and move it to the top of every inbox
+            Conversation.objects.filter(pk=conversation_id).update(updated_at=message.created_at)
+            ConversationParticipant.objects.filter(
+                conversation_id=conversation_id
+            ).update(last_activity_at=message.created_at)
+            wake_on_commit(conversation_id)
+        set_typing(conversation_id, request.user.pk, False)
 
         return Response(
             MessageSerializer(message).data,
@@ -75,7 +161,7 @@ class ConversationViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['get'])
     def messages(self, request, pk=None):
-        """Get all messages in a conversation"""
+        """Get all messages in a conversation, including archived ones"""
         conversation = self.get_object()
 
         # Check if user is a participant
@@ -85,8 +171,71 @@ class ConversationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        messages = conversation.messages.all().order_by('created_at')
-        serializer = MessageSerializer(messages, many=True)
+        messages = message_history(conversation.pk)
+        if wants_stream(request):
+            return streaming_json_response(messages, MessageSerializer)
+
+        serializer = MessageSerializer(list(messages), many=True)
+        return Response(serializer.data)
+
+    def get_participant_ids_or_404(self, pk):
+        """Participants of a conversation from the participants cache; 404 for non-participants"""
+        try:
+            participant_ids = get_participant_ids(int(pk))
+        except (TypeError, ValueError):
+            raise NotFound()
+        if self.request.user.pk not in participant_ids:
+            raise NotFound()
+        return participant_ids
+
+    @action(detail=True, methods=['get'])
+    def presence(self, request, pk=None):
+        """
+        Who of the participants is online, when they were last seen and who
+        is typing. Reads no database rows once participants are cached.
+        """
+        participant_ids = self.get_participant_ids_or_404(pk)
+        record_heartbeat(request.user.pk)
+        return Response(conversation_presence(int(pk), participant_ids))
+
+    @action(detail=True, methods=['post'])
+    def typing(self, request, pk=None):
+        """
+        Show or clear the current user's typing indicator
+        Accepts: { "typing": bool } (default true); indicators expire unless renewed
+        """
+        self.get_participant_ids_or_404(pk)
+        try:
+            typing = serializers.BooleanField().to_internal_value(request.data.get('typing', True))
+        except ValidationError as exc:
+            raise ValidationError({'typing': exc.detail})
+        record_heartbeat(request.user.pk)
+        set_typing(int(pk), request.user.pk, typing)
+        return Response({'typing': typing})
+
+    @action(detail=False, methods=['post'])
+    def heartbeat(self, request):
+        """Mark the current user as online"""
+        record_heartbeat(request.user.pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=['get', 'patch'])
+    def preferences(self, request, pk=None):
+        """
+        Get or update the current user's settings for a conversation
+        Accepts any of: { "muted": bool, "archived": bool, "pinned": bool }
+        """
+        try:
+            membership = ConversationParticipant.objects.get(conversation_id=pk, user=request.user)
+        except (ConversationParticipant.DoesNotExist, ValueError):
+            raise NotFound()
+
+        if request.method == 'GET':
+            return Response(ConversationPreferencesSerializer(membership).data)
+
+        serializer = ConversationPreferencesSerializer(membership, data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
         return Response(serializer.data)
 
     @action(detail=False, methods=['post'])
@@ -103,37 +252,30 @@ class ConversationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Find existing one-on-one conversation
-        conversations = Conversation.objects.filter(
-            participants=request.user,
-            is_group=False
-        ).filter(
-            participants__id=participant_id
-        ).distinct()
-
-        if conversations.exists():
-            conversation = conversations.first()
-            serializer = ConversationDetailSerializer(conversation)
-            return Response(serializer.data)
-
-        # Create new conversation
-        serializer = CreateConversationSerializer(
-            data={
-                'participant_ids': [participant_id],
-                'is_group': False
-            },
-            context={'request': request}
-        )
-        serializer.is_valid(raise_exception=True)
-        conversation = serializer.save()
+        try:
+            participant_id = int(participant_id)
+        except (TypeError, ValueError):
+            return Response(
+                {'detail': 'participant_id must be a user id'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Single probe on the (user_a, user_b) unique index; creation is race-safe
+        try:
+            conversation, created = Conversation.get_or_create_direct(request.user.pk, participant_id)
+        except User.DoesNotExist:
+            return Response(
+                {'detail': 'User not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
 
         return Response(
             ConversationDetailSerializer(conversation).data,
-            status=status.HTTP_201_CREATED
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
         )
 
 
-class MessageViewSet(viewsets.ReadOnlyModelViewSet):
+class MessageViewSet(SparseFieldsetViewMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for viewing messages (read-only)
     Messages are created through ConversationViewSet.send_message
@@ -145,9 +287,9 @@ class MessageViewSet(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         """Get only messages from conversations where the user is a participant"""
         user = self.request.user
-        return Message.objects.filter(
+        return self.trim_queryset(Message.objects.filter(
             conversation__participants=user
-        ).distinct()
+        ).select_related('sender').distinct())
 
     @action(detail=True, methods=['post'])
     def mark_read(self, request, pk=None):
@@ -155,3 +297,211 @@ class MessageViewSet(viewsets.ReadOnlyModelViewSet):
         message = self.get_object()
         message.mark_as_read()
         return Response({'status': 'message marked as read'})
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Full-text search in the user's conversations, best match first
+        Expects: ?q=<words>; optional ?conversation=<id>&page_size=<n>&cursor=<next cursor>
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response(
+                {'q': 'Enter words to search for.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        conversation_id = request.query_params.get('conversation')
+        if conversation_id and not conversation_id.isdigit():
+            return Response(
+                {'conversation': 'Enter a conversation id.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        after = request.query_params.get('cursor')
+        if after:
+            try:
+                after = decode_cursor(after)
+            except ValueError:
+                raise NotFound('Invalid cursor')
+
+        try:
+            page_size = min(max(int(request.query_params.get('page_size', api_settings.PAGE_SIZE)), 1), 100)
+        except ValueError:
+            page_size = api_settings.PAGE_SIZE
+
+        hits, has_more = search_messages(
+            request.user, query,
+            conversation_id=int(conversation_id) if conversation_id else None,
+            after=after or None, limit=page_size
+        )
+
+        next_link = None
+        if has_more:
+            next_link = replace_query_param(request.build_absolute_uri(), 'cursor', encode_cursor(hits[-1]))
+
+        return Response({
+            'next': next_link,
+            'results': MessageSearchResultSerializer(hits, many=True).data
+        })
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def export(self, request):
+        """
+        Stream messages as CSV or JSONL (staff only)
+        Optional filters: ?conversation=<id>&since=<ISO datetime>
+        """
+        export_format = get_export_format(request)
+
+        conversation_id = request.query_params.get('conversation')
+        if conversation_id and not conversation_id.isdigit():
+            return Response(
+                {'conversation': 'Enter a conversation id.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        since = request.query_params.get('since')
+        if since:
+            try:
+                since = parse_datetime(since)
+            except ValueError:
+                since = None
+            if since is None:
+                return Response(
+                    {'since': 'Enter a valid ISO 8601 datetime.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+
+        columns, rows = export_messages(conversation_id=conversation_id, since=since)
+        return export_response(columns, rows, export_format, 'messages')
+
+
+class AnnouncementViewSet(viewsets.GenericViewSet):
+    """
+    Faculty announcements to supervised project teams
+    Announcements delivered on write arrive as messages in each team chat;
+    this lists the ones delivered on read.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = AnnouncementSerializer
+
+    def get_queryset(self):
+        return announcements_for(self.request.user)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['last_read_at'] = announcements_last_read_at(self.request.user)
+        return context
+
+    def list(self, request):
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, IsFaculty])
+    def broadcast(self, request):
+        """
+        Post one announcement to the teams of the projects you supervise
+        Expects: { "content": "...", "project_ids": [optional subset], "delivery": "auto|write|read" }
+        """
+        serializer = BroadcastSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        project_ids = serializer.validated_data.get('project_ids')
+
+        teams = supervised_teams(request.user, project_ids)
+        if project_ids is not None and len(teams) != len(set(project_ids)):
+            return Response(
+                {'project_ids': 'You can only broadcast to teams of projects you supervise.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not teams:
+            return Response(
+                {'detail': 'None of your supervised projects has a team.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        delivery, recipient_count, result = broadcast(
+            request.user, teams, serializer.validated_data['content'], serializer.validated_data['delivery']
+        )
+        response = {'delivery': delivery, 'team_count': len(teams), 'recipient_count': recipient_count}
+        if delivery == 'read':
+            response['announcement'] = AnnouncementSerializer(result, context={'request': request}).data
+        else:
+            response['message_ids'] = [message.pk for message in result]
+        return Response(response, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        return Response({'unread_count': unread_announcement_count(request.user)})
+
+    @action(detail=False, methods=['post'])
+    def mark_all_read(self, request):
+        mark_announcements_read(request.user)
+        return Response({'status': 'announcements marked as read'})
+
+
+def json_response(data, status=200):
+    return HttpResponse(dumps(data), status=status, content_type='application/json')
+
+
+def new_messages(conversation_id, after, limit):
+    messages = Message.objects.filter(
+        conversation_id=conversation_id, pk__gt=after
+    ).select_related('sender').order_by('pk')[:limit]
+    return MessageSerializer(messages, many=True).data
+
+
+@require_GET
+async def wait_for_messages(request, pk):
+    """
+    Long-poll for new messages in a conversation
+    Expects: ?after=<last seen message id>; optional ?timeout=<seconds>
+    Returns the newer messages as soon as there are any, or [] once the
+    timeout elapses. A plain async view (DRF views are synchronous), so under
+    ASGI a waiting client doesn't hold a worker thread. Under WSGI it never
+    waits and behaves like a plain poll.
+    """
+    try:
+        auth = await sync_to_async(CachedJWTAuthentication().authenticate)(request)
+    except APIException as exc:
+        return json_response({'detail': exc.detail}, status=exc.status_code)
+    if auth is None:
+        return json_response({'detail': 'Authentication credentials were not provided.'}, status=401)
+    user = auth[0]
+
+    try:
+        after = int(request.GET['after'])
+    except (KeyError, ValueError):
+        return json_response({'after': 'Enter the id of the last message you have.'}, status=400)
+
+    max_timeout = getattr(settings, 'MESSAGING_LONG_POLL_TIMEOUT', 25)
+    try:
+        timeout = float(request.GET.get('timeout', max_timeout))
+    except ValueError:
+        timeout = max_timeout
+    if not math.isfinite(timeout):
+        return json_response({'timeout': 'Enter a number of seconds.'}, status=400)
+    timeout = min(max(timeout, 0), max_timeout)
+    if not isinstance(request, ASGIRequest):
+        # Under WSGI a parked request would hold a worker; answer right away
+        timeout = 0
+
+    if user.pk not in await sync_to_async(get_participant_ids)(pk):
+        return json_response({'detail': 'Not found.'}, status=404)
+    await sync_to_async(record_heartbeat)(user.pk)
+
+    recheck = getattr(settings, 'MESSAGING_LONG_POLL_RECHECK_INTERVAL', 5)
+    limit = getattr(settings, 'MESSAGING_LONG_POLL_MAX_MESSAGES', 100)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+
+    # Register before the first check so a message sent in between still wakes us
+    with Waiter(pk) as waiter:
+        while True:
+            messages = await sync_to_async(new_messages)(pk, after, limit)
+            remaining = deadline - loop.time()
+            if messages or remaining <= 0:
+                return json_response(messages)
+            await waiter.wait(min(remaining, recheck))
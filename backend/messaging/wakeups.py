@@ -0,0 +1,80 @@
+"""
+In-process wakeups for long-polling clients
+
+Requests waiting for new messages (see views.wait_for_messages) register an
+asyncio event per conversation. Code that writes messages calls
+wake_on_commit(), which sets those events from whatever thread the write
+ran in once the transaction commits.
+
+Wakeups only reach waiters in the same process. Waiters therefore also
+re-check the database every MESSAGING_LONG_POLL_RECHECK_INTERVAL seconds, so
+messages written by other worker processes are delivered with at most that
+delay.
+"""
+import asyncio
+import threading
+
+from django.db import transaction
+
+_lock = threading.Lock()
+_waiters = {}
+
+
+class Waiter:
+    """An asyncio event for one conversation, bound to the waiting request's loop"""
+
+    def __init__(self, conversation_id):
+        self.conversation_id = conversation_id
+        self.loop = asyncio.get_running_loop()
+        self.event = asyncio.Event()
+
+    def __enter__(self):
+        with _lock:
+            _waiters.setdefault(self.conversation_id, set()).add(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        with _lock:
+            waiters = _waiters.get(self.conversation_id)
+            if waiters is not None:
+                waiters.discard(self)
+                if not waiters:
+                    del _waiters[self.conversation_id]
+
+    async def wait(self, timeout):
+        """Wait up to ``timeout`` seconds; return whether a wakeup arrived"""
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self.event.clear()
+        return True
+
+    def wake(self):
+        try:
+            self.loop.call_soon_threadsafe(self.event.set)
+        except RuntimeError:
+            # The request's event loop has already closed
+            pass
+
+
+def wake(*conversation_ids):
+    """Wake every request in this process waiting on the given conversations"""
+    with _lock:
+        waiters = [
+            waiter
+            for conversation_id in conversation_ids
+            for waiter in _waiters.get(conversation_id, ())
+        ]
+    for waiter in waiters:
+        waiter.wake()
+
+
+def wake_on_commit(*conversation_ids):
+    if conversation_ids:
+        transaction.on_commit(lambda: wake(*conversation_ids))
+
+
+def waiter_count():
+    with _lock:
+        return sum(len(waiters) for waiters in _waiters.values())
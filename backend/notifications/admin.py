@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import Notification
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ['id', 'recipient', 'kind', 'title', 'is_read', 'created_at', 'delivered_at']
+    list_filter = ['kind', 'is_read', 'created_at']
+    search_fields = ['title', 'recipient__name', 'recipient__email']
+    readonly_fields = ['created_at', 'delivered_at']
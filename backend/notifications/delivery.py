@@ -0,0 +1,85 @@
+"""
+Email delivery for queued notifications
+
+A worker claims pending notifications in batches and sends one email per
+recipient. Notifications for a recipient are held until the oldest one is
+NOTIFICATION_DIGEST_WINDOW seconds old, and everything pending for that
+recipient is then sent together as a digest.
+"""
+import logging
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import send_mass_mail
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+
+def claim_batch(batch_size):
+    """Mark pending notifications for up to batch_size recipients as delivered and return them"""
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=getattr(settings, 'NOTIFICATION_DIGEST_WINDOW', 300))
+    pending = Notification.objects.filter(delivered_at__isnull=True)
+
+    with transaction.atomic():
+        recipient_ids = list(
+            pending.filter(created_at__lte=cutoff)
+            .order_by('recipient_id')
+            .values_list('recipient_id', flat=True)
+            .distinct()[:batch_size]
+        )
+        if not recipient_ids:
+            return []
+
+        rows = pending.filter(recipient_id__in=recipient_ids)
+        if connection.features.has_select_for_update_skip_locked:
+            rows = rows.select_for_update(skip_locked=True, of=('self',))
+
+        batch = list(rows.select_related('recipient').order_by('recipient_id', 'created_at'))
+        Notification.objects.filter(pk__in=[n.pk for n in batch]).update(delivered_at=now)
+
+    return batch
+
+
+def build_email(recipient, notifications):
+    if len(notifications) == 1:
+        notification = notifications[0]
+        subject = notification.title
+        body = notification.body or notification.title
+    else:
+        subject = f'You have {len(notifications)} new notifications'
+        body = '\n'.join(f'- {notification.title}' for notification in notifications)
+
+    return (
+        subject,
+        f'Hello {recipient.name},\n\n{body}\n',
+        settings.DEFAULT_FROM_EMAIL,
+        [recipient.email],
+    )
+
+
+def deliver_pending(batch_size=None):
+    """Send one batch of notification emails and return the number of emails sent"""
+    batch_size = batch_size or getattr(settings, 'NOTIFICATION_BATCH_SIZE', 200)
+    batch = claim_batch(batch_size)
+    if not batch:
+        return 0
+
+    emails = [
+        build_email(recipient, list(notifications))
+        for recipient, notifications in groupby(batch, key=lambda n: n.recipient)
+    ]
+
+    try:
+        send_mass_mail(emails)
+    except Exception:
+        logger.exception('Failed to send notification emails')
+        Notification.objects.filter(pk__in=[n.pk for n in batch]).update(delivered_at=None)
+        raise
+
+    return len(emails)
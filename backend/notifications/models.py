@@ -0,0 +1,43 @@
+from django.db import models
+from users.models import User
+
+
+class Notification(models.Model):
+    """
+    A notification shown in a user's feed.
+
+    Rows are written in the same transaction as the event that caused them
+    and double as the email outbox: rows with no delivered_at are picked up
+    by the deliver_notifications worker.
+    """
+    KIND_CHOICES = (
+        ('join_request', 'Join Request'),
+        ('join_request_response', 'Join Request Response'),
+        ('feedback', 'Feedback'),
+        ('message', 'Message'),
+    )
+
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    title = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    data = models.JSONField(default=dict, blank=True)  # Ids of related objects for the client
+    is_read = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Notification'
+        verbose_name_plural = 'Notifications'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['recipient', 'is_read', '-created_at']),
+            models.Index(fields=['delivered_at', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.recipient.name}: {self.title}"
+
+    def mark_as_read(self):
+        self.is_read = True
+        self.save(update_fields=['is_read'])
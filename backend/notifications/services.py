@@ -0,0 +1,75 @@
+"""
+Helpers that queue notifications for domain events
+
+Call these inside the transaction that writes the event so the notification
+rows (the outbox) commit or roll back together with it.
+"""
+from .models import Notification
+
+
+def notify(recipient_ids, kind, title, body='', data=None):
+    """Queue one notification per recipient with a single INSERT"""
+    return Notification.objects.bulk_create([
+        Notification(recipient_id=recipient_id, kind=kind, title=title, body=body, data=data or {})
+        for recipient_id in set(recipient_ids)
+    ])
+
+
+def notify_join_request(join_request):
+    project = join_request.project
+    return notify(
+        [project.owner_id],
+        'join_request',
+        f'{join_request.student.user.name} wants to join {project.title}',
+        join_request.message,
+        {'project_id': project.id, 'join_request_id': join_request.id}
+    )
+
+
+def notify_join_request_response(join_request):
+    project = join_request.project
+    return notify(
+        [join_request.student_id],
+        'join_request_response',
+        f'Your request to join {project.title} was {join_request.status}',
+        join_request.response_message,
+        {'project_id': project.id, 'join_request_id': join_request.id}
+    )
+
+
+def notify_feedback(feedback):
+    from teams.models import Team
+
+    project = feedback.project
+    # Student primary keys are their user ids
+    member_ids = Team.members.through.objects.filter(
+        team__project=project
+    ).values_list('student_id', flat=True)
+
+    return notify(
+        [project.owner_id, *member_ids],
+        'feedback',
+        f'New feedback on {project.title}',
+        feedback.comments,
+        {'project_id': project.id, 'feedback_id': feedback.id}
+    )
+
+
+def notify_message(message, participant_ids=None):
+    """
+    Notify the other participants of a conversation who haven't muted it.
+    Pass ``participant_ids`` when they are already known (see
+    messaging.membership.get_notified_ids) to skip the lookup.
+    """
+    if participant_ids is None:
+        from messaging.membership import get_notified_ids
+
+        participant_ids = get_notified_ids(message.conversation_id)
+
+    return notify(
+        [user_id for user_id in participant_ids if user_id != message.sender_id],
+        'message',
+        f'New message from {message.sender.name}',
+        message.content[:200],
+        {'conversation_id': message.conversation_id, 'message_id': message.id}
+    )
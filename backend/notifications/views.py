@@ -0,0 +1,53 @@
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from django.db.models import Count
+
+from .models import Notification
+from .serializers import NotificationSerializer
+
+
+class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    The current user's notification feed
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = NotificationSerializer
+    queryset = Notification.objects.all()
+
+    def get_queryset(self):
+        queryset = Notification.objects.filter(recipient=self.request.user)
+
+        if self.request.query_params.get('unread') == 'true':
+            queryset = queryset.filter(is_read=False)
+
+        kind = self.request.query_params.get('kind')
+        if kind:
+            queryset = queryset.filter(kind=kind)
+
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        """Unread notification count, in total and per kind"""
+        counts = dict(
+            Notification.objects.filter(recipient=request.user, is_read=False)
+            .order_by()
+            .values_list('kind')
+            .annotate(count=Count('id'))
+        )
+        return Response({'unread_count': sum(counts.values()), 'by_kind': counts})
+
+    @action(detail=True, methods=['post'])
+    def mark_read(self, request, pk=None):
+        notification = self.get_object()
+        notification.mark_as_read()
+        return Response({'status': 'notification marked as read'})
+
+    @action(detail=False, methods=['post'])
+    def mark_all_read(self, request):
+        updated = Notification.objects.filter(
+            recipient=request.user, is_read=False
+        ).update(is_read=True)
+        return Response({'status': 'notifications marked as read', 'count': updated})
@@ -0,0 +1,91 @@
+"""
+Staff data exports for the Projects app
+
+Each export returns ``(columns, rows)`` where rows is a generator of flat
+dicts, read in constant memory through config.streaming.iterate_queryset.
+"""
+from django.db.models import Count, Min, Q
+
+from config.streaming import iterate_queryset
+from .models import JoinRequest, Project
+
+PROJECT_COLUMNS = [
+    'id', 'title', 'category', 'status', 'posted_date', 'start_date',
+    'owner_student_id', 'owner_name', 'owner_email', 'supervisor_name',
+    'max_team_size', 'team_size', 'team_members',
+    'milestones', 'milestones_completed', 'next_milestone_due',
+    'required_skills', 'tags',
+]
+
+JOIN_REQUEST_COLUMNS = [
+    'id', 'project_id', 'project_title', 'student_id', 'student_name', 'student_email',
+    'status', 'request_date', 'response_date', 'message', 'response_message',
+]
+
+
+def isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def export_projects(status=None, chunk_size=None):
+    """Projects with team and milestone summaries"""
+    queryset = Project.objects.select_related(
+        'owner__user', 'supervisor__user', 'team'
+    ).prefetch_related('team__members__user').annotate(
+        milestone_count=Count('milestones'),
+        milestones_completed=Count('milestones', filter=Q(milestones__is_completed=True)),
+        next_milestone_due=Min('milestones__due_date', filter=Q(milestones__is_completed=False)),
+    )
+    if status:
+        queryset = queryset.filter(status=status)
+
+    def rows():
+        for project in iterate_queryset(queryset, chunk_size):
+            team = getattr(project, 'team', None)
+            members = team.members.all() if team is not None else []
+            yield {
+                'id': project.pk,
+                'title': project.title,
+                'category': project.category,
+                'status': project.status,
+                'posted_date': isoformat(project.posted_date),
+                'start_date': isoformat(project.start_date),
+                'owner_student_id': project.owner.student_id,
+                'owner_name': project.owner.user.name,
+                'owner_email': project.owner.user.email,
+                'supervisor_name': project.supervisor.user.name if project.supervisor else None,
+                'max_team_size': project.max_team_size,
+                'team_size': project.member_count,
+                'team_members': '; '.join(member.user.name for member in members),
+                'milestones': project.milestone_count,
+                'milestones_completed': project.milestones_completed,
+                'next_milestone_due': isoformat(project.next_milestone_due),
+                'required_skills': '; '.join(project.required_skills or []),
+                'tags': '; '.join(project.tags or []),
+            }
+
+    return PROJECT_COLUMNS, rows()
+
+
+def export_join_requests(status=None, chunk_size=None):
+    queryset = JoinRequest.objects.select_related('project', 'student__user')
+    if status:
+        queryset = queryset.filter(status=status)
+
+    def rows():
+        for join_request in iterate_queryset(queryset, chunk_size):
+            yield {
+                'id': join_request.pk,
+                'project_id': join_request.project_id,
+                'project_title': join_request.project.title,
+                'student_id': join_request.student.student_id,
+                'student_name': join_request.student.user.name,
+                'student_email': join_request.student.user.email,
+                'status': join_request.status,
+                'request_date': isoformat(join_request.request_date),
+                'response_date': isoformat(join_request.response_date),
+                'message': join_request.message,
+                'response_message': join_request.response_message,
+            }
+
+    return JOIN_REQUEST_COLUMNS, rows()
@@ -0,0 +1,44 @@
+# Generated by Django 6.0 on 2026-10-19 13:37
+
+from django.db import migrations, models
+
+
+def backfill_member_counts(apps, schema_editor):
+    Project = apps.get_model('projects', 'Project')
+    Team = apps.get_model('teams', 'Team')
+
+    counts = {team.project_id: team.members.count() for team in Team.objects.all()}
+    for project in Project.objects.all():
+        project.member_count = counts.get(project.pk, 0)
+        project.is_joinable = (
+            project.status in ('draft', 'in_progress') and
+            project.member_count < project.max_team_size
+        )
+        project.save(update_fields=['member_count', 'is_joinable'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0003_project_objectives_project_requirements_meeting_task'),
+        ('teams', '0002_initial'),
+        ('users', '0002_faculty_faculty_faculty_office_location_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='is_joinable',
+            field=models.BooleanField(default=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['is_joinable', '-posted_date'], name='projects_pr_is_join_e98d4b_idx'),
+        ),
+        migrations.RunPython(backfill_member_counts, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,13 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, When, Value
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from users.models import Student, Faculty
 
 
 class Project(models.Model):
+    OPEN_STATUSES = ('draft', 'in_progress')
+
     STATUS_CHOICES = (
         ('draft', 'Draft'),
         ('in_progress', 'In Progress'),
@@ -43,6 +46,10 @@ class Project(models.Model):
     objectives = models.JSONField(default=list, blank=True)  # Project objectives
     requirements = models.JSONField(default=list, blank=True)  # Project requirements
 
+    # Maintained from team membership (see projects.signals)
+    member_count = models.PositiveIntegerField(default=0, editable=False)
+    is_joinable = models.BooleanField(default=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -53,11 +60,88 @@ class Project(models.Model):
         indexes = [
             models.Index(fields=['status', '-posted_date']),
             models.Index(fields=['category']),
+            models.Index(fields=['is_joinable', '-posted_date']),
         ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_roster = instance.roster_ids()
+        return instance
+
+    def roster_ids(self):
+        """(owner_id, supervisor_id); None when either is deferred"""
+        if not {'owner_id', 'supervisor_id'} <= self.__dict__.keys():
+            return None
+        return self.owner_id, self.supervisor_id
+
+    def roster_changed(self):
+        """Whether the owner or supervisor differ from the stored row, as far as known"""
+        saved = getattr(self, '_saved_roster', None)
+        return saved is None or saved != self.roster_ids()
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if self._state.adding or (update_fields is not None and 'member_count' in update_fields):
+            self.is_joinable = self.compute_is_joinable()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'is_joinable'}
+            refresh = False
+        else:
+            # member_count is maintained by refresh_member_counts; the loaded value
+            # may be stale, so never write it back and derive is_joinable from the row
+            if update_fields is None:
+                update_fields = {
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key and field.name != 'member_count'
+                }
+            kwargs['update_fields'] = set(update_fields)
+            refresh = bool({'status', 'max_team_size'} & kwargs['update_fields'])
+            if refresh:
+                kwargs['update_fields'].add('is_joinable')
+                self.is_joinable = self.is_joinable_expression()
+
+        super().save(*args, **kwargs)
+        if refresh:
+            self.refresh_from_db(fields=['member_count', 'is_joinable'])
+        if update_fields is None or {'owner', 'supervisor'} <= set(update_fields):
+            self._saved_roster = self.roster_ids()
+
+    def compute_is_joinable(self):
+        return self.status in self.OPEN_STATUSES and self.member_count < self.max_team_size
+
+    def is_joinable_expression(self):
+        """is_joinable for this instance's status and max_team_size and the stored member_count"""
+        if self.status not in self.OPEN_STATUSES:
+            return Value(False)
+        return Case(
+            When(member_count__lt=self.max_team_size, then=Value(True)),
+            default=Value(False),
+        )
+
+    def refresh_member_count(self):
+        """Recount team members and update member_count/is_joinable with one UPDATE"""
+        Project.refresh_member_counts([self.pk])
+        self.refresh_from_db(fields=['member_count', 'is_joinable'])
+
+    @classmethod
+    def refresh_member_counts(cls, project_ids):
+        from teams.models import Team
+
+        Membership = Team.members.through
+        for project_id in set(project_ids):
+            count = Membership.objects.filter(team__project_id=project_id).count()
+            cls.objects.filter(pk=project_id).update(
+                member_count=count,
+                is_joinable=Case(
+                    When(status__in=cls.OPEN_STATUSES, max_team_size__gt=count, then=Value(True)),
+                    default=Value(False),
+                )
+            )
+
     def update_details(self, title, description):
         self.title = title
         self.description = description
@@ -79,13 +163,10 @@ class Project(models.Model):
         return getattr(self, 'team', None)
 
     def get_current_team_size(self):
-        team = self.get_team()
-        if team:
-            return team.members.count()
-        return 0
+        return self.member_count
 
     def can_accept_members(self):
-        return self.get_current_team_size() < self.max_team_size
+        return self.member_count < self.max_team_size
 
 
 class Milestone(models.Model):
@@ -151,23 +232,31 @@ class JoinRequest(models.Model):
         if self.status != 'pending':
             raise ValidationError('Only pending requests can be approved.')
 
-        team = self.project.get_team()
-        if not team:
-            team = Team.objects.create(
-                project=self.project,
-                max_members=self.project.max_team_size
-            )
-
-        if not self.project.can_accept_members():
-            raise ValidationError('Team is already full.')
+        with transaction.atomic():
+            team = self.project.get_team()
+            if not team:
+                team = Team.objects.create(
+                    project=self.project,
+                    max_members=self.project.max_team_size
+                )
+
+            # The loaded member_count may be stale: take the slot with a conditional
+            # UPDATE, which concurrent approvals of the same project run one at a time
+            reserved = Project.objects.filter(
+                pk=self.project_id, member_count__lt=F('max_team_size')
+            ).update(member_count=F('member_count') + 1)
+            if not reserved:
+                raise ValidationError('Team is already full.')
+
+            success = team.add_member(self.student)
+            if not success:
+                Project.refresh_member_counts([self.project_id])
+                return False
 
-        success = team.add_member(self.student)
-        if success:
             self.status = 'approved'
             self.response_date = timezone.now()
             self.save()
             return True
-        return False
 
     def reject(self):
         if self.status != 'pending':
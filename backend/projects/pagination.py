@@ -0,0 +1,218 @@
+"""
+Pagination classes for the Projects app
+
+Project browsing defaults to page-number pagination. Clients that scroll
+deep into the list can opt in to keyset (cursor) pagination with
+``?pagination=cursor``, which seeks on ``(posted_date, id)`` instead of
+scanning an OFFSET. Both modes accept ``?count=true|false|approximate`` to
+control how (and whether) the total row count is computed.
+"""
+import base64
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+COUNT_MODES = ('true', 'false', 'approximate')
+
+
+def get_count_mode(request, default):
+    mode = request.query_params.get('count', default)
+    return mode if mode in COUNT_MODES else default
+
+
+def approximate_count(queryset):
+    """
+    Return the row count for a queryset, cached for a short period.
+
+    The count is keyed by the SQL of the filtered query, so every distinct
+    filter combination is counted at most once per timeout window.
+    """
+    queryset = queryset.order_by()
+    sql = str(queryset.query)
+    key = 'project_count:' + hashlib.md5(sql.encode('utf-8')).hexdigest()
+    timeout = getattr(settings, 'PROJECT_COUNT_CACHE_TIMEOUT', 60)
+    return cache.get_or_set(key, queryset.count, timeout)
+
+
+class ProjectPagination(PageNumberPagination):
+    """
+    Page-number pagination that can skip or approximate the COUNT(*) query.
+
+    With ``?count=false`` one extra row is fetched to decide whether a next
+    page exists, and ``count`` is returned as null.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_mode = get_count_mode(request, 'true')
+        if self.count_mode == 'true':
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.request = request
+        try:
+            self.page_number = int(request.query_params.get(self.page_query_param, 1))
+        except (TypeError, ValueError):
+            raise NotFound('Invalid page.')
+        if self.page_number < 1:
+            raise NotFound('Invalid page.')
+
+        offset = (self.page_number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.count = approximate_count(queryset) if self.count_mode == 'approximate' else None
+        return rows[:page_size]
+
+    def get_paginated_response(self, data):
+        if self.count_mode == 'true':
+            return super().get_paginated_response(data)
+
+        return Response({
+            'count': self.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data
+        })
+
+    def get_next_link(self):
+        if self.count_mode == 'true':
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param, self.page_number + 1)
+
+    def get_previous_link(self):
+        if self.count_mode == 'true':
+            return super().get_previous_link()
+        if self.page_number <= 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.page_number - 1)
+
+
+class ProjectCursorPagination(BasePagination):
+    """
+    Keyset pagination over ``(-posted_date, -id)``.
+
+    The cursor carries the ``(posted_date, id)`` of the boundary row, so each
+    page is a range seek on the posted_date index rather than an OFFSET scan.
+    The ordering is fixed; ``?ordering=`` is ignored in this mode.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return api_settings.PAGE_SIZE
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            posted_date = parse_datetime(payload['d'])
+            pk = int(payload['i'])
+            reverse = bool(payload.get('r', False))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if posted_date is None:
+            raise NotFound(self.invalid_cursor_message)
+
+        return posted_date, pk, reverse
+
+    def encode_cursor(self, obj, reverse=False):
+        payload = {'d': obj.posted_date.isoformat(), 'i': obj.pk}
+        if reverse:
+            payload['r'] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.count_mode = get_count_mode(request, 'false')
+
+        if self.count_mode == 'true':
+            self.count = queryset.order_by().count()
+        elif self.count_mode == 'approximate':
+            self.count = approximate_count(queryset)
+
+        cursor = self.decode_cursor(request)
+        self.reverse = bool(cursor and cursor[2])
+
+        if cursor:
+            posted_date, pk, _ = cursor
+            if self.reverse:
+                queryset = queryset.filter(
+                    Q(posted_date__gt=posted_date) | Q(posted_date=posted_date, id__gt=pk)
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(posted_date__lt=posted_date) | Q(posted_date=posted_date, id__lt=pk)
+                )
+
+        if self.reverse:
+            queryset = queryset.order_by('posted_date', 'id')
+        else:
+            queryset = queryset.order_by('-posted_date', '-id')
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if self.reverse:
+            rows.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        self.page = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        response_data = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data
+        }
+        if self.count_mode != 'false':
+            response_data = {'count': self.count, **response_data}
+        return Response(response_data)
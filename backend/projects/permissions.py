@@ -1,4 +1,5 @@
 from rest_framework import permissions
+from users.permissions import get_user_type
 
 
 class IsProjectOwnerOrReadOnly(permissions.BasePermission):
@@ -19,11 +20,7 @@ class IsFacultyOrReadOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return request.user and request.user.is_authenticated
 
-        return (
-            request.user and
-            request.user.is_authenticated and
-            request.user.user_type == 'faculty'
-        )
+        return get_user_type(request) == 'faculty'
 
 
 class CanJoinProject(permissions.BasePermission):
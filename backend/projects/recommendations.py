@@ -0,0 +1,290 @@
+"""
+Skill-based matching between students and projects
+
+Students are described by their skills and interests, projects by their
+required skills and tags. Both are stored as sparse term-frequency rows in an
+in-memory index; TF-IDF weights and cosine scores are computed with NumPy at
+query time, so a single ranking over tens of thousands of rows takes a few
+milliseconds.
+
+The index is built lazily from the database and kept current through signal
+handlers (see projects.signals). Updating a row appends the new entries and
+retires the old ones instead of rebuilding the index; retired entries are
+compacted away once they make up half of the index. Each process keeps its
+own index, which is rebuilt after RECOMMENDATION_INDEX_MAX_AGE seconds so
+changes made by other processes are picked up.
+"""
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+
+STUDENT_FIELD_WEIGHTS = {'skills': 1.0, 'interests': 0.5}
+PROJECT_FIELD_WEIGHTS = {'required_skills': 1.0, 'tags': 0.5}
+OPEN_PROJECT_STATUSES = ('draft', 'in_progress')
+
+
+def normalize_term(term):
+    return ' '.join(str(term).lower().split())
+
+
+def extract_terms(obj, field_weights):
+    """Return {term: weight} for the list fields of a student or project"""
+    terms = {}
+    for field, weight in field_weights.items():
+        for term in getattr(obj, field, None) or []:
+            term = normalize_term(term)
+            if term:
+                terms[term] = max(terms.get(term, 0.0), weight)
+    return terms
+
+
+class Vocabulary:
+    """Term to column mapping with document frequencies shared by both corpora"""
+
+    def __init__(self):
+        self.columns = {}
+        self.df = np.zeros(64, dtype=np.float64)
+        self.documents = 0
+
+    def column(self, term):
+        col = self.columns.get(term)
+        if col is None:
+            col = len(self.columns)
+            self.columns[term] = col
+            if col >= len(self.df):
+                self.df = np.concatenate([self.df, np.zeros(len(self.df))])
+        return col
+
+    def add_document(self, terms, sign=1):
+        self.documents += sign
+        for term in terms:
+            col = self.column(term)
+            self.df[col] += sign
+
+    def idf(self):
+        size = len(self.columns)
+        return np.log((1.0 + self.documents) / (1.0 + self.df[:size])) + 1.0
+
+
+class SparseIndex:
+    """Append-only sparse rows (COO layout) keyed by entity id"""
+
+    def __init__(self, vocabulary):
+        self.vocabulary = vocabulary
+        self.entity_rows = {}
+        self.row_entities = []
+        self.row_terms = []
+        self.row_alive = []
+        self.row_eligible = []
+        self.row_groups = []
+        self.rows = np.zeros(0, dtype=np.int64)
+        self.cols = np.zeros(0, dtype=np.int64)
+        self.data = np.zeros(0, dtype=np.float64)
+        self.pending = ([], [], [])
+        self.dead_entries = 0
+        self.dirty = True
+
+    def __len__(self):
+        return len(self.entity_rows)
+
+    def remove(self, entity_id):
+        row = self.entity_rows.pop(entity_id, None)
+        if row is None:
+            return
+        self.vocabulary.add_document(self.row_terms[row], sign=-1)
+        self.dead_entries += len(self.row_terms[row])
+        self.row_alive[row] = False
+        self.row_entities[row] = None
+        self.row_terms[row] = {}
+        self.dirty = True
+
+    def upsert(self, entity_id, terms, eligible=True, group=-1):
+        """
+        Replace the row for an entity. ``eligible`` marks rows that may be
+        returned as results and ``group`` holds an id used for exclusions
+        (the owner of a project).
+        """
+        self.remove(entity_id)
+
+        row = len(self.row_entities)
+        self.entity_rows[entity_id] = row
+        self.row_entities.append(entity_id)
+        self.row_terms.append(terms)
+        self.row_alive.append(True)
+        self.row_eligible.append(eligible)
+        self.row_groups.append(group if group is not None else -1)
+        self.vocabulary.add_document(terms)
+        self.dirty = True
+
+        rows, cols, data = self.pending
+        for term, weight in terms.items():
+            rows.append(row)
+            cols.append(self.vocabulary.column(term))
+            data.append(weight)
+
+    def flush(self):
+        """Merge pending entries and compact retired rows when they dominate"""
+        if not self.dirty:
+            return
+
+        rows, cols, data = self.pending
+        if rows:
+            self.rows = np.concatenate([self.rows, np.array(rows, dtype=np.int64)])
+            self.cols = np.concatenate([self.cols, np.array(cols, dtype=np.int64)])
+            self.data = np.concatenate([self.data, np.array(data, dtype=np.float64)])
+            self.pending = ([], [], [])
+
+        self.alive = np.array(self.row_alive, dtype=bool)
+
+        if self.dead_entries and self.dead_entries * 2 > len(self.data):
+            live = self.alive[self.rows]
+            remap = np.cumsum(self.alive) - 1
+            self.rows = remap[self.rows[live]]
+            self.cols = self.cols[live]
+            self.data = self.data[live]
+            keep = np.flatnonzero(self.alive)
+            self.row_entities = [self.row_entities[i] for i in keep]
+            self.row_terms = [self.row_terms[i] for i in keep]
+            self.row_eligible = [self.row_eligible[i] for i in keep]
+            self.row_groups = [self.row_groups[i] for i in keep]
+            self.row_alive = [True] * len(keep)
+            self.alive = np.ones(len(keep), dtype=bool)
+            self.entity_rows = {entity: row for row, entity in enumerate(self.row_entities)}
+            self.dead_entries = 0
+
+        self.eligible = np.array(self.row_eligible, dtype=bool) & self.alive
+        self.groups = np.array(self.row_groups, dtype=np.int64)
+        self.dirty = False
+
+    def terms_for(self, entity_id):
+        row = self.entity_rows.get(entity_id)
+        return self.row_terms[row] if row is not None else None
+
+    def score(self, query_terms, idf, exclude_entities=(), exclude_group=None):
+        """Cosine similarity of every eligible row against the query terms"""
+        self.flush()
+        n_rows = len(self.row_entities)
+        scores = np.zeros(n_rows, dtype=np.float64)
+        if not n_rows or not query_terms:
+            return scores
+
+        query = np.zeros(len(idf), dtype=np.float64)
+        for term, weight in query_terms.items():
+            col = self.vocabulary.columns.get(term)
+            if col is not None:
+                query[col] = weight * idf[col]
+        query_norm = np.linalg.norm(query)
+        if not query_norm:
+            return scores
+
+        weighted = self.data * idf[self.cols]
+        norms = np.sqrt(np.bincount(self.rows, weights=weighted ** 2, minlength=n_rows))
+        dots = np.bincount(self.rows, weights=weighted * query[self.cols], minlength=n_rows)
+
+        np.divide(dots, norms * query_norm, out=scores, where=norms > 0)
+        scores[~self.eligible] = 0.0
+        if exclude_group is not None:
+            scores[self.groups == exclude_group] = 0.0
+        for entity_id in exclude_entities:
+            row = self.entity_rows.get(entity_id)
+            if row is not None:
+                scores[row] = 0.0
+        return scores
+
+
+def top_k(scores, k):
+    """Indices of the k highest positive scores, best first"""
+    candidates = np.flatnonzero(scores > 0)
+    if len(candidates) > k:
+        candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+class RecommendationIndex:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.vocabulary = Vocabulary()
+        self.students = SparseIndex(self.vocabulary)
+        self.projects = SparseIndex(self.vocabulary)
+        self.built_at = None
+
+    def build(self):
+        from users.models import Student
+        from .models import Project
+
+        with self.lock:
+            self.vocabulary = Vocabulary()
+            self.students = SparseIndex(self.vocabulary)
+            self.projects = SparseIndex(self.vocabulary)
+
+            for student in Student.objects.only('pk', 'skills', 'interests').iterator(chunk_size=2000):
+                self.update_student(student)
+            for project in Project.objects.only(
+                'pk', 'status', 'owner_id', 'required_skills', 'tags'
+            ).iterator(chunk_size=2000):
+                self.update_project(project)
+
+            self.students.flush()
+            self.projects.flush()
+            self.built_at = time.monotonic()
+
+    def ensure_built(self):
+        max_age = getattr(settings, 'RECOMMENDATION_INDEX_MAX_AGE', 600)
+        if self.built_at is None or time.monotonic() - self.built_at > max_age:
+            self.build()
+
+    def update_student(self, student):
+        with self.lock:
+            self.students.upsert(student.pk, extract_terms(student, STUDENT_FIELD_WEIGHTS))
+
+    def update_project(self, project):
+        with self.lock:
+            self.projects.upsert(
+                project.pk,
+                extract_terms(project, PROJECT_FIELD_WEIGHTS),
+                eligible=project.status in OPEN_PROJECT_STATUSES,
+                group=project.owner_id
+            )
+
+    def remove_student(self, student_id):
+        with self.lock:
+            self.students.remove(student_id)
+
+    def remove_project(self, project_id):
+        with self.lock:
+            self.projects.remove(project_id)
+
+    def recommend_projects(self, student, limit=10, exclude=()):
+        """Return [(project_id, score)] of open projects matching a student"""
+        with self.lock:
+            self.ensure_built()
+            terms = self.students.terms_for(student.pk)
+            if terms is None:
+                terms = extract_terms(student, STUDENT_FIELD_WEIGHTS)
+
+            scores = self.projects.score(
+                terms, self.vocabulary.idf(), exclude_entities=exclude, exclude_group=student.pk
+            )
+            return [
+                (self.projects.row_entities[row], float(scores[row]))
+                for row in top_k(scores, limit)
+            ]
+
+    def recommend_students(self, project, limit=10, exclude=()):
+        """Return [(student_id, score)] of students matching a project"""
+        with self.lock:
+            self.ensure_built()
+            terms = extract_terms(project, PROJECT_FIELD_WEIGHTS)
+
+            scores = self.students.score(
+                terms, self.vocabulary.idf(), exclude_entities=set(exclude) | {project.owner_id}
+            )
+            return [
+                (self.students.row_entities[row], float(scores[row]))
+                for row in top_k(scores, limit)
+            ]
+
+
+recommendation_index = RecommendationIndex()
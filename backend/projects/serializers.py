@@ -1,9 +1,10 @@
 from rest_framework import serializers
+from config.fieldsets import PreviewField, SparseFieldsetMixin
 from .models import Project, Milestone, JoinRequest, Feedback, Task, Meeting
 from users.serializers import StudentProfileSerializer, FacultyProfileSerializer
 
 
-class MilestoneSerializer(serializers.ModelSerializer):
+class MilestoneSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Milestone
         fields = [
@@ -19,7 +20,7 @@ class MilestoneSerializer(serializers.ModelSerializer):
         return value
 
 
-class JoinRequestSerializer(serializers.ModelSerializer):
+class JoinRequestSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     student_info = StudentProfileSerializer(source='student', read_only=True)
     project_info = serializers.SerializerMethodField()
 
@@ -62,7 +63,7 @@ class JoinRequestResponseSerializer(serializers.Serializer):
     response_message = serializers.CharField(required=False, allow_blank=True)
 
 
-class FeedbackSerializer(serializers.ModelSerializer):
+class FeedbackSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     faculty_info = FacultyProfileSerializer(source='faculty', read_only=True)
 
     class Meta:
@@ -74,15 +75,16 @@ class FeedbackSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'faculty', 'faculty_info', 'created_at', 'updated_at']
 
 
-class ProjectListSerializer(serializers.ModelSerializer):
+class ProjectListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     owner_name = serializers.CharField(source='owner.user.name', read_only=True)
     current_team_size = serializers.SerializerMethodField()
     supervisor_name = serializers.CharField(source='supervisor.user.name', read_only=True, allow_null=True)
+    description_preview = PreviewField(source='description')
 
     class Meta:
         model = Project
         fields = [
-            'id', 'title', 'description', 'category', 'status', 'posted_date',
+            'id', 'title', 'description', 'description_preview', 'category', 'status', 'posted_date',
             'owner_name', 'current_team_size', 'max_team_size', 'supervisor_name',
             'required_skills', 'tags'
         ]
@@ -91,7 +93,7 @@ class ProjectListSerializer(serializers.ModelSerializer):
         return obj.get_current_team_size()
 
 
-class ProjectDetailSerializer(serializers.ModelSerializer):
+class ProjectDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     owner_info = StudentProfileSerializer(source='owner', read_only=True)
     supervisor_info = FacultyProfileSerializer(source='supervisor', read_only=True)
     milestones = MilestoneSerializer(many=True, read_only=True)
@@ -112,6 +114,7 @@ class ProjectDetailSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'posted_date', 'owner', 'created_at', 'updated_at']
+        sparse_requires = {'available_slots': ['max_team_size']}
 
     def get_current_team_size(self, obj):
         return obj.get_current_team_size()
@@ -186,7 +189,7 @@ class ProjectUpdateSerializer(serializers.ModelSerializer):
         return value
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for Task model"""
     assignee_name = serializers.CharField(source='assignee.user.name', read_only=True, allow_null=True)
     project_title = serializers.CharField(source='project.title', read_only=True)
@@ -201,7 +204,7 @@ class TaskSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class MeetingSerializer(serializers.ModelSerializer):
+class MeetingSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for Meeting model"""
     project_title = serializers.CharField(source='project.title', read_only=True)
     participant_names = serializers.SerializerMethodField()
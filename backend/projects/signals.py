@@ -0,0 +1,58 @@
+"""
+Signal handlers for the Projects app
+"""
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from teams.models import Team
+from users.models import Student
+from .models import Project
+from .recommendations import recommendation_index
+
+
+@receiver(post_save, sender=Student)
+def index_student(sender, instance, **kwargs):
+    if recommendation_index.built_at is not None:
+        recommendation_index.update_student(instance)
+
+
+@receiver(post_delete, sender=Student)
+def unindex_student(sender, instance, **kwargs):
+    if recommendation_index.built_at is not None:
+        recommendation_index.remove_student(instance.pk)
+
+
+@receiver(post_save, sender=Project)
+def index_project(sender, instance, **kwargs):
+    if recommendation_index.built_at is not None:
+        recommendation_index.update_project(instance)
+
+
+@receiver(post_delete, sender=Project)
+def unindex_project(sender, instance, **kwargs):
+    if recommendation_index.built_at is not None:
+        recommendation_index.remove_project(instance.pk)
+
+
+@receiver(m2m_changed, sender=Team.members.through)
+def update_member_count(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+
+    if not reverse:
+        if action != 'pre_clear':
+            Project.refresh_member_counts([instance.project_id])
+    elif action == 'pre_clear':
+        # The student's teams are unknown once the clear has happened
+        instance._cleared_team_projects = list(instance.teams.values_list('project_id', flat=True))
+    elif action == 'post_clear':
+        Project.refresh_member_counts(getattr(instance, '_cleared_team_projects', []))
+    else:
+        Project.refresh_member_counts(
+            Team.objects.filter(pk__in=pk_set).values_list('project_id', flat=True)
+        )
+
+
+@receiver(post_delete, sender=Team)
+def reset_member_count(sender, instance, **kwargs):
+    Project.refresh_member_counts([instance.project_id])
@@ -0,0 +1,201 @@
+import base64
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from teams.models import Team
+from users.models import Faculty, Student, User
+from .models import JoinRequest, Project
+
+
+def create_student(number, **fields):
+    user = User.objects.create_user(
+        email=f'student{number}@std.medipol.edu.tr', password='pass', name=f'Student {number}', user_type='student'
+    )
+    return Student.objects.create(user=user, student_id=f'S{number}', department='CS', year='3', **fields)
+
+
+def create_faculty(number):
+    user = User.objects.create_user(
+        email=f'faculty{number}@medipol.edu.tr', password='pass', name=f'Faculty {number}', user_type='faculty'
+    )
+    return Faculty.objects.create(user=user, faculty_id=f'F{number}', department='CS')
+
+
+class RecommendationPermissionTests(APITestCase):
+    def setUp(self):
+        self.owner = create_student(1, skills=['python'])
+        self.other = create_student(2, skills=['python'])
+        self.faculty = create_faculty(1)
+        self.project = Project.objects.create(
+            title='Hub', description='A project', owner=self.owner, required_skills=['python']
+        )
+        self.url = f'/api/projects/{self.project.pk}/candidates/'
+
+    def test_owner_gets_candidates(self):
+        self.client.force_authenticate(self.owner.user)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_non_owner_student_is_forbidden(self):
+        self.client.force_authenticate(self.other.user)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_unrelated_faculty_is_forbidden(self):
+        self.client.force_authenticate(self.faculty.user)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_recommended_requires_a_student(self):
+        self.client.force_authenticate(self.faculty.user)
+        self.assertEqual(self.client.get('/api/projects/recommended/').status_code, 403)
+
+        self.client.force_authenticate(self.other.user)
+        self.assertEqual(self.client.get('/api/projects/recommended/').status_code, 200)
+
+
+class MemberCountTests(APITestCase):
+    def setUp(self):
+        self.owner = create_student(1)
+        self.students = [create_student(number) for number in range(2, 5)]
+        self.project = Project.objects.create(title='Hub', description='A project', owner=self.owner, max_team_size=3)
+        self.team = Team.objects.create(project=self.project)
+
+    def test_membership_changes_refresh_the_count(self):
+        self.team.members.add(*self.students[:2])
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.member_count, 2)
+        self.assertTrue(self.project.is_joinable)
+
+        self.team.members.add(self.students[2])
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.member_count, 3)
+        self.assertFalse(self.project.is_joinable)
+
+    def test_full_save_of_a_stale_instance_keeps_the_count(self):
+        stale = Project.objects.get(pk=self.project.pk)
+        self.team.members.add(*self.students)
+
+        stale.title = 'Renamed'
+        stale.save()
+
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.title, 'Renamed')
+        self.assertEqual(self.project.member_count, 3)
+        self.assertFalse(self.project.is_joinable)
+        self.assertEqual(stale.member_count, 3)
+
+    def test_status_change_uses_the_stored_count(self):
+        stale = Project.objects.get(pk=self.project.pk)
+        self.team.members.add(self.students[0])
+
+        stale.status = 'cancelled'
+        stale.save(update_fields=['status'])
+        self.project.refresh_from_db()
+        self.assertFalse(self.project.is_joinable)
+
+        stale.status = 'in_progress'
+        stale.save()
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.member_count, 1)
+        self.assertTrue(self.project.is_joinable)
+
+
+class JoinApprovalTests(APITestCase):
+    def setUp(self):
+        self.owner = create_student(1)
+        self.students = [create_student(number) for number in range(2, 5)]
+        self.project = Project.objects.create(title='Hub', description='A project', owner=self.owner, max_team_size=2)
+        Team.objects.create(project=self.project)
+        self.requests = [
+            JoinRequest.objects.create(project=self.project, student=student) for student in self.students
+        ]
+
+    def test_stale_approvals_cannot_overfill_the_team(self):
+        # Every request loaded its project before any approval, as concurrent requests would
+        stale = [JoinRequest.objects.select_related('project').get(pk=request.pk) for request in self.requests]
+        self.assertTrue(stale[0].approve())
+        self.assertTrue(stale[1].approve())
+        with self.assertRaisesMessage(ValidationError, 'Team is already full.'):
+            stale[2].approve()
+
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.member_count, self.project.is_joinable), (2, False))
+        self.assertEqual(self.project.team.members.count(), 2)
+
+    def test_failed_add_releases_the_slot(self):
+        self.project.team.members.add(self.students[0])
+        self.assertFalse(self.requests[0].approve())  # Already a member
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.member_count, 1)
+
+
+class PaginationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        owner = create_student(1)
+        now = timezone.now()
+        # Pairs of projects share a posted_date, so (posted_date, id) breaks the ties
+        self.projects = [
+            Project.objects.create(
+                title=f'Project {number}', description='A project', owner=owner,
+                posted_date=now - timedelta(days=number // 2)
+            )
+            for number in range(7)
+        ]
+        self.expected = [
+            project.pk for project in sorted(self.projects, key=lambda project: (project.posted_date, project.pk), reverse=True)
+        ]
+
+    def ids(self, response):
+        return [project['id'] for project in response.json()['results']]
+
+    def test_cursor_pages_cover_ties_in_order(self):
+        seen = []
+        url = '/api/projects/?pagination=cursor&page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(self.ids(response))
+            url = response.json()['next']
+        self.assertEqual(seen, self.expected)
+
+    def test_cursor_next_and_previous_round_trip(self):
+        first = self.client.get('/api/projects/?pagination=cursor&page_size=3').json()
+        self.assertIsNone(first['previous'])
+        second = self.client.get(first['next']).json()
+        self.assertEqual([project['id'] for project in second['results']], self.expected[3:6])
+
+        back = self.client.get(second['previous']).json()
+        self.assertEqual([project['id'] for project in back['results']], self.expected[:3])
+        self.assertIsNone(back['previous'])
+        forward = self.client.get(back['next']).json()
+        self.assertEqual([project['id'] for project in forward['results']], self.expected[3:6])
+
+    def test_invalid_cursors(self):
+        for cursor in ('garbage', 'e30=', 'WzFd', base64.urlsafe_b64encode(b'{"d": "soon", "i": 1}').decode()):
+            response = self.client.get('/api/projects/', {'pagination': 'cursor', 'cursor': cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+
+    def test_cursor_count_modes(self):
+        response = self.client.get('/api/projects/?pagination=cursor&page_size=2').json()
+        self.assertNotIn('count', response)
+        response = self.client.get('/api/projects/?pagination=cursor&page_size=2&count=true').json()
+        self.assertEqual(response['count'], 7)
+
+    def test_page_number_count_modes(self):
+        self.assertEqual(self.client.get('/api/projects/?page_size=2').json()['count'], 7)
+
+        response = self.client.get('/api/projects/?page_size=2&count=false&page=4').json()
+        self.assertIsNone(response['count'])
+        self.assertIsNone(response['next'])
+        # Page numbers order on posted_date alone, so tied rows may come in either order
+        self.assertCountEqual(self.ids(self.client.get(response['previous'])), self.expected[4:6])
+        self.assertIsNotNone(self.client.get('/api/projects/?page_size=2&count=false&page=3').json()['next'])
+
+        self.assertEqual(self.client.get('/api/projects/?page_size=2&count=approximate').json()['count'], 7)
+        Project.objects.create(title='Late', description='A project', owner=self.projects[0].owner)
+        # Served from the cache until PROJECT_COUNT_CACHE_TIMEOUT expires
+        self.assertEqual(self.client.get('/api/projects/?page_size=2&count=approximate').json()['count'], 7)
+        self.assertEqual(self.client.get('/api/projects/?page_size=2').json()['count'], 8)
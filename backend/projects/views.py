@@ -1,7 +1,8 @@
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from django.db import transaction
 from django.db.models import Q
 
 from .models import Project, Milestone, JoinRequest
@@ -15,25 +16,45 @@ from .permissions import (
     IsProjectOwnerOrReadOnly, IsProjectOwner,
     IsFacultyOrReadOnly, CanManageJoinRequest
 )
+from config.fieldsets import SparseFieldsetViewMixin
+from config.streaming import export_response, get_export_format, streaming_json_response, wants_stream
+from .exporters import export_join_requests, export_projects
+from .pagination import ProjectPagination, ProjectCursorPagination
+from .recommendations import recommendation_index
 from users.permissions import IsStudent
+from notifications.services import (
+    notify_join_request, notify_join_request_response, notify_feedback
+)
+from users.serializers import StudentProfileSerializer
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['title', 'description', 'category', 'tags']
     ordering_fields = ['posted_date', 'title', 'status']
     ordering = ['-posted_date']
+    sparse_prefetches = {'milestones': ['milestones'], 'team_members': ['team__members']}
+
+    @property
+    def paginator(self):
+        """Use keyset pagination when the client opts in with ?pagination=cursor"""
+        if not hasattr(self, '_paginator'):
+            if self.request.query_params.get('pagination') == 'cursor':
+                self._paginator = ProjectCursorPagination()
+            else:
+                self._paginator = ProjectPagination()
+        return self._paginator
 
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
             return []  # No authentication required for viewing
+        elif self.action in ['export', 'recommended', 'candidates']:
+            return super().get_permissions()  # The action's own permission_classes
         else:
             return [IsAuthenticated(), IsProjectOwnerOrReadOnly()]  # Authentication required for create/update/delete
 
     def get_queryset(self):
-        queryset = Project.objects.select_related(
-            'owner__user', 'supervisor__user'
-        ).prefetch_related('milestones', 'team__members')
+        queryset = Project.objects.select_related('owner__user', 'supervisor__user')
 
         category = self.request.query_params.get('category')
         if category:
@@ -43,6 +64,9 @@ class ProjectViewSet(viewsets.ModelViewSet):
         if status_filter:
             queryset = queryset.filter(status=status_filter)
 
+        if self.request.query_params.get('joinable') == 'true':
+            queryset = queryset.filter(is_joinable=True)
+
         skills = self.request.query_params.get('skills')
         if skills:
             skill_list = skills.split(',')
@@ -63,7 +87,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
             except AttributeError:
                 queryset = queryset.none()
 
-        return queryset
+        return self.trim_queryset(queryset)
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -99,7 +123,9 @@ class ProjectViewSet(viewsets.ModelViewSet):
         )
 
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                join_request = serializer.save()
+                notify_join_request(join_request)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -163,7 +189,9 @@ class ProjectViewSet(viewsets.ModelViewSet):
         )
 
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                feedback = serializer.save()
+                notify_feedback(feedback)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -184,6 +212,72 @@ class ProjectViewSet(viewsets.ModelViewSet):
             'milestones': MilestoneSerializer(milestones, many=True).data
         })
 
+    def get_recommendation_limit(self, request):
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            limit = 10
+        return max(1, min(limit, 50))
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsStudent])
+    def recommended(self, request):
+        """Open projects ranked by how well they match the student's skills and interests"""
+        try:
+            student = request.user.student_profile
+        except AttributeError:
+            return Response(
+                {'error': 'Only students can get project recommendations'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        joined = student.teams.values_list('project_id', flat=True)
+        ranked = recommendation_index.recommend_projects(
+            student, limit=self.get_recommendation_limit(request), exclude=set(joined)
+        )
+
+        projects = Project.objects.select_related(
+            'owner__user', 'supervisor__user'
+        ).prefetch_related('team__members').in_bulk([project_id for project_id, _ in ranked])
+
+        results = []
+        for project_id, score in ranked:
+            if project_id in projects:
+                data = ProjectListSerializer(projects[project_id]).data
+                data['match_score'] = round(score, 4)
+                results.append(data)
+        return Response(results)
+
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated, IsProjectOwner])
+    def candidates(self, request, pk=None):
+        """Students ranked by how well they match the project's required skills and tags"""
+        project = self.get_object()
+
+        team = project.get_team()
+        members = team.members.values_list('pk', flat=True) if team else []
+        ranked = recommendation_index.recommend_students(
+            project, limit=self.get_recommendation_limit(request), exclude=set(members)
+        )
+
+        from users.models import Student
+        students = Student.objects.select_related('user').in_bulk(
+            [student_id for student_id, _ in ranked]
+        )
+
+        results = []
+        for student_id, score in ranked:
+            if student_id in students:
+                data = StudentProfileSerializer(students[student_id]).data
+                data['match_score'] = round(score, 4)
+                results.append(data)
+        return Response(results)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def export(self, request):
+        """Stream every project with team and milestone summaries as CSV or JSONL (staff only)"""
+        export_format = get_export_format(request)
+        columns, rows = export_projects(status=request.query_params.get('status'))
+        return export_response(columns, rows, export_format, 'projects')
+
     @action(detail=False, methods=['get'], url_path='my-projects')
     def my_projects(self, request):
         """Get projects owned by the current user"""
@@ -192,15 +286,18 @@ class ProjectViewSet(viewsets.ModelViewSet):
                 student = request.user.student_profile
                 queryset = Project.objects.filter(owner=student).select_related(
                     'owner__user', 'supervisor__user'
-                ).prefetch_related('milestones', 'team__members')
+                )
             elif request.user.user_type == 'faculty':
                 faculty = request.user.faculty_profile
                 queryset = Project.objects.filter(supervisor=faculty).select_related(
                     'owner__user', 'supervisor__user'
-                ).prefetch_related('milestones', 'team__members')
+                )
             else:
                 queryset = Project.objects.none()
 
+            if wants_stream(request):
+                return streaming_json_response(queryset, ProjectListSerializer)
+
             serializer = ProjectListSerializer(queryset, many=True)
             return Response(serializer.data)
         except AttributeError:
@@ -271,6 +368,13 @@ class JoinRequestViewSet(viewsets.ReadOnlyModelViewSet):
 
         return JoinRequest.objects.none()
 
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def export(self, request):
+        """Stream every join request as CSV or JSONL (staff only)"""
+        export_format = get_export_format(request)
+        columns, rows = export_join_requests(status=request.query_params.get('status'))
+        return export_response(columns, rows, export_format, 'join_requests')
+
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated, CanManageJoinRequest])
     def approve(self, request, pk=None):
         join_request = self.get_object()
@@ -279,7 +383,9 @@ class JoinRequestViewSet(viewsets.ReadOnlyModelViewSet):
         if serializer.is_valid():
             try:
                 join_request.response_message = serializer.validated_data.get('response_message', '')
-                join_request.approve()
+                with transaction.atomic():
+                    join_request.approve()
+                    notify_join_request_response(join_request)
                 return Response({
                     'message': 'Join request approved successfully',
                     'request': JoinRequestSerializer(join_request).data
@@ -299,7 +405,9 @@ class JoinRequestViewSet(viewsets.ReadOnlyModelViewSet):
         if serializer.is_valid():
             try:
                 join_request.response_message = serializer.validated_data.get('response_message', '')
-                join_request.reject()
+                with transaction.atomic():
+                    join_request.reject()
+                    notify_join_request_response(join_request)
                 return Response({
                     'message': 'Join request rejected',
                     'request': JoinRequestSerializer(join_request).data
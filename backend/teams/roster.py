@@ -0,0 +1,27 @@
+"""
+Team rosters
+
+A team's roster is the set of user ids that belong to it: the project owner,
+the members and the project's supervisor (Student and Faculty primary keys
+are their user ids). Rosters are read in bulk whenever team chats are
+synchronized (see messaging.team_chats), which also fills each chat's
+participants cache from its roster, so membership checks for team chats
+don't read the participants table.
+"""
+from .models import Team
+
+
+def load_rosters(team_ids):
+    """Read the rosters of several teams from the database"""
+    rosters = {}
+    for team_id, owner_id, supervisor_id in Team.objects.filter(
+        pk__in=team_ids
+    ).values_list('pk', 'project__owner_id', 'project__supervisor_id'):
+        rosters[team_id] = {owner_id} if supervisor_id is None else {owner_id, supervisor_id}
+
+    for team_id, student_id in Team.members.through.objects.filter(
+        team_id__in=rosters
+    ).values_list('team_id', 'student_id'):
+        rosters[team_id].add(student_id)
+
+    return {team_id: frozenset(user_ids) for team_id, user_ids in rosters.items()}
@@ -1,9 +1,10 @@
 from rest_framework import serializers
+from config.fieldsets import SparseFieldsetMixin
 from .models import Team, TeamMembership
 from users.serializers import StudentProfileSerializer
 
 
-class TeamMembershipSerializer(serializers.ModelSerializer):
+class TeamMembershipSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     student_info = StudentProfileSerializer(source='student', read_only=True)
 
     class Meta:
@@ -12,7 +13,7 @@ class TeamMembershipSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'joined_date', 'student_info']
 
 
-class TeamSerializer(serializers.ModelSerializer):
+class TeamSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     members_info = StudentProfileSerializer(source='members', many=True, read_only=True)
     project_title = serializers.CharField(source='project.title', read_only=True)
     current_size = serializers.SerializerMethodField()
@@ -26,6 +27,7 @@ class TeamSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'project', 'created_at', 'updated_at']
+        sparse_requires = {'available_slots': ['max_members']}
 
     def get_current_size(self, obj):
         return obj.get_member_count()
@@ -34,7 +36,7 @@ class TeamSerializer(serializers.ModelSerializer):
         return obj.get_available_slots()
 
 
-class TeamDetailSerializer(serializers.ModelSerializer):
+class TeamDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     members_info = StudentProfileSerializer(source='members', many=True, read_only=True)
     memberships = TeamMembershipSerializer(many=True, read_only=True)
     project_info = serializers.SerializerMethodField()
@@ -49,6 +51,7 @@ class TeamDetailSerializer(serializers.ModelSerializer):
             'memberships', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'project', 'created_at', 'updated_at']
+        sparse_requires = {'is_full': ['max_members']}
 
     def get_project_info(self, obj):
         return {
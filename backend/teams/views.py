@@ -3,15 +3,22 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
+from config.fieldsets import SparseFieldsetViewMixin
+
 from .models import Team
 from .serializers import TeamSerializer, TeamDetailSerializer, AddMemberSerializer
 from users.models import Student
 
 
-class TeamViewSet(viewsets.ModelViewSet):
-    queryset = Team.objects.select_related('project').prefetch_related('members__user').all()
+class TeamViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
+    queryset = Team.objects.select_related('project').all()
     serializer_class = TeamSerializer
     permission_classes = [IsAuthenticated]
+    sparse_prefetches = {
+        'members': ['members'],
+        'members_info': ['members__user'],
+        'memberships': ['memberships__student__user'],
+    }
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -20,18 +27,19 @@ class TeamViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
+        queryset = super().get_queryset()
 
         if user.user_type == 'student':
             try:
                 student = user.student_profile
                 from django.db.models import Q
-                return Team.objects.filter(
+                queryset = queryset.filter(
                     Q(project__owner=student) | Q(members=student)
                 ).distinct()
             except AttributeError:
                 pass
 
-        return super().get_queryset()
+        return self.trim_queryset(queryset)
 
     @action(detail=True, methods=['get'])
     def members(self, request, pk=None):
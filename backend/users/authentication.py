@@ -0,0 +1,150 @@
+"""
+Authentication classes for the Users app
+"""
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+def user_cache_key(user_id, token_id):
+    return f'auth_user:{user_id}:{token_id}'
+
+
+def user_version_key(user_id):
+    return f'auth_user_version:{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    """
+    Drop every cached authentication entry for a user.
+
+    Entries are keyed per token, so instead of deleting them one by one the
+    user's version is bumped and stale entries are ignored until they expire.
+    """
+    cache.set(user_version_key(user_id), uuid.uuid4().hex, None)
+
+
+def seed_user_version(user_id):
+    """Start a new user version unless another request just did; returns the current one"""
+    version = uuid.uuid4().hex
+    if cache.add(user_version_key(user_id), version, None):
+        return version
+    return cache.get(user_version_key(user_id), version)
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of access tokens whose signature has already been verified,
+    keyed by a hash of the raw token and kept until the token's exp claim.
+    Saves decoding and verifying the same JWT on every request.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.lock = threading.Lock()
+        self.tokens = OrderedDict()
+
+    def get(self, raw_token):
+        key = hashlib.sha256(raw_token).digest()
+        with self.lock:
+            entry = self.tokens.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self.tokens[key]
+                return None
+            self.tokens.move_to_end(key)
+            return entry[1]
+
+    def set(self, raw_token, validated_token):
+        expires = validated_token.get('exp')
+        if not expires:
+            return
+        key = hashlib.sha256(raw_token).digest()
+        with self.lock:
+            self.tokens[key] = (expires, validated_token)
+            self.tokens.move_to_end(key)
+            while len(self.tokens) > self.size:
+                self.tokens.popitem(last=False)
+
+
+verified_tokens = VerifiedTokenCache(getattr(settings, 'AUTH_TOKEN_CACHE_SIZE', 10_000))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that resolves the user and its student/faculty profile
+    in a single query and caches the result per token.
+
+    Cached entries live for AUTH_USER_CACHE_TIMEOUT seconds and are invalidated
+    whenever the user or one of its profiles is saved (see users.signals).
+    Use a shared cache backend when running multiple worker processes.
+    Verified tokens are additionally kept in a per-process LRU (verified_tokens).
+    """
+
+    def get_validated_token(self, raw_token):
+        if isinstance(raw_token, str):
+            raw_token = raw_token.encode('utf-8')
+
+        validated_token = verified_tokens.get(raw_token)
+        if validated_token is None:
+            validated_token = super().get_validated_token(raw_token)
+            verified_tokens.set(raw_token, validated_token)
+        return validated_token
+
+    def load_user(self, user_id):
+        return self.user_model.objects.select_related(
+            'student_profile', 'faculty_profile'
+        ).get(**{api_settings.USER_ID_FIELD: user_id})
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        token_id = validated_token.get(api_settings.JTI_CLAIM)
+        user = None
+
+        if token_id:
+            cache_key = user_cache_key(user_id, token_id)
+            version_key = user_version_key(user_id)
+            cached = cache.get_many([cache_key, version_key])
+            version = cached.get(version_key)
+            entry = cached.get(cache_key)
+            if version is None:
+                # Never set or evicted: no cached entry of the user can be trusted
+                version = seed_user_version(user_id)
+            elif entry is not None and entry[0] == version:
+                user = entry[1]
+
+        if user is None:
+            try:
+                user = self.load_user(user_id)
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+            if token_id:
+                timeout = getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 300)
+                cache.set(cache_key, (version, user), timeout)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code='password_changed'
+                )
+
+        return user
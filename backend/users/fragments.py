@@ -0,0 +1,133 @@
+"""
+Cached profile representations
+
+Student and faculty profiles are nested in join requests, teams, team
+memberships and project details, so the same profile is serialized many
+times per response and again on every request. StudentProfileSerializer and
+FacultyProfileSerializer therefore cache their output per user for
+PROFILE_FRAGMENT_CACHE_TIMEOUT seconds, whether they are used on their own or
+nested (many=True reads every fragment of a list with one cache.get_many).
+
+Each fragment is stored with the user's profile version. The version is
+bumped whenever the user or one of its profiles is saved or deleted
+(update_profile, the admin, ...; see users.signals), which makes every cached
+fragment of that user stale at once. A missing version (never set, or
+evicted) is a miss for every fragment of the user and is seeded with a fresh
+one. Responses trimmed with ?fields= or ?omit= are not cached.
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+from rest_framework import serializers
+
+from config.fieldsets import get_request_fieldsets
+
+
+def profile_version_key(user_id):
+    return f'profile_version:{user_id}'
+
+
+def profile_fragment_key(kind, user_id, base_url):
+    # Image URLs are absolute when a request is in the serializer context
+    host = hashlib.md5(base_url.encode('utf-8')).hexdigest()[:12] if base_url else ''
+    return f'profile_fragment:{kind}:{user_id}:{host}'
+
+
+def invalidate_profile_fragments(user_id):
+    """
+    Mark a user's cached profile fragments stale, now and again once the
+    current transaction commits, so a request that read the old rows
+    meanwhile can't keep serving them
+    """
+    key = profile_version_key(user_id)
+    cache.set(key, uuid.uuid4().hex, None)
+    transaction.on_commit(lambda: cache.set(key, uuid.uuid4().hex, None))
+
+
+def seed_profile_version(version_key):
+    """Start a new profile version unless another request just did; returns the current one"""
+    version = uuid.uuid4().hex
+    if cache.add(version_key, version, None):
+        return version
+    return cache.get(version_key, version)
+
+
+def field_tree(serializer):
+    """Readable field names of a serializer and its nested serializers"""
+    tree = {}
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        nested = getattr(field, 'child', field)
+        tree[name] = field_tree(nested) if isinstance(nested, serializers.Serializer) else None
+    return tree
+
+
+def is_cacheable(serializer):
+    """Whether a profile serializer returns the full representation"""
+    include, exclude = get_request_fieldsets(serializer.context.get('request'))
+    if not include and not exclude:
+        return True
+    return field_tree(serializer) == field_tree(type(serializer)())
+
+
+def cached_fragments(serializer, instances):
+    """Representations of ``instances`` by ``serializer``, read from and stored in the cache"""
+    if not is_cacheable(serializer):
+        return [serializer.serialize(instance) for instance in instances]
+
+    request = serializer.context.get('request')
+    base_url = request.build_absolute_uri('/') if request is not None else ''
+    kind = serializer.fragment_kind
+
+    keys = {}
+    for instance in instances:
+        if instance.pk is not None:
+            keys[instance.pk] = (profile_fragment_key(kind, instance.pk, base_url), profile_version_key(instance.pk))
+    cached = cache.get_many([key for pair in keys.values() for key in pair])
+
+    fragments = []
+    missed = {}
+    for instance in instances:
+        if instance.pk is None:
+            fragments.append(serializer.serialize(instance))
+            continue
+        fragment_key, version_key = keys[instance.pk]
+        version = cached.get(version_key)
+        entry = cached.get(fragment_key)
+        if version is None:
+            # Never set or evicted: no cached fragment of the user can be trusted
+            version = seed_profile_version(version_key)
+        elif entry is not None and entry[0] == version:
+            fragments.append(entry[1])
+            continue
+        data = serializer.serialize(instance)
+        missed[fragment_key] = (version, data)
+        fragments.append(data)
+
+    if missed:
+        cache.set_many(missed, getattr(settings, 'PROFILE_FRAGMENT_CACHE_TIMEOUT', 600))
+    return fragments
+
+
+class CachedProfileListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        instances = data.all() if isinstance(data, models.manager.BaseManager) else data
+        return cached_fragments(self.child, list(instances))
+
+
+class CachedProfileMixin:
+    """
+    Profile serializer mixin caching each instance's representation per user.
+    Set ``fragment_kind`` and ``Meta.list_serializer_class = CachedProfileListSerializer``.
+    """
+    fragment_kind = None
+
+    def serialize(self, instance):
+        return super().to_representation(instance)
+
+    def to_representation(self, instance):
+        return cached_fragments(self, [instance])[0]
@@ -0,0 +1,31 @@
+"""
+Password hashers for the Users app
+
+The active hashing profile is chosen with PASSWORD_HASHING_PROFILE and its
+cost with PASSWORD_HASHING_COST (see config/settings.py). Hashes created with
+a different profile or cost are still accepted and are transparently
+re-hashed with the current settings on the next successful login, because
+Django's check_password() upgrades hashes whose parameters are outdated.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher, BCryptSHA256PasswordHasher, PBKDF2PasswordHasher,
+)
+
+HASHING_COST = getattr(settings, 'PASSWORD_HASHING_COST', {})
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    iterations = HASHING_COST.get('pbkdf2_iterations') or PBKDF2PasswordHasher.iterations
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Requires the argon2-cffi package"""
+    time_cost = HASHING_COST.get('argon2_time_cost') or Argon2PasswordHasher.time_cost
+    memory_cost = HASHING_COST.get('argon2_memory_cost') or Argon2PasswordHasher.memory_cost
+    parallelism = HASHING_COST.get('argon2_parallelism') or Argon2PasswordHasher.parallelism
+
+
+class TunedBCryptSHA256PasswordHasher(BCryptSHA256PasswordHasher):
+    """Requires the bcrypt package"""
+    rounds = HASHING_COST.get('bcrypt_rounds') or BCryptSHA256PasswordHasher.rounds
@@ -0,0 +1,175 @@
+"""
+Bulk student import for registrar onboarding
+
+Rows are streamed from a CSV file and processed in chunks: each chunk is
+validated, checked for existing emails/student IDs with one query per field,
+and inserted with bulk_create. Imported accounts get an unusable password and
+an activation email, sent from a background job, instead of a password hash
+computed in the loop.
+"""
+import codecs
+import csv
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import send_mass_mail
+from django.db import transaction
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from jobs.queue import enqueue
+from .models import Student
+from .serializers import StudentImportSerializer
+from .tasks import send_activation_emails as send_activation_emails_task
+
+User = get_user_model()
+
+LIST_FIELDS = ('skills', 'interests')
+
+
+def check_encoding(upload, encoding='utf-8-sig'):
+    """
+    Decode an uploaded file chunk by chunk, raising UnicodeDecodeError for
+    invalid input before any row is imported, then rewind it
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for chunk in upload.chunks():
+        decoder.decode(chunk)
+    decoder.decode(b'', final=True)
+    upload.seek(0)
+
+
+def read_student_csv(file):
+    """Yield (line number, row dict) pairs from a text-mode CSV file"""
+    reader = csv.DictReader(file)
+    for row in reader:
+        row = {key.strip(): (value or '').strip() for key, value in row.items() if key}
+        for field in LIST_FIELDS:
+            if field in row:
+                row[field] = [item.strip() for item in row[field].split(';') if item.strip()]
+        yield reader.line_num, row
+
+
+def import_students(rows, chunk_size=500, send_activation=True):
+    """
+    Import students from an iterable of (line number, row dict) pairs.
+
+    Returns a summary with the number of created accounts and the
+    validation errors for every rejected row.
+    """
+    result = {'created': 0, 'failed': 0, 'errors': []}
+    seen_emails = set()
+    seen_student_ids = set()
+    rows = iter(rows)
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+
+        valid_rows = []
+        for line, row in chunk:
+            serializer = StudentImportSerializer(data=row)
+            if serializer.is_valid():
+                data = dict(serializer.validated_data)
+                data['email'] = User.objects.normalize_email(data['email'])
+                valid_rows.append((line, data))
+            else:
+                result['errors'].append({'row': line, 'errors': serializer.errors})
+
+        existing_emails = set(User.objects.filter(
+            email__in=[data['email'] for _, data in valid_rows]
+        ).values_list('email', flat=True))
+        existing_student_ids = set(Student.objects.filter(
+            student_id__in=[data['student_id'] for _, data in valid_rows]
+        ).values_list('student_id', flat=True))
+
+        accepted = []
+        for line, data in valid_rows:
+            errors = {}
+            if data['email'] in existing_emails or data['email'] in seen_emails:
+                errors['email'] = ['A user with this email already exists.']
+            if data['student_id'] in existing_student_ids or data['student_id'] in seen_student_ids:
+                errors['student_id'] = ['A student with this ID already exists.']
+            if errors:
+                result['errors'].append({'row': line, 'errors': errors})
+                continue
+
+            seen_emails.add(data['email'])
+            seen_student_ids.add(data['student_id'])
+            accepted.append(data)
+
+        with transaction.atomic():
+            users = create_students(accepted)
+            if send_activation and users:
+                # Sent by a background worker once the chunk has committed
+                enqueue(send_activation_emails_task, [user.pk for user in users])
+        result['created'] += len(users)
+
+    result['failed'] = len(result['errors'])
+    return result
+
+
+def create_students(rows):
+    """Insert users and their student profiles for validated rows"""
+    if not rows:
+        return []
+
+    users = []
+    for data in rows:
+        user = User(email=data['email'], name=data['name'], user_type='student')
+        user.set_unusable_password()
+        users.append(user)
+
+    with transaction.atomic():
+        users = User.objects.bulk_create(users)
+
+        # Backends without RETURNING (e.g. MySQL) leave primary keys unset
+        if any(user.pk is None for user in users):
+            ids = dict(User.objects.filter(
+                email__in=[user.email for user in users]
+            ).values_list('email', 'id'))
+            for user in users:
+                user.pk = ids[user.email]
+
+        Student.objects.bulk_create([
+            Student(
+                user=user,
+                student_id=data['student_id'],
+                department=data['department'],
+                faculty=data.get('faculty', ''),
+                year=data['year'],
+                skills=data.get('skills', []),
+                interests=data.get('interests', []),
+            )
+            for user, data in zip(users, rows)
+        ])
+
+    return users
+
+
+def get_activation_link(user):
+    uid = urlsafe_base64_encode(force_bytes(user.pk))
+    token = default_token_generator.make_token(user)
+    return settings.ACCOUNT_ACTIVATION_URL.format(uid=uid, token=token)
+
+
+def send_activation_emails(users):
+    """
+    Send every user a link to set their password, over one mail connection.
+    Mail errors propagate so the background job is retried.
+    """
+    messages = [
+        (
+            'Activate your Medipol Project Hub account',
+            f'Hello {user.name},\n\n'
+            f'An account has been created for you. Set your password here:\n'
+            f'{get_activation_link(user)}\n',
+            settings.DEFAULT_FROM_EMAIL,
+            [user.email],
+        )
+        for user in users
+    ]
+    send_mass_mail(messages)
@@ -0,0 +1,69 @@
+"""
+Deferred last_login tracking
+
+Logins record their timestamp in an in-process buffer instead of writing the
+user row inside the request. A background timer flushes the buffer every
+LAST_LOGIN_FLUSH_INTERVAL seconds with one batched UPDATE.
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_pending = {}
+_lock = threading.Lock()
+_timer = None
+
+
+def record_login(user):
+    """Queue a last_login update for the given user"""
+    global _timer
+
+    now = timezone.now()
+    user.last_login = now
+
+    with _lock:
+        _pending[user.pk] = now
+        if _timer is None:
+            interval = getattr(settings, 'LAST_LOGIN_FLUSH_INTERVAL', 30)
+            _timer = threading.Timer(interval, _flush_in_background)
+            _timer.daemon = True
+            _timer.start()
+
+
+def flush():
+    """Write every queued last_login timestamp to the database"""
+    from .models import User
+
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+
+    if not pending:
+        return 0
+
+    users = [User(pk=user_id, last_login=last_login) for user_id, last_login in pending.items()]
+    User.objects.bulk_update(users, ['last_login'], batch_size=500)
+    return len(users)
+
+
+def _flush_in_background():
+    global _timer
+
+    with _lock:
+        _timer = None
+
+    try:
+        flush()
+    except Exception:
+        logger.exception('Failed to flush last_login updates')
+    finally:
+        close_old_connections()
+
+
+atexit.register(_flush_in_background)
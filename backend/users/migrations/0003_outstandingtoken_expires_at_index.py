@@ -0,0 +1,31 @@
+# Generated by Django 6.0
+
+from django.db import migrations, models
+
+INDEX = models.Index(fields=['expires_at'], name='token_outstanding_expires_idx')
+
+
+def add_index(apps, schema_editor):
+    OutstandingToken = apps.get_model('token_blacklist', 'OutstandingToken')
+    schema_editor.add_index(OutstandingToken, INDEX)
+
+
+def remove_index(apps, schema_editor):
+    OutstandingToken = apps.get_model('token_blacklist', 'OutstandingToken')
+    schema_editor.remove_index(OutstandingToken, INDEX)
+
+
+class Migration(migrations.Migration):
+    """
+    Index OutstandingToken.expires_at for prune_tokens. The model belongs to
+    simplejwt, so the index is created here without changing its state.
+    """
+
+    dependencies = [
+        ('users', '0002_faculty_faculty_faculty_office_location_and_more'),
+        ('token_blacklist', '0013_alter_blacklistedtoken_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_index, remove_index),
+    ]
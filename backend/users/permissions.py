@@ -1,6 +1,22 @@
 from rest_framework import permissions
 
 
+def get_user_type(request):
+    """
+    The user type of the authenticated user, read from the token's user_type
+    claim when present so no user lookup is needed.
+    """
+    token = request.auth
+    if token is not None and hasattr(token, 'get'):
+        user_type = token.get('user_type')
+        if user_type:
+            return user_type
+
+    if request.user and request.user.is_authenticated:
+        return request.user.user_type
+    return None
+
+
 class IsOwnerOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
@@ -11,17 +27,9 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
 
 class IsStudent(permissions.BasePermission):
     def has_permission(self, request, view):
-        return (
-            request.user and
-            request.user.is_authenticated and
-            request.user.user_type == 'student'
-        )
+        return get_user_type(request) == 'student'
 
 
 class IsFaculty(permissions.BasePermission):
     def has_permission(self, request, view):
-        return (
-            request.user and
-            request.user.is_authenticated and
-            request.user.user_type == 'faculty'
-        )
+        return get_user_type(request) == 'faculty'
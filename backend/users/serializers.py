@@ -1,19 +1,26 @@
 from rest_framework import serializers
+from config.fieldsets import SparseFieldsetMixin
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from rest_framework_simplejwt.serializers import (
+    TokenBlacklistSerializer, TokenObtainPairSerializer, TokenRefreshSerializer
+)
 from .models import Student, Faculty
+from .fragments import CachedProfileListSerializer, CachedProfileMixin
+from .tokens import BlacklistedRefreshToken
 
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'email', 'name', 'profile_image', 'user_type', 'date_joined']
         read_only_fields = ['id', 'date_joined']
 
 
-class StudentProfileSerializer(serializers.ModelSerializer):
+class StudentProfileSerializer(CachedProfileMixin, SparseFieldsetMixin, serializers.ModelSerializer):
+    fragment_kind = 'student'
     user = UserSerializer(read_only=True)
     email = serializers.EmailField(write_only=True, required=False)
     name = serializers.CharField(write_only=True, required=False)
@@ -26,6 +33,7 @@ class StudentProfileSerializer(serializers.ModelSerializer):
             'email', 'name', 'profile_image'
         ]
         read_only_fields = ['user']
+        list_serializer_class = CachedProfileListSerializer
 
     def update(self, instance, validated_data):
         user_data = {}
@@ -45,7 +53,8 @@ class StudentProfileSerializer(serializers.ModelSerializer):
         return instance
 
 
-class FacultyProfileSerializer(serializers.ModelSerializer):
+class FacultyProfileSerializer(CachedProfileMixin, SparseFieldsetMixin, serializers.ModelSerializer):
+    fragment_kind = 'faculty'
     user = UserSerializer(read_only=True)
     email = serializers.EmailField(write_only=True, required=False)
     name = serializers.CharField(write_only=True, required=False)
@@ -59,6 +68,7 @@ class FacultyProfileSerializer(serializers.ModelSerializer):
             'email', 'name', 'profile_image'
         ]
         read_only_fields = ['user']
+        list_serializer_class = CachedProfileListSerializer
 
     def update(self, instance, validated_data):
         user_data = {}
@@ -191,3 +201,57 @@ class ChangePasswordSerializer(serializers.Serializer):
         if attrs['new_password'] != attrs['new_password_confirm']:
             raise serializers.ValidationError({"new_password": "Password fields didn't match."})
         return attrs
+
+
+class StudentImportSerializer(serializers.Serializer):
+    """Validates a single row of a bulk student import"""
+    email = serializers.EmailField()
+    name = serializers.CharField()
+    student_id = serializers.CharField(max_length=50)
+    department = serializers.CharField(max_length=255)
+    faculty = serializers.CharField(max_length=255, required=False, allow_blank=True, default='')
+    year = serializers.ChoiceField(choices=Student.YEAR_CHOICES)
+    skills = serializers.ListField(child=serializers.CharField(), required=False, default=list)
+    interests = serializers.ListField(child=serializers.CharField(), required=False, default=list)
+
+
+class StudentImportFileSerializer(serializers.Serializer):
+    file = serializers.FileField()
+
+
+class ActivateAccountSerializer(serializers.Serializer):
+    uid = serializers.CharField(required=True)
+    token = serializers.CharField(required=True)
+    password = serializers.CharField(required=True, validators=[validate_password])
+    password_confirm = serializers.CharField(required=True)
+
+    def validate(self, attrs):
+        from django.contrib.auth.tokens import default_token_generator
+        from django.utils.encoding import force_str
+        from django.utils.http import urlsafe_base64_decode
+
+        if attrs['password'] != attrs['password_confirm']:
+            raise serializers.ValidationError({"password": "Password fields didn't match."})
+
+        try:
+            user = User.objects.get(pk=force_str(urlsafe_base64_decode(attrs['uid'])))
+        except (TypeError, ValueError, OverflowError, User.DoesNotExist):
+            raise serializers.ValidationError({"uid": "Invalid activation link."})
+
+        if not default_token_generator.check_token(user, attrs['token']):
+            raise serializers.ValidationError({"token": "Activation link is invalid or has expired."})
+
+        attrs['user'] = user
+        return attrs
+
+
+class ProfileTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = BlacklistedRefreshToken
+
+
+class CachedTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = BlacklistedRefreshToken
+
+
+class CachedTokenBlacklistSerializer(TokenBlacklistSerializer):
+    token_class = BlacklistedRefreshToken
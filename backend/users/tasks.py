@@ -0,0 +1,22 @@
+"""
+Background tasks for the Users app
+"""
+from django.contrib.auth import get_user_model
+
+from jobs.queue import task
+
+User = get_user_model()
+
+
+@task()
+def send_activation_emails(user_ids):
+    from .importers import send_activation_emails as send_emails
+
+    send_emails(list(User.objects.filter(pk__in=user_ids)))
+
+
+@task()
+def prune_expired_tokens():
+    from .tokens import prune_expired_tokens as prune
+
+    prune()
@@ -0,0 +1,295 @@
+import os
+import smtplib
+import tempfile
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import CachedJWTAuthentication, VerifiedTokenCache, invalidate_cached_user, user_version_key
+from .fragments import profile_fragment_key, profile_version_key
+from .importers import send_activation_emails
+from . import last_login
+from .models import Faculty, Student, User
+from .serializers import FacultyProfileSerializer, StudentProfileSerializer, UserSerializer
+from .tokens import BlacklistedRefreshToken, BlacklistFilter
+
+
+def create_student(name, **fields):
+    user = User.objects.create_user(
+        email=f'{name.lower()}@std.medipol.edu.tr', password='pass', name=name, user_type='student'
+    )
+    fields.setdefault('department', 'CS')
+    return Student.objects.create(user=user, student_id=name.upper(), year='3', **fields)
+
+
+class ProfileFragmentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.student = create_student('Alice')
+        self.client = APIClient()
+        self.client.force_authenticate(self.student.user)
+
+    def serialize(self):
+        return StudentProfileSerializer(Student.objects.get(pk=self.student.pk)).data
+
+    def test_fragment_is_cached_under_the_current_version(self):
+        self.serialize()
+        version = cache.get(profile_version_key(self.student.pk))
+        self.assertIsNotNone(version)
+        entry = cache.get(profile_fragment_key('student', self.student.pk, ''))
+        self.assertEqual(entry[0], version)
+
+    def test_update_profile_serves_fresh_data(self):
+        self.assertEqual(self.client.get('/api/auth/students/me/').json()['department'], 'CS')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch('/api/auth/students/update_profile/', {'department': 'EE'}, format='json')
+        self.assertEqual(response.json()['department'], 'EE')
+        self.assertEqual(self.client.get('/api/auth/students/me/').json()['department'], 'EE')
+
+    def test_evicted_version_does_not_resurrect_stale_fragments(self):
+        self.serialize()
+        Student.objects.filter(pk=self.student.pk).update(department='EE')  # No signal, fragment stays stale
+        self.assertEqual(self.serialize()['department'], 'CS')
+
+        cache.delete(profile_version_key(self.student.pk))
+        self.assertEqual(self.serialize()['department'], 'EE')
+        self.assertIsNotNone(cache.get(profile_version_key(self.student.pk)))
+
+    def test_sparse_fieldsets_bypass_the_cache(self):
+        response = self.client.get('/api/auth/students/me/?fields=student_id')
+        self.assertEqual(response.json(), {'student_id': 'ALICE'})
+        self.assertIsNone(cache.get(profile_fragment_key('student', self.student.pk, 'http://testserver/')))
+
+
+class BlacklistFilterTests(TestCase):
+    def setUp(self):
+        self.user = create_student('Alice').user
+        self.filter = BlacklistFilter()
+        self.filter.sync_interval = 0
+        self.filter.rebuild_interval = 0
+
+    def issue(self):
+        jti = BlacklistedRefreshToken.for_user(self.user)['jti']
+        return jti, OutstandingToken.objects.get(jti=jti)
+
+    def blacklist(self, token, row_id=None):
+        # Created directly, as by another process: nothing tells this filter
+        return BlacklistedToken.objects.create(id=row_id, token=token)
+
+    def test_tokens_blacklisted_elsewhere_are_seen_after_a_sync(self):
+        first, first_token = self.issue()
+        second, second_token = self.issue()
+        self.blacklist(first_token)
+        self.assertTrue(self.filter.is_blacklisted(first))
+        self.assertFalse(self.filter.is_blacklisted(second))
+
+        self.blacklist(second_token)
+        self.assertTrue(self.filter.is_blacklisted(second))
+
+    def test_rows_committed_out_of_id_order_are_not_skipped(self):
+        (_, first_token), (second, second_token), (third, third_token) = self.issue(), self.issue(), self.issue()
+        self.blacklist(first_token, row_id=1)
+        self.filter.rebuild()
+
+        # Row 2 commits after row 3
+        self.blacklist(third_token, row_id=3)
+        self.assertTrue(self.filter.is_blacklisted(third))
+        self.assertEqual(set(self.filter.gaps), {2})
+
+        self.blacklist(second_token, row_id=2)
+        self.assertTrue(self.filter.is_blacklisted(second))
+        self.assertEqual(self.filter.gaps, {})
+
+    def test_gaps_are_forgotten_after_the_window(self):
+        self.issue()
+        _, token = self.issue()
+        self.filter.rebuild()
+        self.blacklist(token, row_id=2)
+        self.filter.sync_window = 0
+        self.filter.sync()
+        self.assertEqual(self.filter.gaps, {})
+
+    def test_periodic_rebuild(self):
+        jti, token = self.issue()
+        self.filter.rebuild()
+        self.filter.last_id = 10  # A row this process would never read incrementally
+        self.blacklist(token, row_id=5)
+        self.filter.rebuild_interval = 300
+        self.assertFalse(self.filter.is_blacklisted(jti))
+
+        self.filter.rebuilt_at -= 300
+        self.assertTrue(self.filter.is_blacklisted(jti))
+
+    def test_logout_rejects_the_refresh_token(self):
+        refresh = str(BlacklistedRefreshToken.for_user(self.user))
+        client = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(client.post('/api/auth/logout/', {'refresh': refresh}).status_code, 200)
+        self.assertEqual(client.post('/api/auth/refresh/', {'refresh': refresh}).status_code, 401)
+
+
+class StudentImportTests(TestCase):
+    # The non-UTF-8 row comes after rows that would be imported in earlier chunks
+    CSV = (
+        'email,name,student_id,department,year\n'
+        'ayse@std.medipol.edu.tr,Ayse,S1,CS,1\n'
+        'can@std.medipol.edu.tr,Can,S2,CS,2\n'
+        'deniz@std.medipol.edu.tr,Deniz \u00c7elik,S3,CS,3\n'
+    ).encode('latin-1')
+
+    def test_command_rejects_non_utf8_files_before_importing(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'students.csv')
+            with open(path, 'wb') as file:
+                file.write(self.CSV)
+            with self.assertRaisesMessage(CommandError, 'not a UTF-8 encoded CSV file'):
+                call_command('import_students', path, '--chunk-size', '1', '--no-activation')
+        self.assertFalse(Student.objects.exists())
+
+    def test_view_rejects_non_utf8_files(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser(email='admin@medipol.edu.tr', password='pass', name='Admin'))
+        upload = SimpleUploadedFile('students.csv', self.CSV, content_type='text/csv')
+        response = client.post('/api/auth/students/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('file', response.json())
+        self.assertFalse(Student.objects.exists())
+
+    def test_activation_mail_errors_propagate(self):
+        user = create_student('Alice').user
+        with override_settings(EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend'):
+            with mock.patch('smtplib.SMTP', side_effect=smtplib.SMTPConnectError(421, 'unavailable')):
+                with self.assertRaises(smtplib.SMTPException):
+                    send_activation_emails([user])
+
+
+class AuthenticationCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.student = create_student('Alice')
+        self.token = AccessToken.for_user(self.student.user)
+        self.authentication = CachedJWTAuthentication()
+
+    def authenticate(self):
+        with CaptureQueriesContext(connection) as queries:
+            user = self.authentication.get_user(self.token)
+        return user, len(queries)
+
+    def test_user_and_profile_are_cached_per_token(self):
+        user, queries = self.authenticate()
+        self.assertEqual(queries, 1)
+        user, queries = self.authenticate()
+        self.assertEqual(queries, 0)
+        self.assertEqual(user.student_profile.department, 'CS')
+
+    def test_update_profile_bumps_the_version(self):
+        self.authenticate()
+        version = cache.get(user_version_key(self.student.pk))
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        response = client.patch('/api/auth/students/update_profile/', {'department': 'EE'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(cache.get(user_version_key(self.student.pk)), version)
+
+        user, queries = self.authenticate()
+        self.assertEqual(queries, 1)
+        self.assertEqual(user.student_profile.department, 'EE')
+
+    def test_evicted_version_is_a_miss(self):
+        cache.clear()  # Cached before the user's version was ever set
+        self.authenticate()
+        User.objects.filter(pk=self.student.pk).update(is_active=False)  # No signal, cache stays stale
+        invalidate_cached_user(self.student.pk)
+        cache.delete(user_version_key(self.student.pk))
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+
+@mock.patch.object(last_login, '_timer', None)
+@mock.patch('users.last_login.threading.Timer')
+class LoginTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        last_login._pending.clear()
+        self.addCleanup(last_login._pending.clear)
+        self.student = create_student('Alice')
+
+    def login(self, email='alice@std.medipol.edu.tr', password='pass'):
+        return APIClient().post('/api/auth/login/', {'email': email, 'password': password}, format='json')
+
+    def test_response_shape(self, timer):
+        response = self.login()
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(set(data), {'refresh', 'access', 'user'})
+        user = self.student.user
+        self.assertEqual(data['user'], {
+            **UserSerializer(user).data,
+            'student_profile': StudentProfileSerializer(self.student).data,
+        })
+        self.assertEqual(self.login('alice@std.medipol.edu.tr', 'wrong').status_code, 401)
+
+    def test_faculty_response_shape(self, timer):
+        user = User.objects.create_user(
+            email='bora@medipol.edu.tr', password='pass', name='Bora', user_type='faculty'
+        )
+        faculty = Faculty.objects.create(user=user, faculty_id='F1', department='CS')
+        data = self.login('bora@medipol.edu.tr').json()
+        self.assertEqual(data['user']['faculty_profile'], FacultyProfileSerializer(faculty).data)
+        self.assertNotIn('student_profile', data['user'])
+
+    def test_last_login_is_written_in_a_batch(self, timer):
+        self.login()
+        self.assertEqual(timer.call_count, 1)
+        self.assertIsNone(User.objects.get(pk=self.student.pk).last_login)
+
+        self.assertEqual(last_login.flush(), 1)
+        self.assertIsNotNone(User.objects.get(pk=self.student.pk).last_login)
+        self.assertEqual(last_login.flush(), 0)
+
+
+class TokenClaimTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.student = create_student('Alice')
+
+    def test_tokens_carry_user_type_and_profile(self):
+        refresh = BlacklistedRefreshToken.for_user(self.student.user)
+        access = AccessToken(str(refresh.access_token))
+        self.assertEqual((access['user_type'], access['profile_id']), ('student', self.student.pk))
+
+        response = APIClient().post('/api/auth/refresh/', {'refresh': str(refresh)}, format='json')
+        refreshed = AccessToken(response.json()['access'])
+        self.assertEqual((refreshed['user_type'], refreshed['profile_id']), ('student', self.student.pk))
+
+    def test_verified_tokens_are_not_decoded_again(self):
+        raw = str(AccessToken.for_user(self.student.user)).encode()
+        authentication = CachedJWTAuthentication()
+        with mock.patch.object(
+            JWTAuthentication, 'get_validated_token', autospec=True, side_effect=JWTAuthentication.get_validated_token
+        ) as verify:
+            first = authentication.get_validated_token(raw)
+            second = authentication.get_validated_token(raw.decode())
+        self.assertEqual(verify.call_count, 1)
+        self.assertEqual(first['jti'], second['jti'])
+
+    def test_verified_token_cache_expiry_and_size(self):
+        tokens = VerifiedTokenCache(size=2)
+        tokens.set(b'expired', {'exp': time.time() - 1})
+        self.assertIsNone(tokens.get(b'expired'))
+
+        for raw in (b'a', b'b', b'c'):
+            tokens.set(raw, {'exp': time.time() + 60, 'raw': raw})
+        self.assertIsNone(tokens.get(b'a'))
+        self.assertEqual(tokens.get(b'c')['raw'], b'c')
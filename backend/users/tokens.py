@@ -0,0 +1,264 @@
+"""
+JWT token classes for the Users app
+
+RefreshToken checks the blacklist on every refresh and logout. BlacklistedRefreshToken
+verifies the signature and expiry first, so expired or forged tokens never
+reach the database. It then checks the blacklist against an in-memory filter:
+
+- an LRU set of jtis known to be blacklisted (blacklisting is permanent, so
+  these answers never go stale);
+- a Bloom filter of every unexpired blacklisted jti. It is kept complete by
+  loading rows with an id above the last one seen, at most once every
+  TOKEN_BLACKLIST_SYNC_INTERVAL seconds. A negative answer needs no further
+  lookup; a positive answer is confirmed with the indexed blacklist query.
+
+Concurrent transactions can commit blacklist rows out of id order, so ids
+skipped by a sync are remembered as gaps and read again by the following
+syncs for TOKEN_BLACKLIST_SYNC_WINDOW seconds. The filter is also rebuilt
+from scratch every TOKEN_BLACKLIST_REBUILD_INTERVAL seconds, which bounds
+how long any row that slipped past both can go unseen.
+
+Tokens blacklisted by this process are added to both at once. A token
+blacklisted by another process is only seen after the next sync, so it may
+still be accepted here for up to TOKEN_BLACKLIST_SYNC_INTERVAL seconds.
+
+Expired tokens are removed by ``python manage.py prune_tokens``, which should
+be scheduled (e.g. daily from cron) since rotation writes rows on every refresh.
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken, Token
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.01):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class BlacklistFilter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.capacity = getattr(settings, 'TOKEN_BLACKLIST_FILTER_CAPACITY', 100_000)
+        self.lru_size = getattr(settings, 'TOKEN_BLACKLIST_LRU_SIZE', 10_000)
+        self.sync_interval = getattr(settings, 'TOKEN_BLACKLIST_SYNC_INTERVAL', 5)
+        self.sync_window = getattr(settings, 'TOKEN_BLACKLIST_SYNC_WINDOW', 60)
+        self.rebuild_interval = getattr(settings, 'TOKEN_BLACKLIST_REBUILD_INTERVAL', 300)
+        self.known = OrderedDict()
+        self.bloom = None
+        self.last_id = 0
+        self.gaps = {}  # Skipped row id -> when it was first missed
+        self.synced_at = None
+        self.rebuilt_at = None
+
+    def remember(self, jti):
+        with self.lock:
+            self.known[jti] = True
+            self.known.move_to_end(jti)
+            while len(self.known) > self.lru_size:
+                self.known.popitem(last=False)
+            if self.bloom is not None:
+                self.bloom.add(jti)
+
+    def reset(self):
+        with self.lock:
+            self.bloom = None
+
+    def rebuild(self):
+        """Reload the filter with every unexpired blacklisted token"""
+        bloom = BloomFilter(self.capacity)
+        last_id = 0
+        rows = BlacklistedToken.objects.filter(
+            token__expires_at__gt=timezone.now()
+        ).values_list('id', 'token__jti').order_by('id')
+        for row_id, jti in rows.iterator(chunk_size=5000):
+            bloom.add(jti)
+            last_id = row_id
+
+        with self.lock:
+            self.bloom = bloom
+            self.last_id = max(last_id, self.last_id)
+            self.gaps = {}
+            self.synced_at = self.rebuilt_at = time.monotonic()
+
+    def sync(self):
+        """Add tokens blacklisted by other processes since the last sync"""
+        now = time.monotonic()
+        if (
+            self.bloom is None
+            or self.bloom.count > self.capacity
+            or (self.rebuild_interval and now - self.rebuilt_at >= self.rebuild_interval)
+        ):
+            self.rebuild()
+            return
+
+        if self.sync_interval and now - self.synced_at < self.sync_interval:
+            return
+
+        # Ids still missing may belong to transactions that haven't committed yet
+        floor = min(self.gaps, default=self.last_id + 1) - 1
+        rows = list(BlacklistedToken.objects.filter(
+            id__gt=floor
+        ).values_list('id', 'token__jti').order_by('id'))
+
+        with self.lock:
+            seen = set()
+            for row_id, jti in rows:
+                seen.add(row_id)
+                if jti not in self.bloom:
+                    self.bloom.add(jti)
+            top = rows[-1][0] if rows else self.last_id
+            for row_id in range(self.last_id + 1, top):
+                if row_id not in seen:
+                    self.gaps[row_id] = now
+            self.gaps = {
+                row_id: missed_at for row_id, missed_at in self.gaps.items()
+                if row_id not in seen and now - missed_at < self.sync_window
+            }
+            self.last_id = max(self.last_id, top)
+            self.synced_at = now
+
+    def is_blacklisted(self, jti):
+        if jti in self.known:
+            return True
+
+        self.sync()
+        if jti not in self.bloom:
+            return False
+
+        if BlacklistedToken.objects.filter(token__jti=jti).exists():
+            self.remember(jti)
+            return True
+        return False
+
+
+blacklist_filter = BlacklistFilter()
+
+
+USER_TYPE_CLAIM = 'user_type'
+PROFILE_ID_CLAIM = 'profile_id'
+
+
+class BlacklistedRefreshToken(RefreshToken):
+    """
+    Refresh token that checks the blacklist through blacklist_filter.
+
+    Tokens carry the user type and student/faculty profile id as claims. They
+    are copied into every access token issued from the refresh token, so
+    permission checks can read them from request.auth.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        profile = getattr(user, f'{user.user_type}_profile', None)
+        token[USER_TYPE_CLAIM] = user.user_type
+        token[PROFILE_ID_CLAIM] = profile.pk if profile is not None else None
+        return token
+
+    def verify(self, *args, **kwargs):
+        # Signature and expiry first: rejected tokens need no blacklist lookup
+        Token.verify(self, *args, **kwargs)
+        self.check_blacklist()
+
+    def check_blacklist(self):
+        if blacklist_filter.is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_('Token is blacklisted'))
+
+
+def prune_expired_tokens(batch_size=None, now=None):
+    """
+    Delete expired outstanding tokens and their blacklist entries in batches
+    of ``batch_size`` rows, each in its own short transaction. Returns the
+    number of outstanding and blacklisted tokens deleted.
+    """
+    batch_size = batch_size or getattr(settings, 'TOKEN_PRUNE_BATCH_SIZE', 5000)
+    now = now or timezone.now()
+    expired = OutstandingToken.objects.filter(expires_at__lte=now).order_by('id')
+
+    outstanding_deleted = blacklisted_deleted = 0
+    while True:
+        ids = list(expired.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+
+        with transaction.atomic():
+            blacklisted_deleted += BlacklistedToken.objects.filter(token_id__in=ids).delete()[0]
+            outstanding_deleted += OutstandingToken.objects.filter(pk__in=ids).delete()[0]
+
+        if len(ids) < batch_size:
+            break
+
+    # Drop the pruned tokens from the filter; it is rebuilt on the next check
+    blacklist_filter.reset()
+    return outstanding_deleted, blacklisted_deleted
+
+
+def table_size(model):
+    """On-disk size in bytes of a model's table, or None when the database can't tell"""
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        try:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SELECT pg_total_relation_size(%s)', [table])
+            elif connection.vendor == 'mysql':
+                cursor.execute(
+                    'SELECT data_length + index_length FROM information_schema.tables '
+                    'WHERE table_schema = DATABASE() AND table_name = %s',
+                    [table]
+                )
+            elif connection.vendor == 'sqlite':
+                cursor.execute('SELECT SUM(pgsize) FROM dbstat WHERE name = %s', [table])
+            else:
+                return None
+        except DatabaseError:
+            # SQLite builds without the dbstat virtual table
+            return None
+        row = cursor.fetchone()
+    return int(row[0]) if row and row[0] is not None else None
+
+
+def token_table_stats(now=None):
+    """Row counts and sizes of the token blacklist tables"""
+    now = now or timezone.now()
+    return [
+        {
+            'table': OutstandingToken._meta.db_table,
+            'rows': OutstandingToken.objects.count(),
+            'expired': OutstandingToken.objects.filter(expires_at__lte=now).count(),
+            'bytes': table_size(OutstandingToken),
+        },
+        {
+            'table': BlacklistedToken._meta.db_table,
+            'rows': BlacklistedToken.objects.count(),
+            'expired': BlacklistedToken.objects.filter(token__expires_at__lte=now).count(),
+            'bytes': table_size(BlacklistedToken),
+        },
+    ]
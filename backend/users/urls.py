@@ -16,7 +16,8 @@ from .views import (
     CurrentUserView,
     StudentProfileViewSet,
     FacultyProfileViewSet,
-    ChangePasswordView
+    ChangePasswordView,
+    ActivateAccountView
 )
 
 router = DefaultRouter()
@@ -34,6 +35,7 @@ urlpatterns = [
     # User profile endpoints
     path('profile/', CurrentUserView.as_view(), name='current-user'),
     path('change-password/', ChangePasswordView.as_view(), name='change-password'),
+    path('activate/', ActivateAccountView.as_view(), name='activate-account'),
 
     # Router endpoints
     path('', include(router.urls)),
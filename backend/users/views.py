@@ -1,55 +1,69 @@
+import io
+
 from rest_framework import generics, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from rest_framework_simplejwt.views import TokenObtainPairView
 
+from config.fieldsets import SparseFieldsetViewMixin
+from config.streaming import StreamingListMixin
+
+from .importers import check_encoding, import_students, read_student_csv
 from .models import Student, Faculty
 from .serializers import (
     UserSerializer, StudentProfileSerializer, FacultyProfileSerializer,
     StudentRegistrationSerializer, FacultyRegistrationSerializer,
-    ChangePasswordSerializer
+    ChangePasswordSerializer, StudentImportFileSerializer, ActivateAccountSerializer
 )
 from .permissions import IsOwnerOrReadOnly, IsStudent, IsFaculty
+from .last_login import record_login
+from .tokens import BlacklistedRefreshToken
 
 User = get_user_model()
 
 
+def serialize_user_with_profile(user):
+    """Serialize a user along with its student or faculty profile"""
+    user_data = UserSerializer(user).data
+
+    if user.user_type == 'student':
+        try:
+            user_data['student_profile'] = StudentProfileSerializer(user.student_profile).data
+        except AttributeError:
+            pass
+    elif user.user_type == 'faculty':
+        try:
+            user_data['faculty_profile'] = FacultyProfileSerializer(user.faculty_profile).data
+        except AttributeError:
+            pass
+
+    return user_data
+
+
 class CustomTokenObtainPairView(TokenObtainPairView):
     """Custom login view that returns user data along with tokens"""
 
     def post(self, request, *args, **kwargs):
-        response = super().post(request, *args, **kwargs)
-
-        if response.status_code == 200:
-            # Get user from email
-            email = request.data.get('email')
-            try:
-                user = User.objects.get(email=email)
-                user_data = UserSerializer(user).data
-
-                # Add profile data
-                if user.user_type == 'student':
-                    try:
-                        student_profile = StudentProfileSerializer(user.student_profile).data
-                        user_data['student_profile'] = student_profile
-                    except AttributeError:
-                        pass
-                elif user.user_type == 'faculty':
-                    try:
-                        faculty_profile = FacultyProfileSerializer(user.faculty_profile).data
-                        user_data['faculty_profile'] = faculty_profile
-                    except AttributeError:
-                        pass
-
-                # Add user data to response
-                response.data['user'] = user_data
-            except User.DoesNotExist:
-                pass
-
-        return response
+        serializer = self.get_serializer(data=request.data)
+
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+
+        # The authenticated user already has its profile loaded by
+        # ProfileModelBackend; last_login is written later in a batch.
+        user = serializer.user
+        record_login(user)
+
+        data = dict(serializer.validated_data)
+        data['user'] = serialize_user_with_profile(user)
+        return Response(data, status=status.HTTP_200_OK)
 
 
 class StudentRegistrationView(generics.CreateAPIView):
@@ -71,7 +85,7 @@ class StudentRegistrationView(generics.CreateAPIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = BlacklistedRefreshToken.for_user(user)
 
         # Get student profile data
         student_profile = StudentProfileSerializer(user.student_profile).data
@@ -105,7 +119,7 @@ class FacultyRegistrationView(generics.CreateAPIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = BlacklistedRefreshToken.for_user(user)
 
         # Get faculty profile data
         faculty_profile = FacultyProfileSerializer(user.faculty_profile).data
@@ -128,27 +142,10 @@ class CurrentUserView(generics.RetrieveAPIView):
         return self.request.user
 
     def retrieve(self, request, *args, **kwargs):
-        user = self.get_object()
-        user_data = UserSerializer(user).data
-
-        # Add profile data based on user type
-        if user.user_type == 'student':
-            try:
-                student_profile = StudentProfileSerializer(user.student_profile).data
-                user_data['student_profile'] = student_profile
-            except AttributeError:
-                pass
-        elif user.user_type == 'faculty':
-            try:
-                faculty_profile = FacultyProfileSerializer(user.faculty_profile).data
-                user_data['faculty_profile'] = faculty_profile
-            except AttributeError:
-                pass
-
-        return Response(user_data)
-
-
-class StudentProfileViewSet(viewsets.ModelViewSet):
+        return Response(serialize_user_with_profile(self.get_object()))
+
+
+class StudentProfileViewSet(StreamingListMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = Student.objects.select_related('user').all()
     serializer_class = StudentProfileSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
@@ -170,7 +167,7 @@ class StudentProfileViewSet(viewsets.ModelViewSet):
             for skill in skill_list:
                 queryset = queryset.filter(skills__contains=skill.strip())
 
-        return queryset
+        return self.trim_queryset(queryset)
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def me(self, request):
@@ -198,8 +195,35 @@ class StudentProfileViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+    @action(
+        detail=False, methods=['post'], url_path='import',
+        permission_classes=[IsAdminUser], parser_classes=[MultiPartParser]
+    )
+    def import_students(self, request):
+        """Bulk-create students from an uploaded CSV file (staff only)"""
+        serializer = StudentImportFileSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
-class FacultyProfileViewSet(viewsets.ModelViewSet):
+        upload = serializer.validated_data['file']
+        try:
+            check_encoding(upload)
+        except UnicodeDecodeError:
+            return Response(
+                {'file': ['The file must be a UTF-8 encoded CSV file.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        file = io.TextIOWrapper(upload, encoding='utf-8-sig')
+        result = import_students(
+            read_student_csv(file),
+            chunk_size=settings.STUDENT_IMPORT_CHUNK_SIZE
+        )
+
+        response_status = status.HTTP_201_CREATED if result['created'] else status.HTTP_400_BAD_REQUEST
+        return Response(result, status=response_status)
+
+
+class FacultyProfileViewSet(StreamingListMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = Faculty.objects.select_related('user').all()
     serializer_class = FacultyProfileSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
@@ -215,7 +239,7 @@ class FacultyProfileViewSet(viewsets.ModelViewSet):
         if title:
             queryset = queryset.filter(title__icontains=title)
 
-        return queryset
+        return self.trim_queryset(queryset)
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def me(self, request):
@@ -266,3 +290,21 @@ class ChangePasswordView(generics.UpdateAPIView):
         return Response({
             'message': 'Password changed successfully'
         }, status=status.HTTP_200_OK)
+
+
+class ActivateAccountView(generics.GenericAPIView):
+    """Set the password of an imported account from its activation link"""
+    permission_classes = [AllowAny]
+    serializer_class = ActivateAccountSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        user = serializer.validated_data['user']
+        user.set_password(serializer.validated_data['password'])
+        user.save()
+
+        return Response({
+            'message': 'Account activated successfully'
+        }, status=status.HTTP_200_OK)